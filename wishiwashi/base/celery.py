@@ -2,6 +2,7 @@ from __future__ import absolute_import
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 from django.conf import settings
 
 
@@ -12,6 +13,14 @@ app = Celery('base')
 app.config_from_object('django.conf:settings')
 app.autodiscover_tasks(lambda: settings.INSTALLED_APPS)
 
+
+@worker_process_init.connect
+def warm_templates(**kwargs):
+    # Imported once Django is set up in the worker
+    from base.email_templates import warm_email_templates
+    warm_email_templates()
+
+
 @app.task(bind=True)
 def debug_task(self):
     print('Request: {0!r}'.format(self.request))
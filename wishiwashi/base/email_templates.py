@@ -0,0 +1,61 @@
+"""
+Compile the email templates before the first email is sent
+
+Outside DEBUG templates are loaded through Django's cached loader, so each
+process parses a template once. Celery workers warm the cache with every
+email template as they start rather than on the first email of each kind.
+"""
+import logging
+import os
+
+from django.conf import settings
+from django.template.loader import get_template
+
+
+logger = logging.getLogger(__name__)
+
+EMAIL_TEMPLATE_DIRS = (
+    'emails',
+    'bookings/emails',
+    'payments/emails',
+    'registration/emails',
+    'vendors/emails',
+)
+
+# Included by the email templates
+EMAIL_SNIPPETS = (
+    'snippets/address.html',
+    'snippets/address.txt',
+)
+
+
+def email_template_names():
+    """
+    :return: list of email template names, e.g. 'payments/emails/confirmation-order.html'
+    """
+    names = []
+
+    for template_dir in settings.TEMPLATE_DIRS:
+        for email_dir in EMAIL_TEMPLATE_DIRS:
+            path = os.path.join(template_dir, email_dir)
+            if not os.path.isdir(path):
+                continue
+
+            names.extend('{}/{}'.format(email_dir, name) for name in sorted(os.listdir(path))
+                         if os.path.isfile(os.path.join(path, name)))
+
+    return names + list(EMAIL_SNIPPETS)
+
+
+def warm_email_templates():
+    """
+    :return: int, number of templates compiled
+    """
+    names = email_template_names()
+
+    for name in names:
+        get_template(name)
+
+    logger.info('Compiled %d email templates', len(names))
+
+    return len(names)
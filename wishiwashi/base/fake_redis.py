@@ -0,0 +1,100 @@
+"""
+A stand-in for the Redis client in tests
+
+Patched in where get_redis is called. Values come back as bytes as they do
+from redis-py, strings in data and sorted sets in sorted_sets. Expiry is
+accepted and ignored.
+"""
+
+
+def _encode(value):
+    if isinstance(value, bytes):
+        return value
+    if not isinstance(value, str):
+        value = repr(value) if isinstance(value, float) else str(value)
+    return value.encode('utf-8')
+
+
+def _bound(bound, default):
+    """
+    :return: (float, exclusive) for a zrangebyscore min or max
+    """
+    bound = bound.decode('ascii') if isinstance(bound, bytes) else str(bound)
+    if bound in ('-inf', '+inf', 'inf'):
+        return default, False
+    if bound.startswith('('):
+        return float(bound[1:]), True
+    return float(bound), False
+
+
+def _between(score, low, high):
+    (low, low_open), (high, high_open) = _bound(low, float('-inf')), _bound(high, float('inf'))
+    return (score > low if low_open else score >= low) and (score < high if high_open else score <= high)
+
+
+class FakePipeline(object):
+    """
+    Runs each command straight away, execute() returns their results
+    """
+    def __init__(self, client):
+        self.client = client
+        self.results = []
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self.results.append(command(*args, **kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        results, self.results = self.results, []
+        return results
+
+
+class FakeRedis(object):
+    def __init__(self):
+        self.data = {}
+        self.sorted_sets = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = _encode(value)
+        return True
+
+    def incr(self, key):
+        value = int(self.data.get(key, 0)) + 1
+        self.data[key] = _encode(value)
+        return value
+
+    def delete(self, *keys):
+        deleted = 0
+        for key in keys:
+            if self.data.pop(key, None) is not None or self.sorted_sets.pop(key, None) is not None:
+                deleted += 1
+        return deleted
+
+    def zadd(self, key, score, member):
+        # As redis.StrictRedis, score before member
+        self.sorted_sets.setdefault(key, {})[_encode(member)] = float(score)
+        return 1
+
+    def zrangebyscore(self, key, low, high, withscores=False):
+        members = sorted((score, member) for member, score in self.sorted_sets.get(key, {}).items()
+                         if _between(score, low, high))
+        if withscores:
+            return [(member, score) for score, member in members]
+        return [member for _score, member in members]
+
+    def zremrangebyscore(self, key, low, high):
+        members = self.sorted_sets.get(key, {})
+        removed = [member for member, score in members.items() if _between(score, low, high)]
+        for member in removed:
+            del members[member]
+        return len(removed)
+
+    def pipeline(self):
+        return FakePipeline(self)
@@ -0,0 +1,86 @@
+"""
+A stand-in for the communicate service on localhost
+
+Used by tests and benchmarks that need real HTTP. Every email accepted is
+kept in emails and every request and TCP connection made to the server is
+counted.
+"""
+import threading
+
+from django.utils.six.moves import BaseHTTPServer, socketserver
+from django.utils.six.moves.urllib.parse import parse_qs
+import ujson as json
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    # Keep connections alive between requests
+    protocol_version = 'HTTP/1.1'
+    # Don't hold small replies back waiting for the client's ACK
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        BaseHTTPServer.BaseHTTPRequestHandler.setup(self)
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        status, reply = self.server.reply(self.path, body)
+        reply = json.dumps(reply).encode('utf-8')
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeCommunicateServer(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        BaseHTTPServer.HTTPServer.__init__(self, ('127.0.0.1', 0), _Handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.emails = []
+        # Status to answer with, e.g. 503 to act as if communicate is down
+        self.status = 200
+        # Emails to these addresses are refused
+        self.rejected = set()
+
+    @property
+    def endpoint(self):
+        return 'http://127.0.0.1:{}/communicate/'.format(self.server_address[1])
+
+    def reply(self, path, body):
+        with self.lock:
+            self.requests += 1
+
+        if self.status != 200:
+            return self.status, {'error': True}
+
+        if path != '/communicate/email':
+            return 404, {'error': True}
+
+        payload = json.loads(parse_qs(body.decode('utf-8'))['payload'][0])
+        if self.rejected.intersection(payload.get('recipients', [])):
+            return 200, {'error': True, 'errors': ['Invalid recipient']}
+
+        with self.lock:
+            self.emails.append(payload)
+            job_id = len(self.emails)
+        return 200, {'error': False, 'job_id': job_id}
+
+    def __enter__(self):
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+        self.server_close()
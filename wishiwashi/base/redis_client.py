@@ -0,0 +1,21 @@
+from django.conf import settings
+import redis
+
+
+_client = None
+
+
+def get_redis():
+    """
+    Process wide Redis client (connection pooled) for the Redis instance
+    Celery uses as its broker
+    """
+    global _client
+
+    if _client is None:
+        _client = redis.StrictRedis.from_url(
+            settings.BROKER_URL,
+            socket_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS,
+            socket_connect_timeout=settings.REDIS_SOCKET_TIMEOUT_SECONDS)
+
+    return _client
@@ -0,0 +1,163 @@
+"""
+Client for the communicate and render services
+
+All calls go through one requests.Session per service and process so
+connections are pooled and kept alive rather than opened for every email
+and PDF. Connection failures are retried with backoff, as are gateway
+errors from the render service. Each service has its own timeouts, and the
+latency of every call is logged and kept in service_metrics().
+"""
+from collections import defaultdict
+import logging
+import os
+import time
+
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
+import requests
+import ujson as json
+
+
+logger = logging.getLogger(__name__)
+
+COMMUNICATE = 'communicate'
+RENDER = 'render'
+
+# Connections kept open to each host
+POOL_SIZE = 10
+
+# Only retry when the email can't have reached communicate. A gateway error
+# may come after communicate accepted it and emails mustn't be sent twice.
+COMMUNICATE_RETRY = Retry(total=3,
+                          connect=3,
+                          read=0,
+                          status=0,
+                          allowed_methods=False,  # POST too
+                          backoff_factor=0.5,
+                          raise_on_status=False)
+
+# Rendering again is harmless so gateway errors are retried too
+RENDER_RETRY = Retry(total=3,
+                     connect=3,
+                     read=0,
+                     status=3,
+                     status_forcelist=(502, 503),
+                     allowed_methods=False,
+                     backoff_factor=0.5,
+                     raise_on_status=False)
+
+RETRIES = {
+    COMMUNICATE: COMMUNICATE_RETRY,
+    RENDER: RENDER_RETRY,
+}
+
+# service -> requests.Session
+_sessions = {}
+_sessions_pid = None
+
+# service -> calls, failures, seconds
+_metrics = defaultdict(lambda: [0, 0, 0.0])
+
+
+def get_session(service=COMMUNICATE):
+    """
+    :param str service: COMMUNICATE or RENDER, each has its own retries
+
+    :return: requests.Session for this process
+
+    Celery and gunicorn fork workers after importing this module, sockets
+    mustn't be shared with the parent so each process makes its own.
+    """
+    global _sessions, _sessions_pid
+
+    if _sessions_pid != os.getpid():
+        _sessions, _sessions_pid = {}, os.getpid()
+
+    if service not in _sessions:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                              max_retries=RETRIES[service])
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        # As before the services were pooled, their certificates aren't checked
+        session.verify = False
+        _sessions[service] = session
+
+    return _sessions[service]
+
+
+def _service_settings(service):
+    if service == COMMUNICATE:
+        return (HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
+                              settings.COMMUNICATE_SERVICE_PASSWORD),
+                (settings.SERVICE_CONNECT_TIMEOUT_SECONDS,
+                 settings.COMMUNICATE_SERVICE_TIMEOUT_SECONDS))
+    if service == RENDER:
+        return (HTTPBasicAuth(settings.RENDER_SERVICE_USERNAME,
+                              settings.RENDER_SERVICE_PASSWORD),
+                (settings.SERVICE_CONNECT_TIMEOUT_SECONDS,
+                 settings.RENDER_SERVICE_TIMEOUT_SECONDS))
+    raise ValueError('Unknown service {}'.format(service))
+
+
+def post(service, url, **kwargs):
+    """
+    :param str service: COMMUNICATE or RENDER
+    :param str url: full URL on that service
+    :param kwargs: passed on to requests, e.g. data or files
+
+    :return: requests.Response
+
+    Raises requests.RequestException when the service can't be reached
+    """
+    auth, timeout = _service_settings(service)
+    kwargs.setdefault('auth', auth)
+    kwargs.setdefault('timeout', timeout)
+
+    began = time.time()
+    failed = True
+    try:
+        resp = get_session(service).post(url, **kwargs)
+        failed = resp.status_code >= 500
+        return resp
+    finally:
+        elapsed = time.time() - began
+        metrics = _metrics[service]
+        metrics[0] += 1
+        metrics[1] += failed
+        metrics[2] += elapsed
+        logger.info('POST %s %s in %.0fms', service, url, elapsed * 1000,
+                    extra={'service': service, 'elapsed': elapsed, 'failed': failed})
+
+
+def send_email(payload):
+    """
+    :param dict payload: email for the communicate service
+
+    :return: int, communicate's job id
+
+    Raises AssertionError when communicate didn't accept the email
+    """
+    url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
+    resp = post(COMMUNICATE, url, data={'payload': json.dumps(payload)})
+    assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
+
+    resp = json.loads(resp.content)
+
+    assert resp['error'] is False, resp
+    assert int(resp['job_id']) > 0, resp
+
+    return int(resp['job_id'])
+
+
+def service_metrics():
+    """
+    :return: dict of service -> dict of calls, failures and mean_ms for
+             this process
+    """
+    return dict((service, {'calls': calls,
+                           'failures': failures,
+                           'mean_ms': seconds * 1000 / calls if calls else 0})
+                for service, (calls, failures, seconds) in _metrics.items())
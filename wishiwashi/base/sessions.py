@@ -0,0 +1,72 @@
+"""
+Session engine storing sessions in Redis
+
+Each session is one key which Redis expires, so nothing has to clear old
+sessions out. A session is only written back when its data has changed.
+"""
+from django.contrib.sessions.backends.base import CreateError, SessionBase
+
+from base.redis_client import get_redis
+
+KEY_PREFIX = 'session:'
+
+
+class SessionStore(SessionBase):
+    def __init__(self, session_key=None):
+        # Encoded session as last read or written, to tell if it changed
+        self._stored_data = None
+        super(SessionStore, self).__init__(session_key)
+
+    @property
+    def cache_key(self):
+        return KEY_PREFIX + self._get_or_create_session_key()
+
+    def load(self):
+        session_data = get_redis().get(self.cache_key)
+        if session_data is None:
+            self._session_key = None
+            return {}
+
+        self._stored_data = session_data.decode('ascii')
+        return self.decode(self._stored_data)
+
+    def exists(self, session_key):
+        return bool(session_key) and bool(get_redis().exists(KEY_PREFIX + session_key))
+
+    def create(self):
+        while True:
+            self._session_key = self._get_new_session_key()
+            try:
+                self.save(must_create=True)
+            except CreateError:
+                # Key wasn't unique. Try again.
+                continue
+            self.modified = True
+            return
+
+    def save(self, must_create=False):
+        if self.session_key is None:
+            return self.create()
+
+        session_data = self.encode(self._get_session(no_load=must_create))
+        if not must_create and session_data == self._stored_data:
+            return
+
+        expiry_age = max(self.get_expiry_age(), 1)
+        if not get_redis().set(self.cache_key, session_data, ex=expiry_age, nx=must_create):
+            raise CreateError
+
+        self._stored_data = session_data
+
+    def delete(self, session_key=None):
+        if session_key is None:
+            if self.session_key is None:
+                return
+            session_key = self.session_key
+        get_redis().delete(KEY_PREFIX + session_key)
+        self._stored_data = None
+
+    @classmethod
+    def clear_expired(cls):
+        # Redis expires sessions itself
+        pass
@@ -132,6 +132,16 @@ STATICFILES_STORAGE = 'pipeline.storage.PipelineCachedStorage'
 
 TEMPLATE_DIRS = [os.path.join(BASE_DIR, 'templates')]
 
+TEMPLATE_LOADERS = (
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+)
+if not DEBUG:
+    # Parse each template once per process (see base.email_templates)
+    TEMPLATE_LOADERS = (
+        ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+    )
+
 TEMPLATE_CONTEXT_PROCESSORS = (
     'base.context_processor.get_settings',
     'bookings.context_processors.total_items',
@@ -206,6 +216,12 @@ PIPELINE_JS = {
 
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
 
+# Sessions kept in Redis (see base.sessions), live database sessions are
+# copied over with ./manage.py migrate_sessions_to_redis
+REDIS_SESSIONS_ON = bool(os.environ.get("REDIS_SESSIONS_ON", "") == 'yes')
+if REDIS_SESSIONS_ON:
+    SESSION_ENGINE = 'base.sessions'
+
 LOGIN_URL = reverse_lazy('bookings:login')
 
 STRIPE_API_VERSION = '2015-09-08'
@@ -226,6 +242,12 @@ COMMUNICATE_SERVICE_ENDPOINT = os.environ.get("COMMUNICATE_SERVICE_ENDPOINT",
                                               "https://communicate.wishiwashi.com/communicate/")
 COMMUNICATE_SERVICE_USERNAME = os.environ.get("COMMUNICATE_SERVICE_USERNAME", "")
 COMMUNICATE_SERVICE_PASSWORD = os.environ.get("COMMUNICATE_SERVICE_PASSWORD", "")
+COMMUNICATE_SERVICE_TIMEOUT_SECONDS = 30
+# Emails sent to communicate at once by batched tasks, e.g. reminders
+COMMUNICATE_SERVICE_CONCURRENCY = 5
+
+# Connecting to the render and communicate services (see base.services)
+SERVICE_CONNECT_TIMEOUT_SECONDS = 5
 
 FROM_EMAIL_ADDRESS = 'help@wishiwashi.com'
 FROM_EMAIL_NAME = 'Wishi Washi'
@@ -238,6 +260,7 @@ VENDOR_WISHI_WASHI_PK = 1
 VENDOR_DEFAULT_CLEAN_ONLY_PK = 2
 
 BROKER_URL = os.environ['REDIS_URL']
+REDIS_SOCKET_TIMEOUT_SECONDS = 1
 CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_IGNORE_RESULT = True
@@ -249,6 +272,58 @@ SESSION_COOKIE_AGE = 60 * 60 * 24 * 7
 # Maximum slots (pick up or drop off) per hour
 MAX_APPOINTMENTS_PER_HOUR = 16
 
+# Slots held during checkout are given back if the order isn't placed
+# within this many minutes
+APPOINTMENT_SLOT_HOLD_MINUTES = 15
+
+# Serve slot counters from Redis (see bookings.slot_cache)
+SLOT_CACHE_ON = bool(os.environ.get("SLOT_CACHE_ON", "") == 'yes')
+
+# Cache item prices in process, versioned in Redis (see bookings.catalogue)
+CATALOGUE_CACHE_ON = bool(os.environ.get("CATALOGUE_CACHE_ON", "") == 'yes')
+# Upper bound on serving a catalogue version's price list and pages
+CATALOGUE_CACHE_SECONDS = 60 * 5
+
+# Per process, anything cached here is keyed by a version shared in Redis
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# How long get_latest_orders waits for a new order published through Redis
+# before answering, 0 to have vendor dashboards poll the database instead.
+# Each waiting dashboard holds a worker so only use with async workers
+VENDOR_ORDERS_LONG_POLL_SECONDS = int(os.environ.get("VENDOR_ORDERS_LONG_POLL_SECONDS", "0"))
+
+# Cache each member of staff's Vendor in Redis (see vendors.membership)
+VENDOR_CACHE_ON = bool(os.environ.get("VENDOR_CACHE_ON", "") == 'yes')
+
+# How vendor PDFs are rendered (see vendors.pdf_backends)
+VENDOR_PDF_BACKEND = os.environ.get("VENDOR_PDF_BACKEND", "vendors.pdf_backends.RenderServiceBackend")
+WKHTMLTOPDF_BINARY = os.environ.get("WKHTMLTOPDF_BINARY", "wkhtmltopdf")
+# Local renders running at once in each process
+VENDOR_PDF_LOCAL_PROCESSES = 2
+
+# Cache vendor prices in process, versioned in Redis (see vendors.price_matrix)
+VENDOR_PRICES_CACHE_ON = bool(os.environ.get("VENDOR_PRICES_CACHE_ON", "") == 'yes')
+
+# Render vendor PDFs in Celery rather than in the request (see vendors.pdf)
+VENDOR_PDF_ASYNC_ON = bool(os.environ.get("VENDOR_PDF_ASYNC_ON", "") == 'yes')
+# Rendered PDFs are kept in Redis for
+VENDOR_PDF_CACHE_SECONDS = 60 * 60 * 24
+
+# Vendor.last_viewed_the_orders_page is written at most this often
+VENDOR_LAST_VIEWED_SECONDS = 60
+
+# Keep vendors' orders page heartbeats in Redis and flush them to the
+# database every minute (see vendors.heartbeat)
+VENDOR_HEARTBEAT_ON = bool(os.environ.get("VENDOR_HEARTBEAT_ON", "") == 'yes')
+
+# customer_stats rollups are rebuilt nightly from this many days ago, responses
+# for periods before that are cached for good (see customer_stats.rollups)
+ORDER_ROLLUP_RECONCILE_DAYS = 7
+
 # Endpoints for tagging printing
 TAGGING_PRINTERS = ["https://star1.wishiwashi.com/orders/order",
                     "https://star2.wishiwashi.com/orders/order"]
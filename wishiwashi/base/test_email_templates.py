@@ -0,0 +1,30 @@
+from django.template.loader import get_template
+from django.template.loaders.filesystem import Loader
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+import mock
+
+from .email_templates import email_template_names, warm_email_templates
+
+
+@override_settings(TEMPLATE_LOADERS=(
+    ('django.template.loaders.cached.Loader', (
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    )),
+))
+class EmailTemplates(SimpleTestCase):
+    def test_names(self):
+        names = email_template_names()
+
+        self.assertIn('emails/base.html', names)
+        self.assertIn('bookings/emails/pick-up-order-reminder-subject.txt', names)
+        self.assertIn('payments/emails/confirmation-order.html', names)
+        self.assertIn('vendors/emails/new_order_available.txt', names)
+
+    def test_warmed_templates_not_read_again(self):
+        self.assertEqual(warm_email_templates(), len(email_template_names()))
+
+        with mock.patch.object(Loader, 'load_template_source', side_effect=AssertionError):
+            get_template('payments/emails/confirmation-order.html')
+            get_template('snippets/address.txt')
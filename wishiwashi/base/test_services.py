@@ -0,0 +1,61 @@
+from django.test import SimpleTestCase
+import mock
+from urllib3.util.retry import Retry
+
+from . import services
+from .fake_services import FakeCommunicateServer
+from .services import get_session, send_email, service_metrics
+
+
+class Services(SimpleTestCase):
+    def setUp(self):
+        self.server = FakeCommunicateServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        settings = self.settings(COMMUNICATE_SERVICE_ENDPOINT=self.server.endpoint)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_connection_kept_alive(self):
+        for _ in range(5):
+            send_email({'subject': 'Reminder', 'recipients': ['test@example.com']})
+
+        self.assertEqual(len(self.server.emails), 5)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_job_id(self):
+        self.assertEqual(send_email({}), 1)
+        self.assertEqual(send_email({}), 2)
+
+    def test_unavailable_not_retried(self):
+        self.server.status = 503
+        before = service_metrics().get(services.COMMUNICATE, {'calls': 0, 'failures': 0})
+
+        with self.assertRaises(AssertionError):
+            send_email({})
+
+        # communicate may have sent it before the gateway gave up
+        self.assertEqual(self.server.requests, 1)
+        metrics = service_metrics()[services.COMMUNICATE]
+        self.assertEqual(metrics['calls'], before['calls'] + 1)
+        self.assertEqual(metrics['failures'], before['failures'] + 1)
+
+    @mock.patch.object(Retry, 'get_backoff_time', return_value=0)
+    def test_render_unavailable_retried(self, get_backoff_time):
+        self.server.status = 503
+        calls = service_metrics().get(services.RENDER, {}).get('calls', 0)
+
+        resp = services.post(services.RENDER, self.server.endpoint + 'render')
+
+        self.assertEqual(resp.status_code, 503)
+        self.assertEqual(self.server.requests, 4)
+        self.assertTrue(get_backoff_time.called)
+        self.assertEqual(service_metrics()[services.RENDER]['calls'], calls + 1)
+
+    def test_new_session_after_fork(self):
+        session = get_session()
+        self.assertIs(get_session(), session)
+        self.assertIsNot(get_session(services.RENDER), session)
+
+        with mock.patch('base.services.os.getpid', return_value=-1):
+            self.assertIsNot(get_session(), session)
@@ -0,0 +1,75 @@
+import datetime
+
+from django.contrib.sessions.backends.base import CreateError
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from django.utils.six import StringIO
+import mock
+
+from .sessions import SessionStore
+
+
+@mock.patch('base.sessions.get_redis')
+class RedisSessions(TestCase):
+    def test_new_session_written_with_expiry(self, get_redis):
+        get_redis.return_value.exists.return_value = 0
+        get_redis.return_value.set.return_value = True
+
+        session = SessionStore()
+        session['items'] = {'1': 2}
+        session.save()
+
+        key, data = get_redis.return_value.set.call_args[0]
+        self.assertEqual(key, 'session:' + session.session_key)
+        self.assertEqual(get_redis.return_value.set.call_args[1], {'ex': 60 * 60 * 24 * 7, 'nx': True})
+        self.assertEqual(session.decode(data), {'items': {'1': 2}})
+
+    def test_key_collision(self, get_redis):
+        get_redis.return_value.set.return_value = None
+        session = SessionStore('a' * 32)
+
+        with self.assertRaises(CreateError):
+            session.save(must_create=True)
+
+    def test_unchanged_session_not_written(self, get_redis):
+        stored = SessionStore().encode({'postcode': 'W1 1AA'})
+        get_redis.return_value.get.return_value = stored.encode('ascii')
+
+        session = SessionStore('a' * 32)
+        session['postcode'] = 'W1 1AA'
+        session.save()
+
+        self.assertFalse(get_redis.return_value.set.called)
+
+        session['postcode'] = 'SW1 1AA'
+        session.save()
+
+        self.assertTrue(get_redis.return_value.set.called)
+
+    def test_missing_session(self, get_redis):
+        get_redis.return_value.get.return_value = None
+
+        session = SessionStore('a' * 32)
+
+        self.assertEqual(session.load(), {})
+        self.assertIsNone(session.session_key)
+
+
+class MigrateSessionsToRedis(TestCase):
+    @mock.patch('bookings.management.commands.migrate_sessions_to_redis.get_redis')
+    def test_live_sessions_copied(self, get_redis):
+        now = timezone.now()
+        Session.objects.create(session_key='live', session_data='data',
+                               expire_date=now + datetime.timedelta(hours=1))
+        Session.objects.create(session_key='expired', session_data='data',
+                               expire_date=now - datetime.timedelta(hours=1))
+
+        call_command('migrate_sessions_to_redis', stdout=StringIO())
+
+        pipe = get_redis.return_value.pipeline.return_value
+        self.assertEqual(pipe.set.call_count, 1)
+        key, data = pipe.set.call_args[0]
+        self.assertEqual((key, data), ('session:live', 'data'))
+        self.assertFalse(Session.objects.exists())
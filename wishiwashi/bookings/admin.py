@@ -1,6 +1,6 @@
 from django.contrib import admin
 from .models import (AbandonedOrders, Address, Category, CleanOnlyOrder, Item, ItemAndQuantity, OperatingTimeRange, Order, OrderNotes,
-                     OutCodes, OutCodeNotServed, Vendor, Voucher, ExpectedBackCleanOnlyOrder, TrackConfirmedOrderSlots)
+                     OrderStatusChange, OutCodes, OutCodeNotServed, Vendor, Voucher, ExpectedBackCleanOnlyOrder, TrackConfirmedOrderSlots)
 from payments.models import Stripe
 from vendors.models import OrderIssue
 
@@ -69,6 +69,14 @@ class CleanOnlyOrderInline(admin.TabularInline):
     readonly_fields = ('created',)
 
 
+class OrderStatusChangeInline(admin.TabularInline):
+    model = OrderStatusChange
+    extra = 0
+
+    fields = ('from_status', 'to_status', 'reason', 'created')
+    readonly_fields = ('from_status', 'to_status', 'reason', 'created')
+
+
 class StripeInline(admin.StackedInline):
     model = Stripe
     extra = 0
@@ -109,6 +117,7 @@ class OrderAdmin(admin.ModelAdmin):
         StripeInline,
         OrderNotesInline,
         OrderIssueInline,
+        OrderStatusChangeInline,
     ]
     date_hierarchy = 'placed_time'
     fieldsets = (
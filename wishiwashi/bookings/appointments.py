@@ -1,11 +1,25 @@
 import datetime
 from collections import defaultdict
 
-from dateutil.parser import parse
 from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
 import pytz
 
-from bookings.models import TrackConfirmedOrderSlots
+from bookings import slot_cache
+from bookings.models import Order, TrackConfirmedOrderSlots
+
+
+class SlotUnavailable(Exception):
+    """
+    Raised when an appointment slot is at capacity.
+
+    slot is the Order field name, 'pick_up_time' or 'drop_off_time'
+    """
+    def __init__(self, slot):
+        super(SlotUnavailable, self).__init__(slot)
+        self.slot = slot
 
 
 def appointment_slot_available(appointment):
@@ -16,12 +30,15 @@ def appointment_slot_available(appointment):
 
     If slot is available return True otherwise False
     """
-    try:
-        slot = TrackConfirmedOrderSlots.objects.get(appointment=appointment)
+    if settings.SLOT_CACHE_ON:
+        counter = slot_cache.slot_counter(appointment)
+        if counter is not None:
+            return counter < settings.MAX_APPOINTMENTS_PER_HOUR
 
-        return slot.counter < settings.MAX_APPOINTMENTS_PER_HOUR
-    except TrackConfirmedOrderSlots.DoesNotExist:
-        return True
+    counter = TrackConfirmedOrderSlots.objects.filter(
+        appointment=appointment).values_list('counter', flat=True)[:1]
+
+    return not counter or counter[0] < settings.MAX_APPOINTMENTS_PER_HOUR
 
 
 def appointment_slot_available_session(session_appointment):
@@ -68,74 +85,125 @@ def slots_taken(min_date, max_date):
     slots_taken = defaultdict(list)
     tz_local = pytz.timezone(settings.TIME_ZONE)
 
-    for slot in TrackConfirmedOrderSlots.objects.filter(
+    appointments = None
+    if settings.SLOT_CACHE_ON:
+        appointments = slot_cache.full_slots(min_date, max_date)
+
+    if appointments is None:
+        # Only reads indexed columns
+        appointments = TrackConfirmedOrderSlots.objects.filter(
             appointment__gte=min_date,
             appointment__lte=max_date,
-            counter__gte=settings.MAX_APPOINTMENTS_PER_HOUR):
-        local_time = slot.appointment.astimezone(tz_local)
+            counter__gte=settings.MAX_APPOINTMENTS_PER_HOUR).order_by(
+                'appointment').values_list('appointment', flat=True)
+
+    for appointment in appointments:
+        local_time = appointment.astimezone(tz_local)
         slots_taken[local_time.strftime("%Y-%m-%d")].append(local_time.hour)
 
     return slots_taken
 
 
-def min_max_dates_for_calendar(calendar_grid):
-    tz_local = pytz.timezone(settings.TIME_ZONE)
+def reserve_appointment_slot(appointment):
+    """
+    :param appointment: datetime object
+
+    :return: boolean
+
+    Take one place in the slot if it's below capacity. The capacity check
+    and increment are one conditional UPDATE so concurrent checkouts can't
+    push the slot past MAX_APPOINTMENTS_PER_HOUR.
+    """
+    slots = TrackConfirmedOrderSlots.objects.filter(appointment=appointment)
+
+    if slots.filter(counter__lt=settings.MAX_APPOINTMENTS_PER_HOUR).update(
+            counter=F('counter') + 1):
+        return True
 
-    # Beginning of day
-    min_date = min([tz_local.localize(parse(day['date']))
-                    for day in calendar_grid])
+    if slots.exists():
+        return False
 
-    max_date = max([tz_local.localize(parse(day['date']))
-                    for day in calendar_grid])
+    # First booking for this hour
+    try:
+        with transaction.atomic():
+            TrackConfirmedOrderSlots.objects.create(appointment=appointment,
+                                                    counter=1)
+        return True
+    except IntegrityError:
+        # Created by a concurrent checkout, try again against that row
+        return slots.filter(
+            counter__lt=settings.MAX_APPOINTMENTS_PER_HOUR).update(
+                counter=F('counter') + 1) > 0
 
-    # End of day
-    max_date = max_date.replace(hour=23, minute=59, second=59)
 
-    return min_date, max_date
+def release_appointment_slot(appointment):
+    """
+    :param appointment: datetime object
+
+    Give back a place taken by reserve_appointment_slot
+    """
+    TrackConfirmedOrderSlots.objects.filter(
+        appointment=appointment,
+        counter__gt=0).update(counter=F('counter') - 1)
 
 
-def mark_unavailable_slots(calendar_grid):
+def hold_appointment_slots(order):
     """
-    :param list calendar_grid: contains dictionary of each day
+    :param order: Order object
+
+    :return: boolean, False if the order's slots were already held, i.e.
+             the payment form was submitted twice, or it has been placed
 
-    Example of dictionary in calendar_grid list:
+    Reserve both the pick up and drop off slots of an order ahead of
+    authorising payment. Either both are reserved or neither is.
+
+    Raises SlotUnavailable if either slot is at capacity
+    """
+    slots_held_time = timezone.now()
 
-    {'date': '2015-03-20',
-    'day_name': 'Friday',
-    'day_of_month': 20,
-    'month_name': 'March',
-    'time_slots': [{'available': True, 'hour': '08', 'label': '8 - 9am'},
-                    {'available': True, 'hour': '09', 'label': '9 - 10am'},
-                    {'available': True, 'hour': '10', 'label': '10 - 11am'},
-                    {'available': True, 'hour': '11', 'label': '11 - 12pm'},
-                    {'available': True, 'hour': '12', 'label': '12 - 1pm'},
-                    {'available': True, 'hour': '13', 'label': '1 - 2pm'},
-                    {'available': True, 'hour': '14', 'label': '2 - 3pm'},
-                    {'available': True, 'hour': '15', 'label': '3 - 4pm'},
-                    {'available': True, 'hour': '16', 'label': '4 - 5pm'},
-                    {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                    {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                    {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                    {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                    {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                    {'available': True, 'hour': '22', 'label': '10 - 11pm'}]}]
+    with transaction.atomic():
+        # Only the first submission holds, others don't count twice
+        if not Order.objects.filter(pk=order.pk, slots_held_time__isnull=True,
+                                    placed=False).update(slots_held_time=slots_held_time):
+            return False
+
+        for slot in ('pick_up_time', 'drop_off_time'):
+            if not reserve_appointment_slot(getattr(order, slot)):
+                raise SlotUnavailable(slot)
+
+    order.slots_held_time = slots_held_time
+
+    if settings.SLOT_CACHE_ON:
+        for slot in ('pick_up_time', 'drop_off_time'):
+            slot_cache.increment(getattr(order, slot))
+
+    return True
+
+
+def release_appointment_slots(order):
+    """
+    :param order: Order object
+
+    :return: boolean
 
-    return list
+    Release a hold taken by hold_appointment_slots, i.e. when payment
+    fails. Safe to call more than once, only the first call releases.
     """
-    min_date, max_date = min_max_dates_for_calendar(calendar_grid)
+    with transaction.atomic():
+        released = Order.objects.filter(
+            pk=order.pk,
+            slots_held_time__isnull=False).update(slots_held_time=None)
+        order.slots_held_time = None
 
-    unavailable_slots = slots_taken(min_date, max_date)
-    if not unavailable_slots:
-        return calendar_grid
+        if not released:
+            return False
 
-    for day in calendar_grid:
-        date = day['date']
-        if date in unavailable_slots:
-            for slot in day['time_slots']:
-                hour = int(slot['hour'])
-                if hour in unavailable_slots[date]:
-                    slot['available'] = False
+        for slot in ('pick_up_time', 'drop_off_time'):
+            release_appointment_slot(getattr(order, slot))
 
-    return calendar_grid
+    if settings.SLOT_CACHE_ON:
+        for slot in ('pick_up_time', 'drop_off_time'):
+            slot_cache.increment(getattr(order, slot), -1)
 
+    return True
 
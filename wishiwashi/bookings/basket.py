@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from django.db import connection, transaction
+
+from .models import ItemAndQuantity, Order
+from .prices import price_basket
+
+TWOPLACES = Decimal('0.01')
+
+
+def _allocate_pks(model, count):
+    """
+    :param model: model class with a serial primary key
+    :param int count: number of keys wanted
+
+    :return: list of primary keys or None if the database can't hand them out
+
+    Django 1.8 bulk_create doesn't set primary keys, taking them from the
+    sequence first lets the new rows be linked straight away
+    """
+    if connection.vendor != 'postgresql':
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+                       [model._meta.db_table, model._meta.pk.column, count])
+        return [row[0] for row in cursor.fetchall()]
+
+
+def sync_order_items(order, items, line_prices):
+    """
+    :param order: Order object
+    :param dict items: {item.pk: quantity,..} as kept in the session
+    :param dict line_prices: {item.pk: price * quantity} from price_basket
+
+    Make the order's lines match items. Lines which haven't changed are
+    left alone, the rest are removed with one delete and replaced with one
+    insert and one M2M add.
+    """
+    wanted = dict((int(item_pk), int(quantity)) for item_pk, quantity in items.items())
+    prices = dict((item_pk, price.quantize(TWOPLACES)) for item_pk, price in line_prices.items())
+
+    unchanged = set()
+    stale = []
+    for line in order.items.all():
+        if (line.item_id in wanted and line.item_id not in unchanged and
+                line.quantity == wanted[line.item_id] and line.price == prices[line.item_id]):
+            unchanged.add(line.item_id)
+        else:
+            stale.append(line.pk)
+
+    new_lines = [ItemAndQuantity(item_id=item_pk, quantity=quantity, price=prices[item_pk])
+                 for item_pk, quantity in wanted.items()
+                 if item_pk not in unchanged]
+
+    if stale:
+        # Removes the order's links to them too
+        ItemAndQuantity.objects.filter(pk__in=stale).delete()
+
+    if not new_lines:
+        return
+
+    pks = _allocate_pks(ItemAndQuantity, len(new_lines))
+    if pks is None:
+        for line in new_lines:
+            line.save()
+    else:
+        for line, pk in zip(new_lines, pks):
+            line.pk = pk
+        ItemAndQuantity.objects.bulk_create(new_lines)
+
+    Order.items.through.objects.bulk_create([
+        Order.items.through(order_id=order.pk, itemandquantity_id=line.pk)
+        for line in new_lines
+    ])
+
+
+def update_order_basket(order, items):
+    """
+    :param order: Order object
+    :param dict items: {item.pk: quantity,..}, empty to remove all items
+
+    :return: BasketPrice
+
+    Reprice the order and bring its lines in line with items
+    """
+    with transaction.atomic():
+        basket_price = price_basket(items, order.voucher)
+        order.total_price_of_order = basket_price.total
+        order.transportation_charge = basket_price.transportation_charge
+        order.save()
+
+        sync_order_items(order, items, basket_price.line_prices)
+
+    return basket_price
@@ -1,16 +1,17 @@
+from array import array
+from collections import namedtuple
 from copy import deepcopy
 from datetime import datetime, timedelta
 
-from dateutil.parser import parse
 from django.conf import settings
 from django.core.urlresolvers import reverse
 from django.utils import timezone
 from icalendar import Calendar, Event, vText, vCalAddress
 import pytz
-from workalendar.europe import UnitedKingdom as UKBankHolidays
 
-from bookings.appointments import mark_unavailable_slots
+from bookings.appointments import slots_taken
 from bookings.templatetags.postcodes import format_postcode
+from bookings.working_days import is_working_day, working_day_after
 
 
 MONDAY = 0
@@ -92,54 +93,6 @@ def get_icalendar_str(order):
     return cal.to_ical()
 
 
-def mark_unavailable(calendar_grid, not_before=None, not_after=None):
-    """
-    :param dict calendar_grid: calender grid dictionaries
-    :param object not_before: starting cut off time (datetime object)
-    :param object not_after: ending cut off time (datetime object)
-
-    :return: calender grid dictionaries
-    :rtype: dict
-    """
-    tz_london = pytz.timezone(settings.TIME_ZONE)
-    for day in calendar_grid:
-        for timeslot in day['time_slots']:
-            slot_time = tz_london.localize(parse('%s %02d' % (day['date'], int(timeslot['hour']))))
-
-            if not_before:
-                if slot_time < not_before:
-                    timeslot['available'] = False
-
-            if not_after:
-                if slot_time > not_after:
-                    timeslot['available'] = False
-
-    return calendar_grid
-
-
-def remove_weeks_with_no_availability(calendar_grid, start_week=0, end_week=5):
-    for week_offset in range(start_week, end_week):
-        availability = set()
-
-        # Mon-Sat
-        for day_offset in range(MONDAY, SUNDAY):
-            for timeslot in calendar_grid[(week_offset * 6) + day_offset]['time_slots']:
-                availability.add(timeslot['available'])
-
-        if availability == set([False]):
-            # Mon-Sat
-            for day_offset in range(MONDAY, SUNDAY):
-                calendar_grid[(week_offset * 6) + day_offset] = None
-
-    for week_offset in reversed(range(start_week, end_week)):
-        # Mon-Sat
-        for day_offset in reversed(range(MONDAY, SUNDAY)):
-            if not calendar_grid[(week_offset * 6) + day_offset]:
-                del calendar_grid[(week_offset * 6) + day_offset]
-
-    return calendar_grid
-
-
 def operating_hours(weekly_operating_hours):
     """
     :param list hours_of_operation: indexed by day, value holds dictionary of available time slots
@@ -195,53 +148,6 @@ def get_starting_monday(weekly_operating_hours):
     return starting_monday
 
 
-def build_calendar_grid(weekly_operating_hours, unavailable_day):
-    now_london = timezone.localtime(timezone.now())
-    hour_london = now_london.hour
-
-    # Build the calendar grid
-    calendar_grid = []
-    bank_holidays = UKBankHolidays()
-
-    starting_monday = get_starting_monday(weekly_operating_hours)
-    assert starting_monday is not None, 'Starting Monday was not set'
-
-    # 5 weeks
-    for week_offset in range(0, 5):
-        # 6 days (Monday - Saturday)
-        for day_offset in range(MONDAY, SUNDAY):
-            _day = starting_monday + timedelta(
-                days=day_offset + (week_offset * 7))
-
-            day = {
-                'month_name': _day.strftime('%B'),  # December, January, etc...
-                'day_of_month': int(_day.strftime('%d')),  # 1, 15, 31, etc...
-                'day_name': _day.strftime('%A'),  # Monday, etc...
-                'date': _day.strftime('%Y-%m-%d'),  # 2015-01-02, etc...
-                'time_slots': deepcopy(weekly_operating_hours[day_offset]),
-            }
-
-            # Mark whole day as unavailable if it's a bank holiday and
-            # remove days which are in the past or more than 28 days into the
-            # future
-            days_since_today = _day - now_london
-
-            if (day_offset in range(MONDAY, SATURDAY) and bank_holidays.is_working_day(_day) is False):
-                day['time_slots'] = deepcopy(unavailable_day)
-
-            if (days_since_today.days < 0 or days_since_today.days > 28):
-                day['time_slots'] = deepcopy(unavailable_day)
-
-            # Remove hours that have passed already today
-            if _day.date() == now_london.date(): # Today
-                for _index, _time_slot in enumerate(day['time_slots']):
-                    if int(_time_slot['hour']) < int(hour_london + MIN_HOURS_BEFORE_PICK_UP):
-                        day['time_slots'][_index]['available'] = False
-
-            calendar_grid.append(day)
-    return calendar_grid
-
-
 def daterange(start_date, end_date):
     """
     Datetime generator that yields datetimes
@@ -312,22 +218,15 @@ def drop_off_with_inactive_days(pick_up_time, drop_off_time):
 
     Returns a local datetime
     """
-    bank_holidays = UKBankHolidays()
+    days = (drop_off_time.date() - pick_up_time.date()).days
+    if days < 1:
+        return drop_off_time
 
-    for date in daterange(pick_up_time, drop_off_time):
-        # Any day in between that is a Sunday. Add 24hr
-        # Mon-Fri and Bank holiday? Add 24hr
-        if (date.weekday() == SUNDAY or
-            ((MONDAY <= date.weekday() <= FRIDAY)
-             and bank_holidays.is_working_day(date) is False)):
-            # Add 24 hrs
-            following_day = drop_off_time + timedelta(days=1)
-            return drop_off_with_inactive_days(
-                pick_up_time=date,
-                drop_off_time=following_day
-            )
+    # Drop off lands on the same number of working days after the pick up
+    drop_off_date = working_day_after(pick_up_time, days)
 
-    return drop_off_time
+    return drop_off_time + timedelta(
+        days=(drop_off_date - drop_off_time.date()).days)
 
 
 def drop_off_not_before(pick_up_time):
@@ -403,6 +302,198 @@ def get_unavailable_day(hour_start=0, hour_end=24):
     return unavailable_day
 
 
+# Day marked as unavailable, every day of the grid shares these hours
+UNAVAILABLE_DAY = get_unavailable_day(hour_start=WEEKDAY_OPENING_HOUR,
+                                      hour_end=WEEKDAY_CLOSING_HOUR)
+
+# Weekly operating hours Mon-Sat. Treat as read-only.
+WEEKLY_OPERATING_HOURS = operating_hours(
+    [deepcopy(UNAVAILABLE_DAY) for _ in range(MONDAY, SUNDAY)])
+
+CALENDAR_WEEKS = 5
+CALENDAR_DAYS_PER_WEEK = 6  # Monday - Saturday
+MAX_DAYS_IN_ADVANCE = 28
+
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+# The parts of the calendar grid which only change once a day. Availability
+# and slot start times are flat arrays indexed by
+# (day_index * len(slots)) + slot_index.
+StaticGrid = namedtuple('StaticGrid', ['days', 'day_index', 'slots',
+                                       'hour_index', 'available',
+                                       'slot_times', 'min_date',
+                                       'max_date'])
+
+_static_grids = {}
+
+
+def _timestamp(dt):
+    return (dt - EPOCH).total_seconds()
+
+
+def build_static_grid(today, starting_monday):
+    """
+    :param object today: local date
+    :param object starting_monday: local date of the first Monday in the grid
+
+    :return: StaticGrid
+
+    Operating hours, bank holidays, labels and the 28 day booking window.
+    """
+    tz_london = pytz.timezone(settings.TIME_ZONE)
+
+    days, day_index = [], {}
+    available = bytearray()
+    slot_times = array('d')
+
+    for week_offset in range(0, CALENDAR_WEEKS):
+        # 6 days (Monday - Saturday)
+        for day_offset in range(MONDAY, SUNDAY):
+            _day = starting_monday + timedelta(
+                days=day_offset + (week_offset * 7))
+            date = _day.strftime('%Y-%m-%d')
+
+            day_index[date] = len(days)
+            days.append((_day.strftime('%B'), _day.day,
+                         _day.strftime('%A'), date))
+
+            # Whole day is unavailable if it's a bank holiday, in the past or
+            # more than 28 days into the future
+            days_since_today = (_day - today).days
+            is_open = (0 <= days_since_today <= MAX_DAYS_IN_ADVANCE and
+                       is_working_day(_day))
+
+            for slot in WEEKLY_OPERATING_HOURS[day_offset]:
+                available.append(int(is_open and slot['available']))
+                slot_time = tz_london.localize(
+                    datetime(_day.year, _day.month, _day.day,
+                             int(slot['hour'])))
+                slot_times.append(_timestamp(slot_time))
+
+    slots = tuple((slot['hour'], slot['label']) for slot in UNAVAILABLE_DAY)
+    hour_index = dict((int(hour), index)
+                      for index, (hour, _label) in enumerate(slots))
+
+    # Beginning of first day, end of last day
+    first, last = starting_monday, _day
+    min_date = tz_london.localize(datetime(first.year, first.month,
+                                           first.day))
+    max_date = tz_london.localize(datetime(last.year, last.month, last.day,
+                                           23, 59, 59))
+
+    return StaticGrid(tuple(days), day_index, slots, hour_index,
+                      bytes(available), slot_times, min_date, max_date)
+
+
+def get_static_grid():
+    """
+    :return: StaticGrid
+
+    Built once per day (and starting Monday) per process.
+    """
+    now_london = timezone.localtime(timezone.now())
+    starting_monday = get_starting_monday(WEEKLY_OPERATING_HOURS)
+    assert starting_monday is not None, 'Starting Monday was not set'
+
+    key = (now_london.date(), starting_monday.date())
+    static_grid = _static_grids.get(key)
+
+    if static_grid is None:
+        static_grid = build_static_grid(*key)
+        _static_grids.clear()
+        _static_grids[key] = static_grid
+
+    return static_grid
+
+
+def mark_unavailable_times(static_grid, available, not_before=None,
+                           not_after=None):
+    """
+    :param StaticGrid static_grid: static calendar grid
+    :param bytearray available: availability, modified in place
+    :param object not_before: starting cut off time (datetime object)
+    :param object not_after: ending cut off time (datetime object)
+    """
+    not_before = _timestamp(not_before) if not_before else None
+    not_after = _timestamp(not_after) if not_after else None
+
+    for index, slot_time in enumerate(static_grid.slot_times):
+        if not_before is not None and slot_time < not_before:
+            available[index] = 0
+        elif not_after is not None and slot_time > not_after:
+            available[index] = 0
+
+
+def mark_full_slots(static_grid, available):
+    """
+    :param StaticGrid static_grid: static calendar grid
+    :param bytearray available: availability, modified in place
+    """
+    slots_per_day = len(static_grid.slots)
+    full_slots = slots_taken(static_grid.min_date, static_grid.max_date)
+
+    for date, hours in full_slots.items():
+        day_index = static_grid.day_index.get(date)
+        if day_index is None:
+            continue
+
+        for hour in hours:
+            slot_index = static_grid.hour_index.get(hour)
+            if slot_index is not None:
+                available[(day_index * slots_per_day) + slot_index] = 0
+
+
+def weeks_with_availability(static_grid, available, start_week=0,
+                            end_week=CALENDAR_WEEKS):
+    """
+    :return: list of week offsets to display
+
+    Weeks between start_week and end_week are dropped if every slot is
+    unavailable.
+    """
+    slots_per_week = len(static_grid.slots) * CALENDAR_DAYS_PER_WEEK
+    weeks = []
+
+    for week_offset in range(0, CALENDAR_WEEKS):
+        if start_week <= week_offset < end_week:
+            offset = week_offset * slots_per_week
+            if not any(available[offset:offset + slots_per_week]):
+                continue
+        weeks.append(week_offset)
+
+    return weeks
+
+
+def render_calendar_grid(static_grid, available, weeks):
+    """
+    :return: calender grid dictionaries
+    :rtype: list
+    """
+    slots_per_day = len(static_grid.slots)
+    calendar_grid = []
+
+    for week_offset in weeks:
+        for day_offset in range(MONDAY, SUNDAY):
+            day_index = (week_offset * CALENDAR_DAYS_PER_WEEK) + day_offset
+            month_name, day_of_month, day_name, date = \
+                static_grid.days[day_index]
+            offset = day_index * slots_per_day
+
+            calendar_grid.append({
+                'month_name': month_name,  # December, January, etc...
+                'day_of_month': day_of_month,  # 1, 15, 31, etc...
+                'day_name': day_name,  # Monday, etc...
+                'date': date,  # 2015-01-02, etc...
+                'time_slots': [{'available': bool(available[offset + index]),
+                                'hour': hour,
+                                'label': label}
+                               for index, (hour, label)
+                               in enumerate(static_grid.slots)],
+            })
+
+    return calendar_grid
+
+
 def get_calendar(is_pick_up_time=True, out_code=None, pick_up_time=None):
     """
     :param bool is_pick_up_time: toggle for either a pick-up time or delivery time grid
@@ -415,38 +506,38 @@ def get_calendar(is_pick_up_time=True, out_code=None, pick_up_time=None):
     assert out_code is not None
     assert pick_up_time is None if is_pick_up_time else pick_up_time
 
-    # Day marked as unavailable
-    unavailable_day = get_unavailable_day(hour_start=WEEKDAY_OPENING_HOUR, hour_end=WEEKDAY_CLOSING_HOUR)
-
-    # Week marked as unavailable Mon-Sat
-    weekly_operating_hours = [deepcopy(unavailable_day) for _ in range(MONDAY, SUNDAY)]
+    now_london = timezone.localtime(timezone.now())
 
-    # Mark weekly operating hours as available
-    weekly_operating_hours = operating_hours(weekly_operating_hours)
+    static_grid = get_static_grid()
+    available = bytearray(static_grid.available)
 
-    # Build calendar grid of forthcoming slots for X number of weeks
-    calendar_grid = build_calendar_grid(weekly_operating_hours, unavailable_day)
+    # Remove hours that have passed already today
+    today_index = static_grid.day_index.get(now_london.strftime('%Y-%m-%d'))
+    if today_index is not None:
+        offset = today_index * len(static_grid.slots)
+        for index, (hour, _label) in enumerate(static_grid.slots):
+            if int(hour) < now_london.hour + MIN_HOURS_BEFORE_PICK_UP:
+                available[offset + index] = 0
 
     if is_pick_up_time:
         not_before = pick_up_not_before()
-        not_after = timezone.localtime(timezone.now()) + timedelta(days=MAX_DAYS_PICK_UP)
-        calendar_grid = mark_unavailable(calendar_grid, not_before=not_before, not_after=not_after)
+        not_after = now_london + timedelta(days=MAX_DAYS_PICK_UP)
+        mark_unavailable_times(static_grid, available,
+                               not_before=not_before, not_after=not_after)
     else:
         not_before = drop_off_not_before(pick_up_time)
-        calendar_grid = mark_unavailable(
-            calendar_grid,
-            not_before=not_before
-        )
+        mark_unavailable_times(static_grid, available, not_before=not_before)
 
     # Check for full slots
-    calendar_grid = mark_unavailable_slots(calendar_grid)
+    mark_full_slots(static_grid, available)
 
     if is_pick_up_time:
-        calendar_grid = remove_weeks_with_no_availability(calendar_grid, start_week=1)
+        weeks = weeks_with_availability(static_grid, available, start_week=1)
     else:
-        calendar_grid = remove_weeks_with_no_availability(calendar_grid, start_week=0, end_week=1)
+        weeks = weeks_with_availability(static_grid, available,
+                                        start_week=0, end_week=1)
 
-    return calendar_grid
+    return render_calendar_grid(static_grid, available, weeks)
 
 
 def get_day_and_week_time_slot_lands_on(calendar_grid, selected_date):
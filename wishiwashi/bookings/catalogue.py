@@ -0,0 +1,46 @@
+"""
+Catalogue version shared by every process
+
+Anything derived from items or categories (prices, price list columns) can
+be cached in process keyed by this version. Saving or deleting an item or
+category bumps it so every process drops its copy on the next read.
+"""
+import logging
+
+from django.conf import settings
+import redis
+
+from base.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'catalogue:version'
+
+
+def catalogue_version():
+    """
+    :return: int or None if the version can't be read, in which case
+    nothing should be served from cache
+    """
+    if not settings.CATALOGUE_CACHE_ON:
+        return None
+
+    try:
+        return int(get_redis().get(VERSION_KEY) or 0)
+    except redis.RedisError:
+        logger.exception('Could not read catalogue version')
+        return None
+
+
+def bump_catalogue_version(*args, **kwargs):
+    """
+    Signal receiver, invalidates all caches of the catalogue
+    """
+    if not settings.CATALOGUE_CACHE_ON:
+        return
+
+    try:
+        get_redis().incr(VERSION_KEY)
+    except redis.RedisError:
+        logger.exception('Could not bump catalogue version')
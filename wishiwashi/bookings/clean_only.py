@@ -1,5 +1,6 @@
 from datetime import timedelta
-from workalendar.europe import UnitedKingdom as UKBankHolidays
+
+from bookings.working_days import working_day_before
 
 
 def pre_working_day(drop_off_time):
@@ -9,20 +10,13 @@ def pre_working_day(drop_off_time):
     A working day for Wishi Washi is Mon-Sat
     if day is Monday: return Saturday, otherwise: return previous working day (non bank holiday)
     """
-    bank_holidays = UKBankHolidays()
     if drop_off_time.weekday() == 0:
         # Saturday
         return drop_off_time - timedelta(days=2)
-    else:
-        # Previous day
-        previous_day = drop_off_time - timedelta(days=1)
-        while True:
-            # Sunday or a non bank holiday working day
-            if previous_day.weekday() == 5 or bank_holidays.is_working_day(previous_day) is True:
-                return previous_day
-            else:
-                # Step back another day
-                previous_day = previous_day - timedelta(days=1)
+
+    previous_day = working_day_before(drop_off_time)
+    return drop_off_time - timedelta(
+        days=(drop_off_time.date() - previous_day).days)
 
 
 def expected_back(drop_off_time):
@@ -5,12 +5,15 @@ from dateutil.parser import parse
 from django.conf import settings
 from django.contrib import messages
 from django.core.urlresolvers import reverse
-from django.http import HttpResponseRedirect
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.utils.functional import wraps
 from ukpostcodeparser import parse_uk_postcode
 import pytz
 
 from bookings.calendar import pick_up_not_before, drop_off_not_before
+from bookings.catalogue import catalogue_version
 from bookings.models import Address, Order
 from bookings.appointments import appointment_slot_available_session
 
@@ -170,3 +173,36 @@ def check_session_data(check_postcode=False, check_pick_up_time=False,
         return wraps(func)(inner_decorator)
 
     return decorator
+
+
+def cache_catalogue_page(view):
+    """
+    Cache a page built from the catalogue for visitors who aren't logged in
+    and have nothing in their basket, these all see the same page. Cached per
+    catalogue version so changes to items or categories show straight away.
+    """
+    @wraps(view)
+    def inner_decorator(request, *args, **kwargs):
+        version = None
+        if not request.user.is_authenticated() and not request.session.get('items'):
+            version = catalogue_version()
+
+        key = 'catalogue-page:{}:{}'.format(version, request.get_full_path())
+        page = cache.get(key) if version is not None else None
+
+        if page is not None:
+            response = HttpResponse(page['content'], content_type=page['content_type'])
+        else:
+            response = view(request, *args, **kwargs)
+
+            if version is None:
+                patch_cache_control(response, private=True)
+            elif response.status_code == 200:
+                cache.set(key, {'content': response.content, 'content_type': response['Content-Type']},
+                          settings.CATALOGUE_CACHE_SECONDS)
+
+        # Whether the page can be shared depends on the session
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    return inner_decorator
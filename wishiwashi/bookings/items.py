@@ -1,22 +1,39 @@
 from math import ceil
+
+from django.conf import settings
+from django.core.cache import cache
+
+from bookings.catalogue import catalogue_version
 from bookings.models import Item
 
 
-def get_columns_of_items(num_columns=3):
+def build_columns_of_items(num_columns=3):
+    """
+    :param int num_columns: columns to split the price list over
+
+    :return: list of columns, each a list of item dictionaries with name,
+    price and category (id and name)
+    """
     items = Item.objects.filter(
         visible=True, category__visible=True
-    ).prefetch_related('category').order_by('category__name', 'name')
+    ).order_by('category__name', 'name').values_list('name', 'price', 'category_id', 'category__name')
+
+    items = [{'name': name, 'price': price, 'category': {'id': category_id, 'name': category_name}}
+             for name, price, category_id, category_name in items]
+
+    if not items:
+        return []
 
     items_per_column = ceil(len(items) / float(num_columns))
 
     columns = list()
     current_column = 0
-    category_id = items[0].category.id
+    category_id = items[0]['category']['id']
     for index, item in enumerate(items):
         if index and index % items_per_column == 0.0:
             current_column += 1
             # Don't split same categories over separate columns
-            if category_id == item.category.id:
+            if category_id == item['category']['id']:
                 columns[current_column - 1].append(item)
                 continue
 
@@ -26,6 +43,23 @@ def get_columns_of_items(num_columns=3):
             columns.insert(current_column, [])
             columns[current_column].append(item)
 
-        category_id = item.category.id
+        category_id = item['category']['id']
+
+    return columns
+
+
+def get_columns_of_items(num_columns=3):
+    """
+    Price list columns, built once per catalogue version
+    """
+    version = catalogue_version()
+    if version is None:
+        return build_columns_of_items(num_columns)
+
+    key = 'price-list-columns:{}:{}'.format(version, num_columns)
+    columns = cache.get(key)
+    if columns is None:
+        columns = build_columns_of_items(num_columns)
+        cache.set(key, columns, settings.CATALOGUE_CACHE_SECONDS)
 
     return columns
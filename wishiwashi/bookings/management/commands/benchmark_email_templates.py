@@ -0,0 +1,78 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Engine, engines
+from django.utils import timezone
+
+from base.email_templates import email_template_names
+from bookings.models import Address, Category, Item, ItemAndQuantity, Order
+
+
+class Command(BaseCommand):
+    help = ('Times loading each email template from disk, from the cached loader and '
+            'rendering it. The order rendered is created inside a transaction which is '
+            'rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=200)
+
+    def time(self, repeat, func):
+        began = time.time()
+        for _ in range(repeat):
+            func()
+        return (time.time() - began) * 1000000 / repeat
+
+    def handle(self, *args, **options):
+        repeat = options['repeat']
+        uncached = Engine(dirs=settings.TEMPLATE_DIRS,
+                          loaders=['django.template.loaders.filesystem.Loader',
+                                   'django.template.loaders.app_directories.Loader'])
+        cached = engines['django'].engine
+
+        with transaction.atomic():
+            customer = User.objects.create(username='benchmark', email='benchmark@example.com',
+                                           first_name='Bench', last_name='Mark')
+            address = Address.objects.create(flat_number_house_number_building_name='1',
+                                             address_line_1='High Street', town_or_city='London',
+                                             postcode='sw1a1aa')
+            order = Order.objects.create(uuid='BENCHMRK', customer=customer,
+                                         pick_up_and_delivery_address=address,
+                                         pick_up_time=timezone.now(),
+                                         drop_off_time=timezone.now())
+            item = Item.objects.create(category=Category.objects.create(name='Benchmark'),
+                                       name='Shirt', price=2)
+            order.items.add(ItemAndQuantity.objects.create(item=item, quantity=3))
+
+            context = {
+                'order': order,
+                'uuid': order.uuid,
+                'credit_card_charge_time': timezone.now(),
+                'DOMAIN': settings.DOMAIN,
+                'domain': settings.DOMAIN,
+                'protocol': 'https',
+                'uid': 'MQ',
+                'token': '4a2-c3a7a1b1c2d3e4f5a6b7',
+                'email': customer.email,
+                'first_name': customer.first_name,
+                'last_name': customer.last_name,
+                'site_name': settings.SITE_NAME,
+                'address': address,
+            }
+
+            self.stdout.write('{:<55} {:>12} {:>12} {:>12}'.format(
+                'microseconds per call', 'from disk', 'cached', 'render'))
+
+            for name in email_template_names():
+                from_disk = self.time(repeat, lambda: uncached.get_template(name))
+                cached.get_template(name)
+                from_cache = self.time(repeat, lambda: cached.get_template(name))
+                template = cached.get_template(name)
+                render = self.time(repeat, lambda: template.render(Context(context)))
+
+                self.stdout.write('{:<55} {:>12.0f} {:>12.0f} {:>12.0f}'.format(
+                    name, from_disk, from_cache, render))
+
+            transaction.set_rollback(True)
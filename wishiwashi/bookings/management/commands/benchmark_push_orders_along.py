@@ -0,0 +1,40 @@
+import datetime
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from bookings.models import Order, OrderStatusChange
+from bookings.tasks import push_orders_along
+
+
+class Command(BaseCommand):
+    help = ('Times push_orders_along against a backlog of claimed and received orders. '
+            'The orders are created inside a transaction which is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=100000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            three_hours_ago = timezone.now() - datetime.timedelta(hours=3)
+
+            Order.objects.bulk_create(
+                Order(uuid='b{:07x}'.format(index),
+                      order_status=Order.CLAIMED_BY_VENDOR if index % 2 else Order.RECEIVED_BY_VENDOR,
+                      authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                      pick_up_time=three_hours_ago - datetime.timedelta(days=2),
+                      drop_off_time=three_hours_ago + datetime.timedelta(days=index % 3 - 1))
+                for index in range(options['orders']))
+
+            self.stdout.write('{} orders waiting to be pushed along'.format(options['orders']))
+
+            began = time.time()
+            push_orders_along()
+            elapsed = time.time() - began
+
+            self.stdout.write('push_orders_along: {:.2f}s, {} status changes recorded'.format(
+                elapsed, OrderStatusChange.objects.filter(reason='push_orders_along').count()))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+import requests
+import ujson as json
+
+from base.fake_services import FakeCommunicateServer
+from base.services import send_email, service_metrics
+
+
+class Command(BaseCommand):
+    help = ('Times sending emails to a stand-in communicate service on localhost, opening a '
+            'connection per email as the tasks used to and through the pooled client.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emails', type=int, default=500)
+
+    def handle(self, *args, **options):
+        payload = {'subject': 'Reminder', 'recipients': ['test@example.com'],
+                   'html_content': '<p>Reminder</p>' * 100, 'text_content': 'Reminder' * 100}
+
+        with FakeCommunicateServer() as server:
+            url = '%semail' % server.endpoint
+
+            began = time.time()
+            for _ in range(options['emails']):
+                resp = requests.post(url, data={'payload': json.dumps(payload)}, timeout=30)
+                assert resp.status_code == 200
+            unpooled = time.time() - began
+            unpooled_connections = server.connections
+
+            with override_settings(COMMUNICATE_SERVICE_ENDPOINT=server.endpoint):
+                began = time.time()
+                for _ in range(options['emails']):
+                    send_email(payload)
+                pooled = time.time() - began
+
+            self.stdout.write('{} emails'.format(options['emails']))
+            self.stdout.write('connection per email: {:.2f}s, {} connections'.format(
+                unpooled, unpooled_connections))
+            self.stdout.write('pooled client: {:.2f}s, {} connections'.format(
+                pooled, server.connections - unpooled_connections))
+            self.stdout.write('metrics: {}'.format(service_metrics()))
+
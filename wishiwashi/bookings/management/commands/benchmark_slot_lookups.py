@@ -0,0 +1,72 @@
+import datetime
+import random
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+import pytz
+
+from bookings.appointments import appointment_slot_available, slots_taken
+from bookings.calendar import WEEKDAY_CLOSING_HOUR, WEEKDAY_OPENING_HOUR
+from bookings.models import TrackConfirmedOrderSlots
+
+
+class Command(BaseCommand):
+    help = ('Times the slot lookups against a year of slot history. '
+            'The history is created inside a transaction which is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lookups', type=int, default=1000)
+        parser.add_argument('--explain', action='store_true', default=False,
+                            help='Print query plans (PostgreSQL)')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            start = datetime.datetime(2098, 1, 1, tzinfo=pytz.utc)
+            appointments = [start + datetime.timedelta(days=day, hours=hour)
+                            for day in range(365)
+                            for hour in range(WEEKDAY_OPENING_HOUR, WEEKDAY_CLOSING_HOUR)]
+
+            TrackConfirmedOrderSlots.objects.bulk_create(
+                TrackConfirmedOrderSlots(appointment=appointment,
+                                         counter=random.randint(0, settings.MAX_APPOINTMENTS_PER_HOUR))
+                for appointment in appointments)
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE {}'.format(TrackConfirmedOrderSlots._meta.db_table))
+
+            self.stdout.write('{} slots of history'.format(len(appointments)))
+
+            began = time.time()
+            for _ in range(options['lookups']):
+                appointment_slot_available(random.choice(appointments))
+            elapsed = time.time() - began
+            self.stdout.write('appointment_slot_available: {:.3f}ms per lookup'.format(
+                elapsed * 1000 / options['lookups']))
+
+            began = time.time()
+            for _ in range(options['lookups']):
+                min_date = start + datetime.timedelta(days=random.randint(0, 330))
+                slots_taken(min_date, min_date + datetime.timedelta(weeks=5))
+            elapsed = time.time() - began
+            self.stdout.write('slots_taken (5 weeks): {:.3f}ms per lookup'.format(
+                elapsed * 1000 / options['lookups']))
+
+            if options['explain'] and connection.vendor == 'postgresql':
+                queries = (
+                    TrackConfirmedOrderSlots.objects.filter(
+                        appointment=appointments[0]).values_list('counter', flat=True)[:1],
+                    TrackConfirmedOrderSlots.objects.filter(
+                        appointment__gte=start, appointment__lte=start + datetime.timedelta(weeks=5),
+                        counter__gte=settings.MAX_APPOINTMENTS_PER_HOUR).order_by(
+                            'appointment').values_list('appointment', flat=True),
+                )
+                with connection.cursor() as cursor:
+                    for query in queries:
+                        sql, params = query.query.sql_with_params()
+                        cursor.execute('EXPLAIN ' + sql, params)
+                        self.stdout.write('\n'.join(row[0] for row in cursor.fetchall()))
+
+            transaction.set_rollback(True)
@@ -0,0 +1,101 @@
+import datetime
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+import pytz
+
+from bookings.appointments import (SlotUnavailable, hold_appointment_slots,
+                                   release_appointment_slots)
+from bookings.models import Order, TrackConfirmedOrderSlots
+
+
+class Command(BaseCommand):
+    help = ('Drives concurrent checkouts against a single pick up hour and checks it is never overbooked. '
+            'Creates and then deletes its own orders, run against a development database (PostgreSQL).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--checkouts', type=int, default=300)
+        parser.add_argument('--threads', type=int, default=50)
+        parser.add_argument('--failure-rate', type=float, default=0.2,
+                            help='Fraction of checkouts whose payment fails and releases the hold')
+
+    def handle(self, *args, **options):
+        pick_up_time = datetime.datetime(2099, 1, 5, 10, tzinfo=pytz.utc)
+        drop_off_time = pick_up_time + datetime.timedelta(days=2)
+        appointments = (pick_up_time, drop_off_time)
+
+        TrackConfirmedOrderSlots.objects.filter(appointment__in=appointments).delete()
+        orders = []
+        try:
+            for n in range(options['checkouts']):
+                orders.append(Order.objects.create(uuid='BM%05d' % n, pick_up_time=pick_up_time,
+                                                   drop_off_time=drop_off_time))
+
+            results = {'placed': 0, 'rejected': 0, 'failed': 0}
+            timings = []
+            lock = threading.Lock()
+            start = threading.Event()
+
+            def checkout(order):
+                began = time.time()
+                try:
+                    hold_appointment_slots(order)
+                except SlotUnavailable:
+                    outcome = 'rejected'
+                else:
+                    if random.random() < options['failure_rate']:
+                        release_appointment_slots(order)
+                        outcome = 'failed'
+                    else:
+                        Order.objects.filter(pk=order.pk).update(placed=True, slots_held_time=None)
+                        outcome = 'placed'
+
+                with lock:
+                    results[outcome] += 1
+                    timings.append(time.time() - began)
+
+            def worker(orders):
+                start.wait()
+                try:
+                    for order in orders:
+                        checkout(order)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=worker, args=(orders[n::options['threads']],))
+                       for n in range(options['threads'])]
+            for thread in threads:
+                thread.start()
+
+            began = time.time()
+            start.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - began
+
+            counters = [sum(TrackConfirmedOrderSlots.objects.filter(appointment=appointment)
+                            .values_list('counter', flat=True))
+                        for appointment in appointments]
+
+            timings.sort()
+            self.stdout.write('Checkouts: {} over {} threads in {:.2f}s ({:.0f}/s)'.format(
+                options['checkouts'], options['threads'], elapsed, options['checkouts'] / elapsed))
+            self.stdout.write('Placed: {placed} Payment failed: {failed} Rejected (full): {rejected}'.format(**results))
+            self.stdout.write('Latency p50: {:.1f}ms p95: {:.1f}ms'.format(
+                timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000))
+            self.stdout.write('Counters pick up: {} drop off: {} (max {})'.format(
+                counters[0], counters[1], settings.MAX_APPOINTMENTS_PER_HOUR))
+
+            overbooked = max(counters) > settings.MAX_APPOINTMENTS_PER_HOUR or counters[0] != results['placed']
+        finally:
+            TrackConfirmedOrderSlots.objects.filter(appointment__in=appointments).delete()
+            Order.objects.filter(pk__in=[order.pk for order in orders]).delete()
+
+        if overbooked:
+            raise CommandError('Slot counters do not match placed orders')
+
+        self.stdout.write('OK')
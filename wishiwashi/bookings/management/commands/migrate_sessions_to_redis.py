@@ -0,0 +1,46 @@
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from base.redis_client import get_redis
+from base.sessions import KEY_PREFIX
+
+
+class Command(BaseCommand):
+    help = ('Copy live database sessions into Redis, keeping their expiry, then delete '
+            'every database session. Run once when turning on REDIS_SESSIONS_ON.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--keep', action='store_true', default=False,
+                            help='Leave the database sessions in place')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        client = get_redis()
+        copied = 0
+
+        sessions = Session.objects.filter(expire_date__gt=now).values_list(
+            'session_key', 'session_data', 'expire_date').iterator()
+
+        pipe = client.pipeline(transaction=False)
+        for session_key, session_data, expire_date in sessions:
+            expiry_age = int((expire_date - now).total_seconds())
+            if expiry_age < 1:
+                continue
+
+            # Sessions already in Redis are newer, leave them be
+            pipe.set(KEY_PREFIX + session_key, session_data, ex=expiry_age, nx=True)
+            copied += 1
+
+            if copied % options['batch_size'] == 0:
+                pipe.execute()
+
+        pipe.execute()
+
+        self.stdout.write('Copied {} sessions to Redis'.format(copied))
+
+        if not options['keep']:
+            deleted = Session.objects.count()
+            Session.objects.all().delete()
+            self.stdout.write('Deleted {} database sessions'.format(deleted))
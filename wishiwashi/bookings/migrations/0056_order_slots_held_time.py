@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0055_auto_20230712_0612'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='slots_held_time',
+            field=models.DateTimeField(blank=True, null=True, db_index=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def merge_duplicate_slots(apps, schema_editor):
+    """
+    Concurrent get_or_create calls left more than one row for some
+    appointments. Keep the first row with the combined counter.
+    """
+    slotModel = apps.get_model('bookings', 'trackconfirmedorderslots')
+    duplicates = slotModel.objects.values('appointment').annotate(rows=Count('id')).filter(rows__gt=1)
+
+    for duplicate in duplicates:
+        slots = slotModel.objects.filter(appointment=duplicate['appointment']).order_by('pk')
+        total = slots.aggregate(total=Sum('counter'))['total']
+        first = slots[0]
+        slots.exclude(pk=first.pk).delete()
+        slotModel.objects.filter(pk=first.pk).update(counter=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0056_order_slots_held_time'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_slots, migrations.RunPython.noop),
+    ]
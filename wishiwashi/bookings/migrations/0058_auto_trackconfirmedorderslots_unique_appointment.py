@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0057_merge_duplicate_order_slots'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trackconfirmedorderslots',
+            name='appointment',
+            field=models.DateTimeField(unique=True),
+        ),
+        migrations.AlterIndexTogether(
+            name='trackconfirmedorderslots',
+            index_together=set([('appointment', 'counter')]),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+import django.utils.timezone
+import model_utils.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0058_auto_trackconfirmedorderslots_unique_appointment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OrderStatusChange',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', model_utils.fields.AutoCreatedField(verbose_name='created', default=django.utils.timezone.now, editable=False)),
+                ('modified', model_utils.fields.AutoLastModifiedField(verbose_name='modified', default=django.utils.timezone.now, editable=False)),
+                ('from_status', models.PositiveSmallIntegerField(choices=[(0, 'Unclaimed by vendors'), (1, 'Claimed by vendor'), (2, 'Received by vendor'), (3, 'Unable to pick up items'), (4, 'Contested items in order'), (6, 'Delivered back to customer'), (7, 'Unable to deliver back to customer'), (8, 'Order rejected by service provider')])),
+                ('to_status', models.PositiveSmallIntegerField(choices=[(0, 'Unclaimed by vendors'), (1, 'Claimed by vendor'), (2, 'Received by vendor'), (3, 'Unable to pick up items'), (4, 'Contested items in order'), (6, 'Delivered back to customer'), (7, 'Unable to deliver back to customer'), (8, 'Order rejected by service provider')])),
+                ('reason', models.CharField(max_length=75, blank=True, default='')),
+                ('order', models.ForeignKey(to='bookings.Order')),
+            ],
+            options={
+                'verbose_name_plural': 'Order status changes',
+            },
+        ),
+    ]
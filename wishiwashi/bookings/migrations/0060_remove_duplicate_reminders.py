@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def remove_duplicate_reminders(apps, schema_editor):
+    """
+    Overlapping reminder runs recorded some orders more than once. Keep the
+    first reminder for each order.
+    """
+    for model_name in ('pickuporderreminder', 'dropofforderreminder'):
+        reminderModel = apps.get_model('bookings', model_name)
+        duplicates = reminderModel.objects.values('order').annotate(rows=Count('id')).filter(rows__gt=1)
+
+        for duplicate in duplicates:
+            reminders = reminderModel.objects.filter(order=duplicate['order']).order_by('pk')
+            reminders.exclude(pk=reminders[0].pk).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0059_orderstatuschange'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reminders, migrations.RunPython.noop),
+    ]
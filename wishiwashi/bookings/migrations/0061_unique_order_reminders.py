@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0060_remove_duplicate_reminders'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dropofforderreminder',
+            name='order',
+            field=models.OneToOneField(to='bookings.Order'),
+        ),
+        migrations.AlterField(
+            model_name='pickuporderreminder',
+            name='order',
+            field=models.OneToOneField(to='bookings.Order'),
+        ),
+    ]
@@ -5,9 +5,12 @@ from decimal import Decimal
 from django.contrib.auth.models import User
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.signals import post_delete, post_save
 from django.utils.encoding import python_2_unicode_compatible
 from model_utils.models import TimeStampedModel
 
+from .catalogue import bump_catalogue_version
+
 
 # list of verified out codes that are current
 @python_2_unicode_compatible
@@ -132,6 +135,13 @@ class Category(models.Model):
         return self.name
 
 
+# Price list is cached per catalogue version
+post_save.connect(bump_catalogue_version, sender=Category,
+                  dispatch_uid='category_saved_bump_catalogue_version')
+post_delete.connect(bump_catalogue_version, sender=Category,
+                    dispatch_uid='category_deleted_bump_catalogue_version')
+
+
 @python_2_unicode_compatible
 class Item(models.Model):
     name = models.TextField()
@@ -150,6 +160,13 @@ class Item(models.Model):
         return "{} - {}".format(self.category.name, self.name)
 
 
+# Item prices and the price list are cached per catalogue version
+post_save.connect(bump_catalogue_version, sender=Item,
+                  dispatch_uid='item_saved_bump_catalogue_version')
+post_delete.connect(bump_catalogue_version, sender=Item,
+                    dispatch_uid='item_deleted_bump_catalogue_version')
+
+
 @python_2_unicode_compatible
 class Voucher(TimeStampedModel):
     issued_by = models.ForeignKey(User)
@@ -306,6 +323,9 @@ class Order(TimeStampedModel):
     thrown_back_time = models.DateTimeField(null=True, blank=True)
     ipaddress = models.GenericIPAddressField(blank=True, null=True)
 
+    # Set while pick up and drop off slots are held during checkout
+    slots_held_time = models.DateTimeField(null=True, blank=True, db_index=True)
+
     def __str__(self):
         return self.uuid
 
@@ -355,6 +375,19 @@ class OrderNotes(TimeStampedModel):
         verbose_name_plural = "Order Notes"
 
 
+class OrderStatusChange(TimeStampedModel):
+    """
+    Audit of order_status changes made in bulk, see bookings.transitions
+    """
+    order = models.ForeignKey(Order)
+    from_status = models.PositiveSmallIntegerField(choices=Order.ORDER_STATUSES)
+    to_status = models.PositiveSmallIntegerField(choices=Order.ORDER_STATUSES)
+    reason = models.CharField(max_length=75, blank=True, default='')
+
+    class Meta:
+        verbose_name_plural = "Order status changes"
+
+
 class AbandonedOrders(TimeStampedModel):
     vendor = models.ForeignKey(Vendor)
     order = models.ForeignKey(Order)
@@ -364,14 +397,15 @@ class AbandonedOrders(TimeStampedModel):
 
 
 class PickupOrderReminder(TimeStampedModel):
-    order = models.ForeignKey(Order)
+    # One reminder per order, overlapping runs can't both send it
+    order = models.OneToOneField(Order)
 
     class Meta:
         verbose_name_plural = "Pick up order reminders"
 
 
 class DropoffOrderReminder(TimeStampedModel):
-    order = models.ForeignKey(Order)
+    order = models.OneToOneField(Order)
 
     class Meta:
         verbose_name_plural = "Drop off order reminders"
@@ -379,6 +413,10 @@ class DropoffOrderReminder(TimeStampedModel):
 
 class TrackConfirmedOrderSlots(models.Model):
     # Pick up or drop off slot
-    appointment = models.DateTimeField()
+    appointment = models.DateTimeField(unique=True)
     counter = models.PositiveSmallIntegerField(default=0)
 
+    class Meta:
+        # Slot lookups only read these columns (index only scans)
+        index_together = [('appointment', 'counter')]
+
@@ -1,25 +1,105 @@
+from collections import namedtuple
 from decimal import Decimal
-from payments.utils import transportation_charge
+import time
+
+from payments.utils import transportation_charge, vat_cost
+from .catalogue import catalogue_version
 from .models import Item
 
 TWOPLACES = Decimal('0.01')
 
+# Upper bound on how long a process serves prices for a catalogue version.
+# Covers a version bumped before the admin's transaction committed (Django
+# 1.8 has no on_commit), or a bump lost while Redis was down
+PRICE_CACHE_MAX_AGE_SECONDS = 300
 
-def total_items_price(items):
-    """ Total price for all items """
-    return sum([Item.objects.get(pk=int(item_pk)).price * quantity for item_pk, quantity in items.items()])
+# Item prices for one catalogue version, {item.pk: price}
+_item_prices = {'version': None, 'loaded': 0, 'prices': {}}
 
+BasketPrice = namedtuple('BasketPrice', ['items_price', 'discount',
+                                         'transportation_charge', 'total',
+                                         'vat', 'ex_vat', 'line_prices'])
 
-def total_price(items, voucher=None):
+
+def clear_item_prices():
+    _item_prices.update(version=None, loaded=0, prices={})
+
+
+def item_prices(item_pks):
+    """
+    :param list item_pks: item primary keys
+
+    :return: dictionary of {item.pk: price}
+
+    Prices not cached for the current catalogue version are loaded in one
+    query. Raises Item.DoesNotExist if any item doesn't exist
+    """
+    item_pks = set(int(item_pk) for item_pk in item_pks)
+    version = catalogue_version()
+    now = time.time()
+
+    if (version is None or version != _item_prices['version'] or
+            now - _item_prices['loaded'] > PRICE_CACHE_MAX_AGE_SECONDS):
+        clear_item_prices()
+
+    cached = _item_prices['prices']
+    missing = item_pks.difference(cached)
+
+    if missing:
+        loaded = dict(Item.objects.filter(pk__in=missing).values_list('pk', 'price'))
+        if len(loaded) != len(missing):
+            raise Item.DoesNotExist(
+                "Items {} do not exist".format(sorted(missing.difference(loaded))))
+
+        if version is not None:
+            if _item_prices['version'] is None:
+                _item_prices.update(version=version, loaded=now)
+            cached.update(loaded)
+        else:
+            return loaded
+
+    return dict((item_pk, cached[item_pk]) for item_pk in item_pks)
+
+
+def price_basket(items, voucher=None):
     """
     items: dict of {item.pk: quantity,..}
     voucher: to be applied if exists
+
+    Prices the basket in one pass, returns a BasketPrice. line_prices is
+    {item.pk: price * quantity}, the VAT breakdown is of the total.
     """
-    total_for_items = total_items_price(items)
+    prices = item_prices(items.keys())
+
+    line_prices = dict((int(item_pk), prices[int(item_pk)] * quantity)
+                       for item_pk, quantity in items.items())
+    total_for_items = sum(line_prices.values())
+    transport = transportation_charge(total_for_items)
 
+    discount = Decimal('0.00')
     if voucher and total_for_items:
         discount = total_for_items * (voucher.percentage_off / Decimal('100'))
-        new_total = total_for_items - discount
-        return (new_total + transportation_charge(total_for_items)).quantize(TWOPLACES)
 
-    return (total_for_items + transportation_charge(total_for_items)).quantize(TWOPLACES)
+    total = (total_for_items - discount + transport).quantize(TWOPLACES)
+    vat = vat_cost(total)
+
+    return BasketPrice(items_price=total_for_items,
+                       discount=discount,
+                       transportation_charge=transport,
+                       total=total,
+                       vat=vat['vat'],
+                       ex_vat=vat['ex_vat'],
+                       line_prices=line_prices)
+
+
+def total_items_price(items):
+    """ Total price for all items """
+    return price_basket(items).items_price
+
+
+def total_price(items, voucher=None):
+    """
+    items: dict of {item.pk: quantity,..}
+    voucher: to be applied if exists
+    """
+    return price_basket(items, voucher).total
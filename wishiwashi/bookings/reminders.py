@@ -0,0 +1,120 @@
+"""
+Send pick up and drop off reminders in batches
+
+All the reminders for a run are rendered first and claimed by recording
+them with one insert, each order can only have one reminder so overlapping
+runs can't both send it. They're then sent to the communicate service a few
+at a time so one slow request doesn't hold up the rest. Reminders which
+weren't accepted are removed so the next run tries again.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.template.loader import render_to_string
+
+from base.services import send_email
+
+
+logger = logging.getLogger(__name__)
+
+
+def render_reminder(order, template):
+    """
+    :param order: Order object
+    :param str template: e.g. 'bookings/emails/pick-up-order-reminder'
+
+    :return: dict, payload for the communicate service
+    """
+    subject = render_to_string('%s-subject.txt' % template, {'uuid': order.uuid})
+    # Email subject *must not* contain newlines
+    subject = ''.join(subject.splitlines())
+
+    return {
+        'from_name': settings.FROM_EMAIL_NAME,
+        'from_email_address': settings.FROM_EMAIL_ADDRESS,
+        'subject': subject,
+        'html_content': render_to_string('%s.html' % template, {'order': order}),
+        'text_content': render_to_string('%s.txt' % template, {'order': order}),
+        'recipients': [order.customer.email]
+    }
+
+
+def _send(order_and_payload):
+    order, payload = order_and_payload
+    try:
+        send_email(payload)
+        return order
+    except Exception:
+        logger.exception('Exception while sending reminder for order %s via email', order.pk)
+
+
+def without_reminder(orders, reminder_model):
+    """
+    :param orders: Order queryset
+    :param reminder_model: PickupOrderReminder or DropoffOrderReminder
+
+    :return: orders which haven't had a reminder, as an anti-join
+    """
+    return orders.extra(where=[
+        'NOT EXISTS (SELECT 1 FROM {reminder} WHERE {reminder}.order_id = {order}.id)'.format(
+            reminder=reminder_model._meta.db_table, order=orders.model._meta.db_table)])
+
+
+def claim_reminders(orders, reminder_model):
+    """
+    :param orders: list of Orders
+    :param reminder_model: PickupOrderReminder or DropoffOrderReminder
+
+    :return: list of orders claimed by this run
+    """
+    try:
+        with transaction.atomic():
+            reminder_model.objects.bulk_create(reminder_model(order=order) for order in orders)
+        return orders
+    except IntegrityError:
+        pass
+
+    # Another run got to some of them first
+    claimed = []
+    for order in orders:
+        try:
+            with transaction.atomic():
+                reminder_model.objects.create(order=order)
+            claimed.append(order)
+        except IntegrityError:
+            pass
+
+    return claimed
+
+
+def send_reminders(orders, template, reminder_model):
+    """
+    :param orders: Orders to remind, customer selected
+    :param str template: template path without the extension
+    :param reminder_model: PickupOrderReminder or DropoffOrderReminder
+
+    :return: list of orders reminded
+    """
+    rendered = {}
+    for order in orders:
+        try:
+            rendered[order.pk] = render_reminder(order, template)
+        except Exception:
+            logger.exception('Exception while rendering reminder for order %s', order.pk)
+
+    claimed = claim_reminders([order for order in orders if order.pk in rendered], reminder_model)
+
+    if not claimed:
+        return []
+
+    with ThreadPoolExecutor(max_workers=settings.COMMUNICATE_SERVICE_CONCURRENCY) as executor:
+        sent = list(executor.map(_send, [(order, rendered[order.pk]) for order in claimed]))
+
+    reminded = [order for order in sent if order is not None]
+    failed = set(order.pk for order in claimed) - set(order.pk for order in reminded)
+    if failed:
+        reminder_model.objects.filter(order__in=failed).delete()
+
+    return reminded
@@ -0,0 +1,211 @@
+"""
+Redis copy of TrackConfirmedOrderSlots counters
+
+One hash per (UTC) week, field is the appointment as epoch seconds and
+value is its counter. A week hash is only trusted once it carries the
+LOADED field, weeks missing from Redis are loaded from the database on
+first read. The database stays the source of truth, checkout still takes
+places with a conditional UPDATE and writes through here once committed.
+reconcile_slot_cache reloads the booking horizon to undo any drift.
+"""
+from calendar import timegm
+from datetime import datetime, timedelta
+import logging
+
+from django.conf import settings
+import pytz
+import redis
+
+from base.redis_client import get_redis
+from bookings.models import TrackConfirmedOrderSlots
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'slots:week:'
+LOADED = 'loaded'
+
+# Weeks are dropped by Redis a little after cleanup_tracked_confirmed_order_slots
+# would delete their rows
+WEEK_TTL_SECONDS = int(timedelta(weeks=7).total_seconds())
+
+# Only count against weeks which have been loaded, otherwise the first read
+# would see a partial week
+INCREMENT_IF_LOADED = """
+if redis.call('HEXISTS', KEYS[1], ARGV[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[2], ARGV[3])
+end
+return false
+"""
+
+_increment_if_loaded = None
+
+
+def week_start(appointment):
+    """
+    :param datetime appointment: timezone aware datetime
+
+    :return: datetime of Monday 00:00 UTC of the appointment's week
+    """
+    appointment = appointment.astimezone(pytz.utc)
+    monday = appointment.date() - timedelta(days=appointment.weekday())
+    return datetime(monday.year, monday.month, monday.day, tzinfo=pytz.utc)
+
+
+def week_key(monday):
+    return '{}{}'.format(KEY_PREFIX, monday.strftime('%Y-%m-%d'))
+
+
+def weeks_between(min_date, max_date):
+    monday = week_start(min_date)
+    while monday <= max_date:
+        yield monday
+        monday += timedelta(weeks=1)
+
+
+def _field(appointment):
+    return str(timegm(appointment.utctimetuple()))
+
+
+def _appointment(field):
+    return datetime.fromtimestamp(int(field), pytz.utc)
+
+
+def load_weeks(mondays, pipe):
+    """
+    :param list mondays: week_start datetimes
+    :param pipe: redis pipeline, executed by the caller
+
+    :return: dictionary of week key to {appointment: counter}
+
+    Queue a replacement of each week hash with the counters in the database
+    """
+    mondays = list(mondays)
+    weeks = dict((week_key(monday), {}) for monday in mondays)
+    if not mondays:
+        return weeks
+
+    slots = TrackConfirmedOrderSlots.objects.filter(
+        appointment__gte=min(mondays),
+        appointment__lt=max(mondays) + timedelta(weeks=1)).values_list(
+            'appointment', 'counter')
+
+    for appointment, counter in slots:
+        key = week_key(week_start(appointment))
+        if key in weeks:
+            weeks[key][appointment] = counter
+
+    for key, counters in weeks.items():
+        mapping = dict((_field(appointment), counter)
+                       for appointment, counter in counters.items())
+        mapping[LOADED] = 1
+        pipe.delete(key)
+        pipe.hmset(key, mapping)
+        pipe.expire(key, WEEK_TTL_SECONDS)
+
+    return weeks
+
+
+def counters_between(min_date, max_date):
+    """
+    :param datetime min_date: min datetime to use
+    :param datetime max_date: max datetime to use
+
+    :return: dictionary of appointment (UTC datetime) to counter
+
+    All the weeks are read in one round trip, any not in Redis yet are
+    loaded from the database and written back in a second one.
+    """
+    client = get_redis()
+    mondays = list(weeks_between(min_date, max_date))
+
+    pipe = client.pipeline(transaction=False)
+    for monday in mondays:
+        pipe.hgetall(week_key(monday))
+
+    counters = {}
+    missing = []
+    for monday, week in zip(mondays, pipe.execute()):
+        if LOADED.encode() not in week:
+            missing.append(monday)
+            continue
+
+        for field, counter in week.items():
+            if field != LOADED.encode():
+                counters[_appointment(field)] = int(counter)
+
+    if missing:
+        pipe = client.pipeline(transaction=True)
+        for week in load_weeks(missing, pipe).values():
+            counters.update(week)
+        pipe.execute()
+
+    return dict((appointment, counter)
+                for appointment, counter in counters.items()
+                if min_date <= appointment <= max_date)
+
+
+def full_slots(min_date, max_date):
+    """
+    :param datetime min_date: min datetime to use
+    :param datetime max_date: max datetime to use
+
+    :return: sorted list of appointments at capacity or None if Redis
+    can't be reached
+    """
+    try:
+        counters = counters_between(min_date, max_date)
+    except redis.RedisError:
+        logger.exception('Slot cache unavailable, reading slots from database')
+        return None
+
+    return sorted(appointment for appointment, counter in counters.items()
+                  if counter >= settings.MAX_APPOINTMENTS_PER_HOUR)
+
+
+def slot_counter(appointment):
+    """
+    :param datetime appointment: timezone aware datetime
+
+    :return: counter for the slot or None if Redis can't be reached
+    """
+    try:
+        return counters_between(appointment, appointment).get(
+            appointment.astimezone(pytz.utc), 0)
+    except redis.RedisError:
+        logger.exception('Slot cache unavailable, reading slot from database')
+        return None
+
+
+def increment(appointment, amount=1):
+    """
+    :param datetime appointment: timezone aware datetime
+    :param int amount: places taken (negative when released)
+
+    Apply a committed change to the slot's counter. Weeks not loaded yet
+    are left alone, they are read from the database in full when needed.
+    """
+    global _increment_if_loaded
+
+    try:
+        if _increment_if_loaded is None:
+            _increment_if_loaded = get_redis().register_script(
+                INCREMENT_IF_LOADED)
+
+        _increment_if_loaded(keys=[week_key(week_start(appointment))],
+                             args=[LOADED, _field(appointment), amount])
+    except redis.RedisError:
+        # The next reconcile_slot_cache corrects the week
+        logger.exception('Could not update slot cache for %s', appointment)
+
+
+def reconcile(min_date, max_date):
+    """
+    :param datetime min_date: first appointment to reload
+    :param datetime max_date: last appointment to reload
+
+    Overwrite the cached weeks with the counters in the database
+    """
+    pipe = get_redis().pipeline(transaction=True)
+    load_weeks(weeks_between(min_date, max_date), pipe)
+    pipe.execute()
@@ -6,17 +6,17 @@ from celery.task.schedules import crontab
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.contrib.sessions.management.commands.clearsessions import Command as ClearSessions
-from django.template.loader import render_to_string
 from django.utils import timezone
-from requests.auth import HTTPBasicAuth
-import requests
-import ujson as json
 import pytz
 
 from .models import (Order, PickupOrderReminder, CleanOnlyOrder,
                      DropoffOrderReminder, TrackConfirmedOrderSlots,
                      ExpectedBackCleanOnlyOrder)
+from .appointments import release_appointment_slots
+from . import slot_cache
 from .clean_only import expected_back
+from .reminders import send_reminders, without_reminder
+from .transitions import transition_orders
 
 logger = get_task_logger(__name__)
 
@@ -28,24 +28,21 @@ def push_orders_along(*args, **kwargs):
     two_hours_ago = now - timedelta(hours=2)
 
     # If a vendor claimed an order, assume they picked it up
-    orders = Order.objects.filter(
-        order_status=Order.CLAIMED_BY_VENDOR,
-        authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
-        charge_back_status=Order.NOT_CHARGED_BACK,
-        refund_status=Order.NOT_REFUNDED,
-        pick_up_time__lte=two_hours_ago)
-
-    for order in orders:
-        order.order_status = Order.RECEIVED_BY_VENDOR
-        order.save()
+    received = transition_orders(Order.CLAIMED_BY_VENDOR,
+                                 Order.RECEIVED_BY_VENDOR,
+                                 'push_orders_along',
+                                 authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                                 charge_back_status=Order.NOT_CHARGED_BACK,
+                                 refund_status=Order.NOT_REFUNDED,
+                                 pick_up_time__lte=two_hours_ago)
 
     # If a vendor was due to deliver an order back, assume they have
-    orders = Order.objects.filter(order_status=Order.RECEIVED_BY_VENDOR,
+    delivered = transition_orders(Order.RECEIVED_BY_VENDOR,
+                                  Order.DELIVERED_BACK_TO_CUSTOMER,
+                                  'push_orders_along',
                                   drop_off_time__lte=two_hours_ago)
 
-    for order in orders:
-        order.order_status = Order.DELIVERED_BACK_TO_CUSTOMER
-        order.save()
+    logger.info("Orders received by vendor: %d, delivered back to customer: %d", len(received), len(delivered))
 
     return True
 
@@ -53,6 +50,10 @@ def push_orders_along(*args, **kwargs):
 @periodic_task(run_every=crontab(minute=0, hour="*/4"),  # every x hour
                time_limit=120)  # seconds
 def delete_old_sessions(*args, **kwargs):
+    # Redis expires its sessions itself
+    if settings.REDIS_SESSIONS_ON:
+        return
+
     cmd = ClearSessions()
     cmd.handle()
 
@@ -60,9 +61,6 @@ def delete_old_sessions(*args, **kwargs):
 @periodic_task(run_every=crontab(minute="*/10"),  # Exceute every x minutes
                time_limit=300)  # seconds
 def pick_up_reminder_via_email(*args, **kwargs):
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
-
     now = timezone.now()
     hour_from_now = now + timedelta(hours=1)
 
@@ -73,41 +71,12 @@ def pick_up_reminder_via_email(*args, **kwargs):
         charge_back_status=Order.NOT_CHARGED_BACK,
         refund_status=Order.NOT_REFUNDED,
         pick_up_time__gt=now,
-        pick_up_time__lt=hour_from_now)
-
-    for order in orders:
-        if not PickupOrderReminder.objects.filter(order=order).exists():
-            try:
-                subject = render_to_string('bookings/emails/pick-up-order-reminder-subject.txt', {'uuid': order.uuid})
-                # Email subject *must not* contain newlines
-                subject = ''.join(subject.splitlines())
+        pick_up_time__lt=hour_from_now).select_related(
+        'customer', 'pick_up_and_delivery_address').prefetch_related('items__item')
 
-                html_content = render_to_string('bookings/emails/pick-up-order-reminder.html', {'order': order})
-                text_content = render_to_string('bookings/emails/pick-up-order-reminder.txt', {'order': order})
-
-                payload = {
-                    'from_name': settings.FROM_EMAIL_NAME,
-                    'from_email_address': settings.FROM_EMAIL_ADDRESS,
-                    'subject': subject,
-                    'html_content': html_content,
-                    'text_content': text_content,
-                    'recipients': [order.customer.email]
-                }
-
-                url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-                resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-                assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-                resp = json.loads(resp.content)
-
-                assert resp['error'] is False, resp
-                assert int(resp['job_id']) > 0, resp
-
-                pickup_reminder = PickupOrderReminder(order=order)
-                pickup_reminder.save()
-            except Exception:
-                msg = "Exception while sending pick up order reminder via email"
-                logger.exception(msg)
+    send_reminders(without_reminder(orders, PickupOrderReminder),
+                   'bookings/emails/pick-up-order-reminder',
+                   PickupOrderReminder)
 
     return True
 
@@ -115,9 +84,6 @@ def pick_up_reminder_via_email(*args, **kwargs):
 @periodic_task(run_every=crontab(minute="*/10"),  # Exceute every x minutes
                time_limit=300)  # seconds
 def drop_off_reminder_via_email(*args, **kwargs):
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
-
     now = timezone.now()
     hour_from_now = now + timedelta(hours=1)
 
@@ -127,41 +93,12 @@ def drop_off_reminder_via_email(*args, **kwargs):
         charge_back_status=Order.NOT_CHARGED_BACK,
         refund_status=Order.NOT_REFUNDED,
         drop_off_time__gt=now,
-        drop_off_time__lt=hour_from_now)
-
-    for order in orders:
-        if not DropoffOrderReminder.objects.filter(order=order).exists():
-            try:
-                subject = render_to_string('bookings/emails/drop-off-order-reminder-subject.txt', {'uuid': order.uuid})
-                # Email subject *must not* contain newlines
-                subject = ''.join(subject.splitlines())
+        drop_off_time__lt=hour_from_now).select_related(
+        'customer', 'pick_up_and_delivery_address').prefetch_related('items__item')
 
-                html_content = render_to_string('bookings/emails/drop-off-order-reminder.html', {'order': order})
-                text_content = render_to_string('bookings/emails/drop-off-order-reminder.txt', {'order': order})
-
-                payload = {
-                    'from_name': settings.FROM_EMAIL_NAME,
-                    'from_email_address': settings.FROM_EMAIL_ADDRESS,
-                    'subject': subject,
-                    'html_content': html_content,
-                    'text_content': text_content,
-                    'recipients': [order.customer.email]
-                }
-
-                url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-                resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-                assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-                resp = json.loads(resp.content)
-
-                assert resp['error'] is False, resp
-                assert int(resp['job_id']) > 0, resp
-
-                dropoff_reminder = DropoffOrderReminder(order=order)
-                dropoff_reminder.save()
-            except Exception:
-                msg = "Exception while sending drop off order reminder via email"
-                logger.exception(msg)
+    send_reminders(without_reminder(orders, DropoffOrderReminder),
+                   'bookings/emails/drop-off-order-reminder',
+                   DropoffOrderReminder)
 
     return True
 
@@ -178,6 +115,38 @@ def cleanup_tracked_confirmed_order_slots(*args, **kwargs):
     return True
 
 
+@periodic_task(run_every=crontab(minute="*/5"),  # Exceute every x minutes
+               time_limit=120)  # seconds
+def release_expired_appointment_slot_holds(*args, **kwargs):
+    """
+    Slots held by a checkout which never finished (i.e. the worker was
+    killed while authorising) are given back
+    """
+    expired = timezone.now() - timedelta(minutes=settings.APPOINTMENT_SLOT_HOLD_MINUTES)
+
+    for order in Order.objects.filter(slots_held_time__lte=expired, placed=False):
+        if release_appointment_slots(order):
+            Order.objects.filter(pk=order.pk, authorisation_status=Order.AUTHORISING).update(
+                authorisation_status=Order.FAILED_TO_AUTHORISE)
+
+    return True
+
+
+@periodic_task(run_every=crontab(minute="*/15"),  # Exceute every x minutes
+               time_limit=120)  # seconds
+def reconcile_slot_cache(*args, **kwargs):
+    """
+    Reload the cached slot counters for the bookable weeks from the database
+    """
+    if not settings.SLOT_CACHE_ON:
+        return False
+
+    now = timezone.now()
+    slot_cache.reconcile(now, now + timedelta(weeks=5))
+
+    return True
+
+
 @periodic_task(run_every=crontab(minute="0", hour="2,3"),
                time_limit=120)
 def expected_back_clean_only_orders(*args, **kwargs):
@@ -1,16 +1,20 @@
 import datetime
 
-from dateutil.parser import parse
 from django.conf import settings
+from django.db import IntegrityError
 from django.test import TestCase
 import pytz
 
 from bookings.appointments import (appointment_slot_available,
                                    appointment_slot_available_session,
-                                   mark_unavailable_slots,
-                                   min_max_dates_for_calendar,
-                                   slots_taken)
-from bookings.factories import TrackConfirmedOrderSlotsFactory
+                                   hold_appointment_slots,
+                                   release_appointment_slot,
+                                   release_appointment_slots,
+                                   reserve_appointment_slot,
+                                   slots_taken,
+                                   SlotUnavailable)
+from bookings.factories import OrderFactory, TrackConfirmedOrderSlotsFactory
+from bookings.models import Order, TrackConfirmedOrderSlots
 
 
 class Appointment(TestCase):
@@ -54,18 +58,6 @@ class Appointment(TestCase):
         self.assertFalse(appointment_slot_available_session(
             u"2015-02-30 10"))
 
-    def test_min_max_dates_for_calendar(self):
-        dates = [{'date': '2015-03-21'},
-                 {'date': '2015-03-20'},
-                 {'date': '2015-02-21'}]
-
-        tz_local = pytz.timezone(settings.TIME_ZONE)
-        min_date = tz_local.localize(parse('2015-02-21'))
-        max_date = tz_local.localize(parse('2015-03-21'))
-        max_date = max_date.replace(hour=23, minute=59, second=59)
-        self.assertEqual((min_date, max_date),
-                         min_max_dates_for_calendar(dates))
-
     def test_appointment_slots_taken(self):
         appointment1 = datetime.datetime(2014, 4, 7, 10, tzinfo=pytz.utc)
         TrackConfirmedOrderSlotsFactory(
@@ -141,151 +133,95 @@ class Appointment(TestCase):
 
         self.assertEqual(expected, slots_taken(min_date, max_date))
 
-    def test_appointment_slot_unavailble_calendar_grid(self):
-        calendar_grid = [{'date': '2015-03-16',
-            'day_name': 'Monday',
-            'day_of_month': 16,
-            'month_name': 'March',
-            'time_slots': [{'available': False, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': False, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': False, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': False, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': False, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': False, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': False, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': False, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': False, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            {'date': '2015-03-17',
-            'day_name': 'Tuesday',
-            'day_of_month': 17,
-            'month_name': 'March',
-            'time_slots': [{'available': True, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': True, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': True, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': True, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': True, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': True, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': True, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': True, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': True, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            ]
-
-        # 2015-03-16 21 - 22 slot taken
-        appointment = datetime.datetime(2015, 3, 16, 21, tzinfo=pytz.utc)
+
+class Reservations(TestCase):
+    def setUp(self):
+        self.pick_up_time = datetime.datetime(2015, 3, 16, 10, tzinfo=pytz.utc)
+        self.drop_off_time = datetime.datetime(2015, 3, 18, 10, tzinfo=pytz.utc)
+        self.order = OrderFactory(pick_up_time=self.pick_up_time,
+                                  drop_off_time=self.drop_off_time)
+
+    def _counter(self, appointment):
+        return TrackConfirmedOrderSlots.objects.get(
+            appointment=appointment).counter
+
+    def test_reserve_appointment_slot_new(self):
+        self.assertTrue(reserve_appointment_slot(self.pick_up_time))
+        self.assertEqual(1, self._counter(self.pick_up_time))
+
+    def test_reserve_appointment_slot_existing(self):
+        TrackConfirmedOrderSlotsFactory(appointment=self.pick_up_time,
+                                        counter=3)
+        self.assertTrue(reserve_appointment_slot(self.pick_up_time))
+        self.assertEqual(4, self._counter(self.pick_up_time))
+
+    def test_reserve_appointment_slot_full(self):
         TrackConfirmedOrderSlotsFactory(
-            appointment=appointment,
+            appointment=self.pick_up_time,
             counter=settings.MAX_APPOINTMENTS_PER_HOUR)
-
-        # 2015-03-17 from 10 - 13 no slots now available
-        for hour in range(10, 14):
-            appointment = datetime.datetime(2015, 3, 17, hour, tzinfo=pytz.utc)
-            TrackConfirmedOrderSlotsFactory(
-                appointment=appointment,
-                counter=settings.MAX_APPOINTMENTS_PER_HOUR)
-
-        # 2015-03-17 20 - 21 slot taken
-        appointment = datetime.datetime(2015, 3, 17, 20, tzinfo=pytz.utc)
+        self.assertFalse(reserve_appointment_slot(self.pick_up_time))
+        self.assertEqual(settings.MAX_APPOINTMENTS_PER_HOUR,
+                         self._counter(self.pick_up_time))
+
+    def test_reserve_appointment_slot_up_to_capacity(self):
+        results = [reserve_appointment_slot(self.pick_up_time)
+                   for _ in range(settings.MAX_APPOINTMENTS_PER_HOUR + 5)]
+        self.assertEqual(settings.MAX_APPOINTMENTS_PER_HOUR, sum(results))
+        self.assertEqual(settings.MAX_APPOINTMENTS_PER_HOUR,
+                         self._counter(self.pick_up_time))
+
+    def test_appointment_slot_unique(self):
+        TrackConfirmedOrderSlotsFactory(appointment=self.pick_up_time)
+        self.assertRaises(IntegrityError, TrackConfirmedOrderSlotsFactory,
+                          appointment=self.pick_up_time)
+
+    def test_release_appointment_slot_never_negative(self):
+        TrackConfirmedOrderSlotsFactory(appointment=self.pick_up_time,
+                                        counter=0)
+        release_appointment_slot(self.pick_up_time)
+        self.assertEqual(0, self._counter(self.pick_up_time))
+
+    def test_hold_appointment_slots(self):
+        hold_appointment_slots(self.order)
+
+        self.assertEqual(1, self._counter(self.pick_up_time))
+        self.assertEqual(1, self._counter(self.drop_off_time))
+        self.assertIsNotNone(
+            Order.objects.get(pk=self.order.pk).slots_held_time)
+
+    def test_hold_appointment_slots_once(self):
+        # Payment form submitted twice
+        self.assertTrue(hold_appointment_slots(self.order))
+        self.assertFalse(hold_appointment_slots(Order.objects.get(pk=self.order.pk)))
+        self.assertEqual(1, self._counter(self.pick_up_time))
+
+        release_appointment_slots(self.order)
+        self.assertEqual(0, self._counter(self.pick_up_time))
+
+        Order.objects.filter(pk=self.order.pk).update(placed=True)
+        self.assertFalse(hold_appointment_slots(self.order))
+        self.assertEqual(0, self._counter(self.drop_off_time))
+
+    def test_hold_appointment_slots_drop_off_full(self):
         TrackConfirmedOrderSlotsFactory(
-            appointment=appointment,
+            appointment=self.drop_off_time,
             counter=settings.MAX_APPOINTMENTS_PER_HOUR)
 
-        expected_calendar_grid = [{'date': '2015-03-16',
-            'day_name': 'Monday',
-            'day_of_month': 16,
-            'month_name': 'March',
-            'time_slots': [{'available': False, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': False, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': False, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': False, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': False, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': False, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': False, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': False, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': False, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': False, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            {'date': '2015-03-17',
-            'day_name': 'Tuesday',
-            'day_of_month': 17,
-            'month_name': 'March',
-            'time_slots': [{'available': True, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': True, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': False, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': False, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': False, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': False, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': True, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': True, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': True, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': False, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            ]
-
-        self.assertEqual(expected_calendar_grid,
-                         mark_unavailable_slots(calendar_grid))
-
-    def test_appointment_slot_all_available_calendar_grid(self):
-        calendar_grid = [{'date': '2015-03-16',
-            'day_name': 'Monday',
-            'day_of_month': 16,
-            'month_name': 'March',
-            'time_slots': [{'available': False, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': False, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': False, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': False, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': False, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': False, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': False, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': False, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': False, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            {'date': '2015-03-17',
-            'day_name': 'Tuesday',
-            'day_of_month': 17,
-            'month_name': 'March',
-            'time_slots': [{'available': True, 'hour': '08', 'label': '8 - 9am'},
-                        {'available': True, 'hour': '09', 'label': '9 - 10am'},
-                        {'available': True, 'hour': '10', 'label': '10 - 11am'},
-                        {'available': True, 'hour': '11', 'label': '11 - 12pm'},
-                        {'available': True, 'hour': '12', 'label': '12 - 1pm'},
-                        {'available': True, 'hour': '13', 'label': '1 - 2pm'},
-                        {'available': True, 'hour': '14', 'label': '2 - 3pm'},
-                        {'available': True, 'hour': '15', 'label': '3 - 4pm'},
-                        {'available': True, 'hour': '16', 'label': '4 - 5pm'},
-                        {'available': True, 'hour': '17', 'label': '5 - 6pm'},
-                        {'available': True, 'hour': '18', 'label': '6 - 7pm'},
-                        {'available': True, 'hour': '19', 'label': '7 - 8pm'},
-                        {'available': True, 'hour': '20', 'label': '8 - 9pm'},
-                        {'available': True, 'hour': '21', 'label': '9 - 10pm'},
-                        {'available': True, 'hour': '22', 'label': '10 - 11pm'}]},
-            ]
-
-        expected_calendar_grid = calendar_grid
-
-        self.assertEqual(expected_calendar_grid,
-                         mark_unavailable_slots(calendar_grid))
+        with self.assertRaises(SlotUnavailable) as context:
+            hold_appointment_slots(self.order)
+
+        self.assertEqual('drop_off_time', context.exception.slot)
+        # Pick up reservation rolled back
+        self.assertFalse(TrackConfirmedOrderSlots.objects.filter(
+            appointment=self.pick_up_time).exists())
+        self.assertIsNone(Order.objects.get(pk=self.order.pk).slots_held_time)
+
+    def test_release_appointment_slots(self):
+        hold_appointment_slots(self.order)
+
+        self.assertTrue(release_appointment_slots(self.order))
+        self.assertFalse(release_appointment_slots(self.order))
+
+        self.assertEqual(0, self._counter(self.pick_up_time))
+        self.assertEqual(0, self._counter(self.drop_off_time))
+        self.assertIsNone(Order.objects.get(pk=self.order.pk).slots_held_time)
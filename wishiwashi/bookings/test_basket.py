@@ -0,0 +1,64 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from .basket import update_order_basket
+from .factories import ItemAndQuantityFactory, ItemFactory, OrderFactory
+from .models import ItemAndQuantity
+from .prices import clear_item_prices
+
+
+class UpdateOrderBasket(TestCase):
+    def setUp(self):
+        clear_item_prices()
+        self.shirt = ItemFactory(price=Decimal('2.50'))
+        self.suit = ItemFactory(price=Decimal('12.00'))
+        self.order = OrderFactory()
+
+    def lines(self):
+        return sorted((line.item_id, line.quantity, line.price) for line in self.order.items.all())
+
+    def test_new_basket(self):
+        with self.settings(MIN_FREE_TRANSPORTATION=Decimal('15.00'), TRANSPORTATION_CHARGE=Decimal('3.95')):
+            basket_price = update_order_basket(self.order, {str(self.shirt.pk): 2, str(self.suit.pk): 1})
+
+        self.assertEqual(self.lines(), [(self.shirt.pk, 2, Decimal('5.00')),
+                                        (self.suit.pk, 1, Decimal('12.00'))])
+        self.assertEqual(basket_price.total, Decimal('17.00'))
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price_of_order, Decimal('17.00'))
+        self.assertEqual(self.order.transportation_charge, Decimal('0.00'))
+
+    def test_unchanged_lines_kept(self):
+        update_order_basket(self.order, {str(self.shirt.pk): 2, str(self.suit.pk): 1})
+        shirt_line = self.order.items.get(item=self.shirt)
+
+        update_order_basket(self.order, {str(self.shirt.pk): 2, str(self.suit.pk): 3})
+
+        self.assertEqual(self.order.items.get(item=self.shirt).pk, shirt_line.pk)
+        self.assertEqual(self.lines(), [(self.shirt.pk, 2, Decimal('5.00')),
+                                        (self.suit.pk, 3, Decimal('36.00'))])
+
+    def test_removed_lines_deleted(self):
+        update_order_basket(self.order, {str(self.shirt.pk): 2, str(self.suit.pk): 1})
+        update_order_basket(self.order, {str(self.suit.pk): 1})
+
+        self.assertEqual(self.lines(), [(self.suit.pk, 1, Decimal('12.00'))])
+        self.assertFalse(ItemAndQuantity.objects.filter(item=self.shirt).exists())
+
+    def test_empty_basket(self):
+        update_order_basket(self.order, {str(self.shirt.pk): 2})
+        update_order_basket(self.order, {})
+
+        self.assertEqual(self.lines(), [])
+        self.order.refresh_from_db()
+        self.assertEqual(self.order.total_price_of_order, Decimal('0.00'))
+        self.assertEqual(self.order.transportation_charge, Decimal('0.00'))
+
+    def test_duplicate_lines_replaced(self):
+        self.order.items.add(ItemAndQuantityFactory(item=self.shirt, quantity=1, price=Decimal('2.50')),
+                             ItemAndQuantityFactory(item=self.shirt, quantity=1, price=Decimal('2.50')))
+
+        update_order_basket(self.order, {str(self.shirt.pk): 1})
+
+        self.assertEqual(self.lines(), [(self.shirt.pk, 1, Decimal('2.50'))])
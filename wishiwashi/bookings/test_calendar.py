@@ -9,8 +9,10 @@ import pytz
 
 from bookings.calendar import (get_icalendar_str,
                                get_calendar,
+                               get_static_grid,
+                               build_static_grid,
+                               mark_unavailable_times,
                                operating_hours,
-                               mark_unavailable,
                                pick_up_not_before,
                                get_unavailable_day,
                                drop_off_with_inactive_days,
@@ -18,7 +20,9 @@ from bookings.calendar import (get_icalendar_str,
                                daterange,
                                MIN_HOURS_BEFORE_DROP_OFF,
                                WEEKDAY_OPENING_HOUR,
-                               WEEKDAY_CLOSING_HOUR)
+                               WEEKDAY_CLOSING_HOUR,
+                               SATURDAY_OPENING_HOUR,
+                               SATURDAY_CLOSING_HOUR)
 from bookings.factories import (AddressFactory, OrderFactory, ItemFactory,
                                 ItemAndQuantityFactory, UserFactory,
                                 TrackConfirmedOrderSlotsFactory)
@@ -119,58 +123,6 @@ class CalendarHelpers(TestCase):
                     ]
         self.assertEqual(unavailable_day, expected)
 
-    def test_mark_unavailable(self):
-        calendar_grid = [{'date': '2015-03-06',
-                          'time_slots': [{'hour': '08', 'available': False},
-                                         {'hour': '09', 'available': True},
-                                         {'hour': '10', 'available': True}]},
-                         {'date': '2015-03-07',
-                          'time_slots': [{'hour': '20', 'available': True},
-                                         {'hour': '21', 'available': True},
-                                         {'hour': '22', 'available': False}]}]
-
-        expected_grid = [{'date': '2015-03-06',
-                          'time_slots': [{'hour': '08', 'available': False},
-                                         {'hour': '09', 'available': False},
-                                         {'hour': '10', 'available': True}]},
-                         {'date': '2015-03-07',
-                          'time_slots': [{'hour': '20', 'available': True},
-                                         {'hour': '21', 'available': False},
-                                         {'hour': '22', 'available': False}]}]
-
-        not_before = datetime.datetime(2015, 3, 6, 10, tzinfo=pytz.utc)
-        not_after = datetime.datetime(2015, 3, 7, 20, tzinfo=pytz.utc)
-
-        self.assertEqual(expected_grid, mark_unavailable(calendar_grid,
-                                                         not_before,
-                                                         not_after))
-
-    def test_mark_unavailable_BST(self):
-        calendar_grid = [{'date': '2015-05-06',
-                          'time_slots': [{'hour': '08', 'available': False},
-                                         {'hour': '09', 'available': True},
-                                         {'hour': '10', 'available': True}]},
-                         {'date': '2015-05-07',
-                          'time_slots': [{'hour': '20', 'available': True},
-                                         {'hour': '21', 'available': True},
-                                         {'hour': '22', 'available': False}]}]
-
-        expected_grid = [{'date': '2015-05-06',
-                          'time_slots': [{'hour': '08', 'available': False},
-                                         {'hour': '09', 'available': False},
-                                         {'hour': '10', 'available': True}]},
-                         {'date': '2015-05-07',
-                          'time_slots': [{'hour': '20', 'available': True},
-                                         {'hour': '21', 'available': False},
-                                         {'hour': '22', 'available': False}]}]
-
-        not_before = datetime.datetime(2015, 5, 6, 9, tzinfo=pytz.utc)
-        not_after = datetime.datetime(2015, 5, 7, 19, tzinfo=pytz.utc)
-
-        self.assertEqual(expected_grid, mark_unavailable(calendar_grid,
-                                                         not_before,
-                                                         not_after))
-
     def test_operating_hours(self):
         hours_of_operation = [({'hour': '07', 'available': False},
                                {'hour': '08', 'available': False},
@@ -513,3 +465,102 @@ class CalendarHelpers(TestCase):
         else:
             raise Exception('Day not found')
 
+
+
+class StaticGrid(TestCase):
+    def test_static_grid_built_once_per_day(self):
+        with freeze_time("2015-03-17 09:00:00"):
+            static_grid = get_static_grid()
+
+        with freeze_time("2015-03-17 15:00:00"):
+            self.assertIs(static_grid, get_static_grid())
+
+        with freeze_time("2015-03-18 09:00:00"):
+            self.assertIsNot(static_grid, get_static_grid())
+
+    def _mark_unavailable_times(self, starting_monday, not_before, not_after):
+        """
+        :return: function of (date, hour) to availability after marking
+        """
+        static_grid = build_static_grid(starting_monday, starting_monday)
+        available = bytearray([1]) * len(static_grid.slot_times)
+        mark_unavailable_times(static_grid, available, not_before, not_after)
+
+        def slot(date, hour):
+            return available[(static_grid.day_index[date] * len(static_grid.slots)) +
+                             static_grid.hour_index[hour]]
+        return slot
+
+    def test_mark_unavailable_times(self):
+        slot = self._mark_unavailable_times(datetime.date(2015, 3, 2),
+                                            datetime.datetime(2015, 3, 6, 10, tzinfo=pytz.utc),
+                                            datetime.datetime(2015, 3, 7, 20, tzinfo=pytz.utc))
+
+        self.assertEqual([slot('2015-03-06', hour) for hour in (8, 9, 10)], [0, 0, 1])
+        self.assertEqual([slot('2015-03-07', hour) for hour in (19, 20, 21)], [1, 1, 0])
+
+    def test_mark_unavailable_times_BST(self):
+        # 09:00 UTC is 10am, 19:00 UTC is 8pm in London
+        slot = self._mark_unavailable_times(datetime.date(2015, 5, 4),
+                                            datetime.datetime(2015, 5, 6, 9, tzinfo=pytz.utc),
+                                            datetime.datetime(2015, 5, 7, 19, tzinfo=pytz.utc))
+
+        self.assertEqual([slot('2015-05-06', hour) for hour in (8, 9, 10)], [0, 0, 1])
+        self.assertEqual([slot('2015-05-07', hour) for hour in (19, 20, 21)], [1, 1, 0])
+
+    def test_mark_unavailable_times_clocks_go_forward(self):
+        # Clocks went forward on Sunday 29th March 2015
+        slot = self._mark_unavailable_times(datetime.date(2015, 3, 23),
+                                            datetime.datetime(2015, 3, 27, 10, tzinfo=pytz.utc),
+                                            datetime.datetime(2015, 3, 30, 19, tzinfo=pytz.utc))
+
+        # Friday still GMT
+        self.assertEqual([slot('2015-03-27', hour) for hour in (9, 10)], [0, 1])
+        # Monday BST
+        self.assertEqual([slot('2015-03-30', hour) for hour in (20, 21)], [1, 0])
+        self.assertEqual(slot('2015-03-31', 8), 0)
+
+    def test_static_grid_bank_holiday(self):
+        # Monday 6th April 2015 bank holiday
+        static_grid = build_static_grid(datetime.date(2015, 4, 4),
+                                        datetime.date(2015, 4, 6))
+        slots_per_day = len(static_grid.slots)
+
+        self.assertEqual(static_grid.days[0],
+                         ('April', 6, 'Monday', '2015-04-06'))
+        self.assertEqual(static_grid.available[:slots_per_day],
+                         bytes(bytearray(slots_per_day)))
+        # Tuesday open during operating hours
+        self.assertTrue(all(static_grid.available[slots_per_day:
+                                                  slots_per_day * 2]))
+
+    def test_static_grid_saturday_hours(self):
+        static_grid = build_static_grid(datetime.date(2015, 3, 16),
+                                        datetime.date(2015, 3, 16))
+        slots_per_day = len(static_grid.slots)
+        saturday = static_grid.day_index['2015-03-21']
+
+        hours = [int(hour) for hour, _label in static_grid.slots
+                 if static_grid.available[(saturday * slots_per_day) +
+                                          static_grid.hour_index[int(hour)]]]
+        self.assertEqual(hours, list(range(SATURDAY_OPENING_HOUR,
+                                           SATURDAY_CLOSING_HOUR)))
+
+    @freeze_time("2015-03-17 09:00:00")
+    def test_get_calendar_does_not_modify_static_grid(self):
+        static_grid = get_static_grid()
+        available = static_grid.available
+
+        TrackConfirmedOrderSlotsFactory(
+            appointment=datetime.datetime(2015, 3, 18, 10, tzinfo=pytz.utc),
+            counter=settings.MAX_APPOINTMENTS_PER_HOUR)
+        calendar_grid = get_calendar(is_pick_up_time=True, out_code='w1')
+
+        self.assertEqual(available, get_static_grid().available)
+        day = [day for day in calendar_grid if day['date'] == '2015-03-18'][0]
+        self.assertEqual(day['time_slots'][2],
+                         {'available': False, 'hour': '10',
+                          'label': '10 - 11am'})
+        self.assertEqual(day['time_slots'][3],
+                         {'available': True, 'hour': '11',
+                          'label': '11 - 12pm'})
@@ -0,0 +1,84 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+import mock
+
+from .factories import CategoryFactory, ItemFactory, UserFactory
+from .items import build_columns_of_items, get_columns_of_items
+
+
+class ColumnsOfItems(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_no_items(self):
+        self.assertEqual(build_columns_of_items(num_columns=3), [])
+
+    def test_categories_not_split(self):
+        shirts = CategoryFactory(name='Shirts')
+        suits = CategoryFactory(name='Suits')
+        for name in 'abcd':
+            ItemFactory(name=name, category=shirts, price=Decimal('2.50'))
+        for name in 'ef':
+            ItemFactory(name=name, category=suits, price=Decimal('12.00'))
+
+        columns = build_columns_of_items(num_columns=3)
+
+        self.assertEqual([[item['name'] for item in column] for column in columns],
+                         [['a', 'b', 'c'], ['d'], ['e', 'f']])
+        self.assertEqual(columns[2][0], {'name': 'e', 'price': Decimal('12.00'),
+                                         'category': {'id': suits.pk, 'name': 'Suits'}})
+
+    @mock.patch('bookings.items.catalogue_version')
+    def test_cached_per_catalogue_version(self, catalogue_version):
+        catalogue_version.return_value = 1
+        item = ItemFactory(name='Shirt')
+
+        self.assertEqual(get_columns_of_items()[0][0]['name'], 'Shirt')
+        item.name = 'Blouse'
+        item.save()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_columns_of_items()[0][0]['name'], 'Shirt')
+
+        catalogue_version.return_value = 2
+        self.assertEqual(get_columns_of_items()[0][0]['name'], 'Blouse')
+
+    @mock.patch('bookings.catalogue.get_redis')
+    def test_category_save_bumps_version(self, get_redis):
+        with self.settings(CATALOGUE_CACHE_ON=True):
+            CategoryFactory()
+
+        get_redis.return_value.incr.assert_called_with('catalogue:version')
+
+
+@mock.patch('bookings.decorators.catalogue_version', return_value=1)
+class PricesPage(TestCase):
+    def setUp(self):
+        cache.clear()
+        ItemFactory(name='Shirt', price=Decimal('2.50'))
+
+    def test_cached_for_visitors(self, catalogue_version):
+        resp = self.client.get(reverse('bookings:prices'))
+        self.assertIn('Cookie', resp['Vary'])
+
+        with mock.patch('bookings.views.get_columns_of_items') as get_columns_of_items:
+            cached = self.client.get(reverse('bookings:prices'))
+
+        self.assertFalse(get_columns_of_items.called)
+        self.assertEqual(cached.content, resp.content)
+        self.assertIn('Cookie', cached['Vary'])
+
+    def test_not_cached_for_customers(self, catalogue_version):
+        user = UserFactory()
+        user.set_password('password')
+        user.save()
+        self.client.login(username=user.username, password='password')
+
+        resp = self.client.get(reverse('bookings:prices'))
+
+        self.assertIn('private', resp['Cache-Control'])
+        self.assertIn('Cookie', resp['Vary'])
+        self.assertFalse(catalogue_version.called)
@@ -1,8 +1,10 @@
 from decimal import Decimal
 from django.test import TestCase
+import mock
 
-from .prices import total_price
+from .prices import clear_item_prices, price_basket, total_items_price, total_price
 from .factories import ItemFactory, VoucherFactory
+from .models import Item
 
 
 class Discounts(TestCase):
@@ -70,3 +72,61 @@ class Discounts(TestCase):
             self.assertEqual(total_price(items, voucher), Decimal('5.88'))
 
 
+
+
+class BasketPrice(TestCase):
+    def setUp(self):
+        clear_item_prices()
+
+    def test_single_query(self):
+        item1 = ItemFactory(price=Decimal('2.18'))
+        item2 = ItemFactory(price=Decimal('5.79'))
+        items = {str(item1.pk): 1, str(item2.pk): 4}
+
+        with self.settings(MIN_FREE_TRANSPORTATION=Decimal('30.00'), TRANSPORTATION_CHARGE=Decimal('3.95'),
+                           VAT_RATE=Decimal('20.00')):
+            with self.assertNumQueries(1):
+                basket_price = price_basket(items)
+
+        self.assertEqual(basket_price.items_price, Decimal('25.34'))
+        self.assertEqual(basket_price.transportation_charge, Decimal('3.95'))
+        self.assertEqual(basket_price.total, Decimal('29.29'))
+        self.assertEqual(basket_price.vat, Decimal('4.88'))
+        self.assertEqual(basket_price.ex_vat, Decimal('24.41'))
+        self.assertEqual(basket_price.line_prices, {item1.pk: Decimal('2.18'), item2.pk: Decimal('23.16')})
+
+    def test_missing_item(self):
+        with self.assertRaises(Item.DoesNotExist):
+            price_basket({'999999': 1})
+
+    @mock.patch('bookings.prices.catalogue_version')
+    def test_prices_cached_per_version(self, catalogue_version):
+        catalogue_version.return_value = 1
+        item = ItemFactory(price=Decimal('10.00'))
+        items = {str(item.pk): 2}
+
+        self.assertEqual(total_items_price(items), Decimal('20.00'))
+        Item.objects.filter(pk=item.pk).update(price=Decimal('12.00'))
+
+        with self.assertNumQueries(0):
+            self.assertEqual(total_items_price(items), Decimal('20.00'))
+
+        catalogue_version.return_value = 2
+        self.assertEqual(total_items_price(items), Decimal('24.00'))
+
+    @mock.patch('bookings.prices.catalogue_version')
+    def test_not_cached_without_version(self, catalogue_version):
+        catalogue_version.return_value = None
+        item = ItemFactory(price=Decimal('10.00'))
+        items = {str(item.pk): 1}
+
+        total_items_price(items)
+        with self.assertNumQueries(1):
+            total_items_price(items)
+
+    @mock.patch('bookings.catalogue.get_redis')
+    def test_item_save_bumps_version(self, get_redis):
+        with self.settings(CATALOGUE_CACHE_ON=True):
+            ItemFactory(price=Decimal('10.00'))
+
+        get_redis.return_value.incr.assert_called_with('catalogue:version')
@@ -0,0 +1,84 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from base.fake_services import FakeCommunicateServer
+from .factories import OrderFactory, UserFactory
+from .models import DropoffOrderReminder, Order, PickupOrderReminder
+from .reminders import claim_reminders, without_reminder
+from .tasks import drop_off_reminder_via_email, pick_up_reminder_via_email
+
+
+class BatchedReminders(TestCase):
+    def setUp(self):
+        self.server = FakeCommunicateServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+
+        settings = self.settings(COMMUNICATE_SERVICE_ENDPOINT=self.server.endpoint,
+                                 COMMUNICATE_SERVICE_CONCURRENCY=3)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def create_orders(self, count, **kwargs):
+        return [OrderFactory(authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                             charge_back_status=Order.NOT_CHARGED_BACK,
+                             refund_status=Order.NOT_REFUNDED,
+                             **kwargs)
+                for _ in range(count)]
+
+    def test_pick_up_reminders(self):
+        soon = timezone.now() + timedelta(minutes=30)
+        orders = self.create_orders(8, order_status=Order.CLAIMED_BY_VENDOR, pick_up_time=soon)
+        PickupOrderReminder.objects.create(order=orders[0])
+
+        pick_up_reminder_via_email()
+
+        self.assertEqual(sorted(email['recipients'][0] for email in self.server.emails),
+                         sorted(order.customer.email for order in orders[1:]))
+        self.assertEqual(PickupOrderReminder.objects.count(), 8)
+
+        # Everyone's been reminded
+        pick_up_reminder_via_email()
+        self.assertEqual(len(self.server.emails), 7)
+
+    def test_refused_reminders_not_recorded(self):
+        soon = timezone.now() + timedelta(minutes=30)
+        refused = UserFactory()
+        self.server.rejected.add(refused.email)
+        orders = self.create_orders(3, order_status=Order.RECEIVED_BY_VENDOR, drop_off_time=soon)
+        refused_order = self.create_orders(1, order_status=Order.RECEIVED_BY_VENDOR,
+                                           drop_off_time=soon, customer=refused)[0]
+
+        drop_off_reminder_via_email()
+
+        self.assertEqual(len(self.server.emails), 3)
+        self.assertEqual(set(DropoffOrderReminder.objects.values_list('order', flat=True)),
+                         set(order.pk for order in orders))
+
+        # Tried again on the next run
+        self.server.rejected.clear()
+        drop_off_reminder_via_email()
+        self.assertTrue(DropoffOrderReminder.objects.filter(order=refused_order).exists())
+
+    def test_anti_join(self):
+        soon = timezone.now() + timedelta(minutes=30)
+        orders = self.create_orders(5, order_status=Order.CLAIMED_BY_VENDOR, pick_up_time=soon)
+        PickupOrderReminder.objects.create(order=orders[0])
+
+        remaining = without_reminder(Order.objects.select_related('customer'), PickupOrderReminder)
+        with self.assertNumQueries(1):
+            emails = [order.customer.email for order in remaining]
+
+        self.assertEqual(sorted(emails), sorted(order.customer.email for order in orders[1:]))
+
+    def test_overlapping_runs_claim_once(self):
+        soon = timezone.now() + timedelta(minutes=30)
+        orders = self.create_orders(3, order_status=Order.CLAIMED_BY_VENDOR, pick_up_time=soon)
+        # Another run claimed one between this run's query and its insert
+        PickupOrderReminder.objects.create(order=orders[1])
+
+        claimed = claim_reminders(orders, PickupOrderReminder)
+
+        self.assertEqual(claimed, [orders[0], orders[2]])
+        self.assertEqual(PickupOrderReminder.objects.count(), 3)
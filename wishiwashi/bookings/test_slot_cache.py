@@ -0,0 +1,101 @@
+import datetime
+
+from django.conf import settings
+from django.test import TestCase
+from django.test.utils import override_settings
+import mock
+import pytz
+import redis
+
+from bookings import slot_cache
+from bookings.appointments import appointment_slot_available, slots_taken
+from bookings.factories import TrackConfirmedOrderSlotsFactory
+
+
+class Weeks(TestCase):
+    def test_week_start(self):
+        # Sunday 11pm in London is still Sunday in UTC (GMT)
+        appointment = datetime.datetime(2015, 3, 22, 23, tzinfo=pytz.utc)
+        self.assertEqual(slot_cache.week_start(appointment),
+                         datetime.datetime(2015, 3, 16, tzinfo=pytz.utc))
+
+    def test_week_start_uses_utc(self):
+        tz_london = pytz.timezone(settings.TIME_ZONE)
+        # Monday 12am BST is Sunday 11pm UTC
+        appointment = tz_london.localize(datetime.datetime(2015, 6, 22, 0))
+        self.assertEqual(slot_cache.week_start(appointment),
+                         datetime.datetime(2015, 6, 15, tzinfo=pytz.utc))
+
+    def test_week_key(self):
+        monday = datetime.datetime(2015, 3, 16, tzinfo=pytz.utc)
+        self.assertEqual(slot_cache.week_key(monday), 'slots:week:2015-03-16')
+
+    def test_weeks_between(self):
+        min_date = datetime.datetime(2015, 3, 18, tzinfo=pytz.utc)
+        max_date = datetime.datetime(2015, 4, 21, 23, tzinfo=pytz.utc)
+        self.assertEqual(
+            [monday.day for monday in slot_cache.weeks_between(min_date, max_date)],
+            [16, 23, 30, 6, 13, 20])
+
+
+class Cache(TestCase):
+    def setUp(self):
+        self.appointment = datetime.datetime(2015, 3, 18, 10, tzinfo=pytz.utc)
+        self.min_date = datetime.datetime(2015, 3, 16, tzinfo=pytz.utc)
+        self.max_date = datetime.datetime(2015, 3, 29, 23, tzinfo=pytz.utc)
+
+    @mock.patch('bookings.slot_cache.get_redis')
+    def test_loaded_weeks_read_in_one_round_trip(self, get_redis):
+        pipe = get_redis.return_value.pipeline.return_value
+        pipe.execute.return_value = [
+            {b'loaded': b'1', slot_cache._field(self.appointment).encode(): b'3'},
+            {b'loaded': b'1'},
+        ]
+
+        counters = slot_cache.counters_between(self.min_date, self.max_date)
+
+        self.assertEqual(counters, {self.appointment: 3})
+        self.assertEqual(pipe.hgetall.call_count, 2)
+        self.assertEqual(pipe.execute.call_count, 1)
+
+    @mock.patch('bookings.slot_cache.get_redis')
+    def test_missing_weeks_loaded_from_database(self, get_redis):
+        TrackConfirmedOrderSlotsFactory(appointment=self.appointment, counter=2)
+        pipe = get_redis.return_value.pipeline.return_value
+        pipe.execute.return_value = [{}, {b'loaded': b'1'}]
+
+        counters = slot_cache.counters_between(self.min_date, self.max_date)
+
+        self.assertEqual(counters, {self.appointment: 2})
+        pipe.hmset.assert_called_once_with(
+            'slots:week:2015-03-16',
+            {slot_cache._field(self.appointment): 2, 'loaded': 1})
+
+    @mock.patch('bookings.slot_cache.get_redis')
+    def test_redis_errors_are_not_raised(self, get_redis):
+        get_redis.return_value.pipeline.side_effect = redis.ConnectionError
+        get_redis.return_value.register_script.side_effect = redis.ConnectionError
+
+        self.assertIsNone(slot_cache.full_slots(self.min_date, self.max_date))
+        self.assertIsNone(slot_cache.slot_counter(self.appointment))
+        slot_cache.increment(self.appointment)
+
+    @override_settings(SLOT_CACHE_ON=True)
+    @mock.patch('bookings.slot_cache.get_redis')
+    def test_falls_back_to_database(self, get_redis):
+        get_redis.return_value.pipeline.side_effect = redis.ConnectionError
+        TrackConfirmedOrderSlotsFactory(
+            appointment=self.appointment,
+            counter=settings.MAX_APPOINTMENTS_PER_HOUR)
+
+        self.assertFalse(appointment_slot_available(self.appointment))
+        self.assertEqual(dict(slots_taken(self.min_date, self.max_date)),
+                         {'2015-03-18': [10]})
+
+    @override_settings(SLOT_CACHE_ON=True)
+    @mock.patch('bookings.slot_cache.full_slots')
+    def test_slots_taken_reads_cache(self, full_slots):
+        full_slots.return_value = [self.appointment]
+
+        self.assertEqual(dict(slots_taken(self.min_date, self.max_date)),
+                         {'2015-03-18': [10]})
@@ -14,6 +14,7 @@ from .tasks import (push_orders_along,
                     pick_up_reminder_via_email,
                     drop_off_reminder_via_email,
                     cleanup_tracked_confirmed_order_slots,
+                    release_expired_appointment_slot_holds,
                     expected_back_clean_only_orders)
 
 from vendors.tests.patches import create_order
@@ -70,6 +71,12 @@ class Tasks(TestCase):
     def test_delete_old_sessions(self):
         delete_old_sessions()
 
+    @override_settings(REDIS_SESSIONS_ON=True)
+    def test_delete_old_sessions_left_to_redis(self):
+        with mock.patch('bookings.tasks.ClearSessions') as clear_sessions:
+            delete_old_sessions()
+        self.assertFalse(clear_sessions.called)
+
     @freeze_time("2014-04-07 09:01:00")
     def test_cleanup_tracked_confirmed_order_slots(self):
         slot1 = datetime.datetime(2014, 3, 3, 9, tzinfo=pytz.utc)
@@ -111,13 +118,45 @@ class Tasks(TestCase):
         self.assertTrue(TrackConfirmedOrderSlots.objects.filter(
             appointment=slot3).exists())
 
+    @freeze_time("2014-04-07 09:30:00")
+    def test_release_expired_appointment_slot_holds(self):
+        pick_up_time = datetime.datetime(2014, 4, 8, 10, tzinfo=pytz.utc)
+        drop_off_time = datetime.datetime(2014, 4, 10, 10, tzinfo=pytz.utc)
+        TrackConfirmedOrderSlotsFactory(appointment=pick_up_time, counter=2)
+        TrackConfirmedOrderSlotsFactory(appointment=drop_off_time, counter=2)
+
+        expired = OrderFactory(
+            pick_up_time=pick_up_time,
+            drop_off_time=drop_off_time,
+            authorisation_status=Order.AUTHORISING,
+            slots_held_time=datetime.datetime(2014, 4, 7, 9, tzinfo=pytz.utc))
+        held = OrderFactory(
+            pick_up_time=pick_up_time,
+            drop_off_time=drop_off_time,
+            authorisation_status=Order.AUTHORISING,
+            slots_held_time=datetime.datetime(2014, 4, 7, 9, 25, tzinfo=pytz.utc))
+
+        release_expired_appointment_slot_holds()
+
+        for appointment in (pick_up_time, drop_off_time):
+            self.assertEqual(1, TrackConfirmedOrderSlots.objects.get(
+                appointment=appointment).counter)
+
+        expired = Order.objects.get(pk=expired.pk)
+        self.assertIsNone(expired.slots_held_time)
+        self.assertEqual(Order.FAILED_TO_AUTHORISE, expired.authorisation_status)
+
+        held = Order.objects.get(pk=held.pk)
+        self.assertIsNotNone(held.slots_held_time)
+        self.assertEqual(Order.AUTHORISING, held.authorisation_status)
+
 
 @override_settings(
     COMMUNICATE_SERVICE_ENDPOINT="http://localhost"
 )
 class TasksReminders(TestCase):
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_within_hour(self, mock_response):
         class response(object):
             status_code = 200
@@ -138,7 +177,7 @@ class TasksReminders(TestCase):
             order=order).exists())
 
     @freeze_time("2014-04-07 09:00:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_no_orders_pre(self, mock_response):
         class response(object):
             status_code = 200
@@ -159,7 +198,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 10:00:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_no_orders_post(self, mock_response):
         class response(object):
             status_code = 200
@@ -180,7 +219,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_within_hour_localtime(self, mock_response):
         class response(object):
             status_code = 200
@@ -209,7 +248,7 @@ class TasksReminders(TestCase):
             order=order).exists())
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_multi(self, mock_response):
         class response(object):
             status_code = 200
@@ -258,7 +297,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order3)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_within_hour_communicate_failure(self, mock_response):
         class response(object):
             status_code = 200
@@ -279,7 +318,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_within_hour_status_failure(self, mock_response):
         class response(object):
             status_code = 500
@@ -300,7 +339,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_pick_up_reminder_unexpected_failure(self, mock_response):
         class response(object):
             status_code = 500
@@ -321,7 +360,7 @@ class TasksReminders(TestCase):
                           PickupOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_within_hour(self, mock_response):
         class response(object):
             status_code = 200
@@ -342,7 +381,7 @@ class TasksReminders(TestCase):
             order=order).exists())
 
     @freeze_time("2014-04-07 09:00:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_no_orders_pre(self, mock_response):
         class response(object):
             status_code = 200
@@ -363,7 +402,7 @@ class TasksReminders(TestCase):
                           DropoffOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 10:00:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_no_orders_post(self, mock_response):
         class response(object):
             status_code = 200
@@ -384,7 +423,7 @@ class TasksReminders(TestCase):
                           DropoffOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_within_hour_localtime(self, mock_response):
         class response(object):
             status_code = 200
@@ -413,7 +452,7 @@ class TasksReminders(TestCase):
             order=order).exists())
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_multi(self, mock_response):
         class response(object):
             status_code = 200
@@ -462,7 +501,7 @@ class TasksReminders(TestCase):
                           DropoffOrderReminder.objects.get, order=order3)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_within_hour_communicate_failure(self, mock_response):
         class response(object):
             status_code = 200
@@ -483,7 +522,7 @@ class TasksReminders(TestCase):
                           DropoffOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_within_hour_status_failure(self, mock_response):
         class response(object):
             status_code = 500
@@ -504,7 +543,7 @@ class TasksReminders(TestCase):
                           DropoffOrderReminder.objects.get, order=order)
 
     @freeze_time("2014-04-07 09:01:00")
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_drop_off_reminder_unexpected_failure(self, mock_response):
         class response(object):
             status_code = 500
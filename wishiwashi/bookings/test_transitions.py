@@ -0,0 +1,46 @@
+import datetime
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .factories import OrderFactory
+from .models import Order, OrderStatusChange
+from .transitions import transition_orders
+
+
+class TransitionOrders(TestCase):
+    def setUp(self):
+        self.past = timezone.now() - datetime.timedelta(hours=3)
+        self.future = timezone.now() + datetime.timedelta(hours=3)
+
+    def test_only_matching_orders_changed(self):
+        due = OrderFactory(order_status=Order.CLAIMED_BY_VENDOR, pick_up_time=self.past)
+        OrderFactory(order_status=Order.CLAIMED_BY_VENDOR, pick_up_time=self.future)
+        OrderFactory(order_status=Order.UNCLAMIED_BY_VENDORS, pick_up_time=self.past)
+
+        changed = transition_orders(Order.CLAIMED_BY_VENDOR, Order.RECEIVED_BY_VENDOR, 'test',
+                                    pick_up_time__lte=timezone.now())
+
+        self.assertEqual(changed, [due.pk])
+        self.assertEqual(list(Order.objects.filter(order_status=Order.RECEIVED_BY_VENDOR)), [due])
+
+    def test_batches(self):
+        orders = [OrderFactory(order_status=Order.CLAIMED_BY_VENDOR) for _ in range(5)]
+
+        changed = transition_orders(Order.CLAIMED_BY_VENDOR, Order.RECEIVED_BY_VENDOR, 'test', batch_size=2)
+
+        self.assertEqual(changed, [order.pk for order in orders])
+        self.assertFalse(Order.objects.filter(order_status=Order.CLAIMED_BY_VENDOR).exists())
+        self.assertEqual(OrderStatusChange.objects.count(), 5)
+
+    def test_changes_recorded(self):
+        order = OrderFactory(order_status=Order.RECEIVED_BY_VENDOR)
+        modified = order.modified
+
+        transition_orders(Order.RECEIVED_BY_VENDOR, Order.DELIVERED_BACK_TO_CUSTOMER, 'push_orders_along')
+
+        change = OrderStatusChange.objects.get(order=order)
+        self.assertEqual(change.from_status, Order.RECEIVED_BY_VENDOR)
+        self.assertEqual(change.to_status, Order.DELIVERED_BACK_TO_CUSTOMER)
+        self.assertEqual(change.reason, 'push_orders_along')
+        self.assertGreater(Order.objects.get(pk=order.pk).modified, modified)
@@ -0,0 +1,63 @@
+import datetime
+
+from django.test import TestCase
+import pytz
+
+from bookings.working_days import (is_working_day, working_day_after,
+                                   working_day_before, working_days_for_year)
+
+
+class WorkingDays(TestCase):
+    def test_is_working_day(self):
+        # Mon-Sat
+        for day in range(16, 22):
+            self.assertTrue(is_working_day(datetime.date(2015, 3, day)))
+
+    def test_is_working_day_sunday(self):
+        self.assertFalse(is_working_day(datetime.date(2015, 3, 22)))
+
+    def test_is_working_day_bank_holiday(self):
+        # Good Friday and Easter Monday
+        self.assertFalse(is_working_day(datetime.date(2015, 4, 3)))
+        self.assertFalse(is_working_day(datetime.date(2015, 4, 6)))
+
+    def test_is_working_day_saturday_bank_holiday(self):
+        # Boxing day on a Saturday
+        self.assertTrue(is_working_day(datetime.date(2015, 12, 26)))
+
+    def test_is_working_day_datetime(self):
+        self.assertFalse(is_working_day(
+            datetime.datetime(2015, 4, 6, 10, tzinfo=pytz.utc)))
+
+    def test_working_days_for_year(self):
+        working, rank, positions = working_days_for_year(2016)
+        self.assertEqual(len(working), 366)
+        self.assertEqual(len(rank), 367)
+        self.assertEqual(rank[-1], len(positions))
+        self.assertEqual(sum(working), len(positions))
+
+    def test_working_day_after(self):
+        self.assertEqual(datetime.date(2015, 3, 18),
+                         working_day_after(datetime.date(2015, 3, 16), 2))
+
+    def test_working_day_after_skips_sunday_and_bank_holiday(self):
+        # Saturday -> Tuesday (Sunday, Easter Monday)
+        self.assertEqual(datetime.date(2015, 4, 7),
+                         working_day_after(datetime.date(2015, 4, 4)))
+
+    def test_working_day_after_new_year(self):
+        # Wednesday 30th Dec -> Thursday, Saturday (New Years day)
+        self.assertEqual(datetime.date(2015, 12, 31),
+                         working_day_after(datetime.date(2015, 12, 30)))
+        self.assertEqual(datetime.date(2016, 1, 2),
+                         working_day_after(datetime.date(2015, 12, 30), 2))
+
+    def test_working_day_before(self):
+        # Tuesday after Easter Monday -> Saturday
+        self.assertEqual(datetime.date(2015, 4, 4),
+                         working_day_before(datetime.date(2015, 4, 7)))
+
+    def test_working_day_before_new_year(self):
+        # Saturday 2nd Jan 2016 -> Thursday 31st Dec 2015
+        self.assertEqual(datetime.date(2015, 12, 31),
+                         working_day_before(datetime.date(2016, 1, 2)))
@@ -0,0 +1,60 @@
+"""
+Set based order_status changes for periodic tasks
+
+Orders are moved a batch at a time: the batch is locked, updated with one
+UPDATE and audited with one INSERT inside its own transaction, so a large
+backlog never holds a long transaction or row locks for long.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Order, OrderStatusChange
+
+BATCH_SIZE = 1000
+
+
+def record_transitions(order_pks, from_status, to_status, reason):
+    """
+    :param list order_pks: orders which changed status
+    :param int from_status: Order.order_status before
+    :param int to_status: Order.order_status after
+    :param str reason: why, i.e. the task making the change
+
+    Audit hook, called inside the transaction making the change
+    """
+    OrderStatusChange.objects.bulk_create([
+        OrderStatusChange(order_id=order_pk, from_status=from_status, to_status=to_status, reason=reason)
+        for order_pk in order_pks
+    ])
+
+
+def transition_orders(from_status, to_status, reason, batch_size=BATCH_SIZE, **criteria):
+    """
+    :param int from_status: Order.order_status to move orders from
+    :param int to_status: Order.order_status to move orders to
+    :param str reason: recorded against each change
+    :param int batch_size: most orders changed per transaction
+    :param criteria: further Order filters orders must match
+
+    :return: list of primary keys of the orders changed
+    """
+    changed = []
+
+    while True:
+        with transaction.atomic():
+            # Locked so the UPDATE changes exactly these orders
+            order_pks = list(Order.objects.select_for_update().filter(
+                order_status=from_status, **criteria).order_by('pk').values_list('pk', flat=True)[:batch_size])
+
+            if not order_pks:
+                break
+
+            Order.objects.filter(pk__in=order_pks).update(order_status=to_status, modified=timezone.now())
+            record_transitions(order_pks, from_status, to_status, reason)
+
+        changed.extend(order_pks)
+
+        if len(order_pks) < batch_size:
+            break
+
+    return changed
@@ -17,16 +17,14 @@ import pytz
 import shortuuid
 import ujson as json
 
-from payments.utils import transportation_charge
-
 from .address import order_address_lookup, postcode_from_last_order
+from .basket import update_order_basket
 from .calendar import get_calendar, get_day_and_week_time_slot_lands_on
-from .decorators import check_session_data, pick_up_time_session_invalid
-from .prices import total_items_price, total_price
+from .decorators import cache_catalogue_page, check_session_data, pick_up_time_session_invalid
 from .forms import (NotifyWhenAvailableForm, PostcodeForm, PickUpTimeForm, DeliveryTimeForm, ItemsToCleanForm,
                     ItemsAddedForm, LoginForm, PickUpDropOffAddress)
 from .items import get_columns_of_items
-from .models import Address, Category, Item, ItemAndQuantity, Order, OutCodeNotServed, Vendor
+from .models import Address, Category, Item, Order, OutCodeNotServed, Vendor
 from .progress import get_progress_svg
 from .utils import is_postcode_valid
 
@@ -165,6 +163,7 @@ def landing(request):
 
 
 @require_http_methods(["GET"])
+@cache_catalogue_page
 def prices(request):
     context = {
         'title': 'Prices',
@@ -403,16 +402,9 @@ def items_to_clean(request):
     if request.method == 'POST':
         form = ItemsToCleanForm(request.POST)
 
-        # Remove any related items from order whether form validates or not
+        order = None
         if 'order' in request.session:
-            order_pk = request.session['order']
-            order = Order.objects.get(pk=int(order_pk))
-            order.items.clear()
-
-            # Reset order amounts
-            order.transportation_charge = Decimal('0.00')
-            order.total_price_of_order = Decimal('0.00')
-            order.save()
+            order = Order.objects.get(pk=int(request.session['order']))
 
         # Remove items in session
         if 'items' in request.session:
@@ -422,25 +414,16 @@ def items_to_clean(request):
             request.session['items'] = form.cleaned_data['items']
 
             # Update items on order if exists
-            try:
-                order.total_price_of_order = total_price(request.session['items'], order.voucher)
-                order.transportation_charge = transportation_charge(total_items_price(request.session['items']))
-                order.save()
-                for item_pk, quantity in request.session['items'].items():
-                    item = Item.objects.get(pk=item_pk)
-                    item_quantity = ItemAndQuantity()
-                    item_quantity.item = item
-                    item_quantity.quantity = quantity
-                    item_quantity.price = (item.price * quantity).quantize(Decimal('0.01'))
-                    item_quantity.save()
-                    order.items.add(item_quantity)
-            except NameError:
-                pass
+            if order:
+                update_order_basket(order, request.session['items'])
 
             if request.user and request.user.is_authenticated():
                 return HttpResponseRedirect(reverse('bookings:address'))
 
             return HttpResponseRedirect(reverse('registration:create_account'))
+        elif order:
+            # Remove any related items from order when the form doesn't validate
+            update_order_basket(order, {})
     else:
         form = ItemsToCleanForm()
 
@@ -580,18 +563,7 @@ def address(request):
                 order.pick_up_and_delivery_address = address
                 order.customer = request.user
 
-                order.total_price_of_order = total_price(request.session['items'], order.voucher)
-                order.transportation_charge = transportation_charge(total_items_price(request.session['items']))
-                order.save()
-
-                for item_pk, quantity in request.session['items'].items():
-                    item = Item.objects.get(pk=item_pk)
-                    item_quantity = ItemAndQuantity()
-                    item_quantity.item = item
-                    item_quantity.quantity = quantity
-                    item_quantity.price = (item.price * quantity).quantize(Decimal('0.01'))
-                    item_quantity.save()
-                    order.items.add(item_quantity)
+                update_order_basket(order, request.session['items'])
 
             request.session['order'] = order.pk
 
@@ -727,16 +699,9 @@ def items_added(request):
     if request.method == 'POST':
         form = ItemsAddedForm(request.POST)
 
-        # Remove any related items from order whether form validates or not
+        order = None
         if 'order' in request.session:
-            order_pk = request.session['order']
-            order = Order.objects.get(pk=int(order_pk))
-            order.items.clear()
-
-            # Reset order amounts
-            order.transportation_charge = Decimal('0.00')
-            order.total_price_of_order = Decimal('0.00')
-            order.save()
+            order = Order.objects.get(pk=int(request.session['order']))
 
         # Remove any items in session
         if 'items' in request.session:
@@ -749,20 +714,11 @@ def items_added(request):
                 request.session['items'] = form.cleaned_data['items']
 
             # Update order in session if it exists
-            try:
-                order.total_price_of_order = total_price(form.cleaned_data['items'], order.voucher)
-                order.transportation_charge = transportation_charge(total_items_price(form.cleaned_data['items']))
-                order.save()
-                for item_pk, quantity in form.cleaned_data['items'].items():
-                    item = Item.objects.get(pk=item_pk)
-                    item_quantity = ItemAndQuantity()
-                    item_quantity.item = item
-                    item_quantity.quantity = quantity
-                    item_quantity.price = (item.price * quantity).quantize(Decimal('0.01'))
-                    item_quantity.save()
-                    order.items.add(item_quantity)
-            except NameError:
-                pass
+            if order:
+                update_order_basket(order, form.cleaned_data['items'])
+        elif order:
+            # Remove any related items from order when the form doesn't validate
+            update_order_basket(order, {})
     else:
         form = None
 
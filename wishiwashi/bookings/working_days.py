@@ -0,0 +1,122 @@
+from array import array
+from datetime import date, datetime, timedelta
+
+from workalendar.europe import UnitedKingdom as UKBankHolidays
+
+
+SATURDAY = 5
+SUNDAY = 6
+
+# Years either side of today built when the module is loaded
+BOOKING_HORIZON_YEARS = 1
+
+# year -> (working, rank, positions)
+#
+# working: bytearray indexed by day of year (0 based), 1 if working day
+# rank: working days in the year before each day of year (len + 1 entries)
+# positions: day of year of each working day in order
+_working_days = {}
+
+
+def _as_date(day):
+    if isinstance(day, datetime):
+        return day.date()
+    return day
+
+
+def build_working_days(year):
+    """
+    :param int year: year to build
+
+    :return: tuple of working, rank and positions
+
+    A working day for Wishi Washi is Mon-Sat. Bank holidays falling
+    Mon-Fri are not working days.
+    """
+    bank_holidays = UKBankHolidays().holidays_set(year)
+
+    start = date(year, 1, 1)
+    days_in_year = (date(year + 1, 1, 1) - start).days
+
+    working = bytearray(days_in_year)
+    rank = array('H', [0])
+    positions = array('H')
+
+    for day_of_year in range(days_in_year):
+        day = start + timedelta(days=day_of_year)
+
+        if day.weekday() == SATURDAY or (day.weekday() < SATURDAY and
+                                         day not in bank_holidays):
+            working[day_of_year] = 1
+            positions.append(day_of_year)
+
+        rank.append(len(positions))
+
+    return working, rank, positions
+
+
+def working_days_for_year(year):
+    if year not in _working_days:
+        _working_days[year] = build_working_days(year)
+    return _working_days[year]
+
+
+def is_working_day(day):
+    """
+    :param object day: date or datetime
+
+    :return: boolean
+    """
+    day = _as_date(day)
+    working, _rank, _positions = working_days_for_year(day.year)
+    return working[day.timetuple().tm_yday - 1] == 1
+
+
+def working_day_after(day, days=1):
+    """
+    :param object day: date or datetime
+    :param int days: number of working days to move forward (1 or more)
+
+    :return: date of the nth working day after day
+    """
+    assert days >= 1
+    day = _as_date(day)
+    year = day.year
+
+    _working, rank, positions = working_days_for_year(year)
+    # Working days up to and including day
+    index = rank[day.timetuple().tm_yday] + days - 1
+
+    while index >= len(positions):
+        index -= len(positions)
+        year += 1
+        _working, rank, positions = working_days_for_year(year)
+
+    return date(year, 1, 1) + timedelta(days=positions[index])
+
+
+def working_day_before(day):
+    """
+    :param object day: date or datetime
+
+    :return: date of the closest working day before day
+    """
+    day = _as_date(day)
+    year = day.year
+
+    _working, rank, positions = working_days_for_year(year)
+    # Working days before day
+    index = rank[day.timetuple().tm_yday - 1]
+
+    while index == 0:
+        year -= 1
+        _working, rank, positions = working_days_for_year(year)
+        index = len(positions)
+
+    return date(year, 1, 1) + timedelta(days=positions[index - 1])
+
+
+# Precompute the booking horizon when the process starts
+for _year in range(date.today().year - BOOKING_HORIZON_YEARS,
+                   date.today().year + BOOKING_HORIZON_YEARS + 1):
+    working_days_for_year(_year)
@@ -0,0 +1,59 @@
+"""
+New customers, counted by the day of their first placed order
+
+CustomerFirstOrder holds one row per customer who has placed an order so
+counting a period's new customers is a GROUP BY over its placed_time index.
+"""
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, Min
+
+from bookings.models import Order
+from .models import CustomerFirstOrder
+
+# date() gives strings on SQLite
+to_date = models.DateField().to_python
+
+
+def record_first_order(order):
+    """
+    Remember the customer's first order, call in the transaction placing it
+
+    :param Order order: with placed_time set
+    """
+    if CustomerFirstOrder.objects.filter(customer_id=order.customer_id).exists():
+        return
+
+    try:
+        with transaction.atomic():
+            CustomerFirstOrder.objects.create(customer_id=order.customer_id,
+                                              placed_time=order.placed_time)
+    except IntegrityError:
+        # Another of their orders was placed in the meantime
+        pass
+
+
+def first_orders(order_model=Order, **criteria):
+    """
+    :param criteria: further filters on the orders, i.e. only some customers'
+
+    :return: iterator of (customer id, placed_time of their first order)
+    """
+    return order_model.objects.filter(
+        placed=True, placed_time__isnull=False, customer__isnull=False, **criteria).values(
+            'customer').annotate(first=Min('placed_time')).values_list(
+                'customer', 'first').order_by().iterator()
+
+
+def new_customers_by_day(start, end):
+    """
+    :param datetime start:
+    :param datetime end: inclusive
+
+    :return: dict of UTC day to customers whose first order was placed then
+    """
+    query = CustomerFirstOrder.objects.filter(
+        placed_time__gte=start, placed_time__lte=end).extra(
+            {'day': 'date(placed_time)'}).values('day').annotate(
+                customers=Count('pk')).order_by()
+
+    return {to_date(result['day']): result['customers'] for result in query}
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+import random
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+import pytz
+
+from bookings.models import Address, Order
+from ...cohorts import first_orders, new_customers_by_day
+from ...models import CustomerFirstOrder
+
+
+def previous_new_customers(start, end):
+    """
+    How new_customers_yearly used to count, for comparison
+    """
+    previous_customers = list(u.id for u in User.objects.filter(
+        order__placed=True,
+        order__placed_time__lt=start).distinct()
+    )
+    query = User.objects.prefetch_related('order_set').filter(order__placed=True,
+                                                              order__placed_time__gte=start,
+                                                              order__placed_time__lte=end).exclude(
+                                                                  pk__in=previous_customers
+                                                              ).order_by('-order__placed_time')
+    users = []
+    for user in query:
+        if user.id not in users:
+            users.append(user.id)
+    return len(users)
+
+
+class Command(BaseCommand):
+    help = ('Times counting a year of new customers from their first orders. '
+            'The customers are created inside a transaction which is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=100000)
+        parser.add_argument('--previous', action='store_true', default=False,
+                            help='Also time the previous count, slow for many customers')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            User.objects.bulk_create(
+                User(username='benchmark{:06d}'.format(index)) for index in range(options['customers']))
+            customers = User.objects.filter(username__startswith='benchmark').values_list('pk', flat=True)
+
+            # Two years of orders, one or two per customer
+            start = datetime(2098, 1, 1, tzinfo=pytz.utc)
+            address = Address.objects.create(postcode='zz11aa')
+            orders = []
+            for index, customer in enumerate(customers):
+                for _ in range(random.randint(1, 2)):
+                    orders.append(Order(
+                        uuid='b{:07d}'.format(len(orders)), customer_id=customer,
+                        pick_up_and_delivery_address=address, placed=True,
+                        placed_time=start + timedelta(minutes=random.randint(0, 2 * 365 * 24 * 60))))
+            Order.objects.bulk_create(orders)
+
+            # Real customers' first orders are already there
+            began = time.time()
+            CustomerFirstOrder.objects.bulk_create(
+                (CustomerFirstOrder(customer_id=customer, placed_time=placed_time)
+                 for customer, placed_time in first_orders(customer__username__startswith='benchmark')))
+            backfilled = time.time() - began
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE {}'.format(CustomerFirstOrder._meta.db_table))
+
+            self.stdout.write('{} customers, {} orders, backfilled in {:.2f}s'.format(
+                options['customers'], len(orders), backfilled))
+
+            year_start = datetime(2099, 1, 1, tzinfo=pytz.utc)
+            year_end = datetime(2099, 12, 31, 23, 59, 59, tzinfo=pytz.utc)
+
+            began = time.time()
+            customers = sum(new_customers_by_day(year_start, year_end).values())
+            elapsed = time.time() - began
+            self.stdout.write('new_customers_by_day (1 year): {:.2f}ms, {} new customers'.format(
+                elapsed * 1000, customers))
+
+            if options['previous']:
+                began = time.time()
+                customers = previous_new_customers(year_start, year_end)
+                elapsed = time.time() - began
+                self.stdout.write('previous count (1 year): {:.2f}ms, {} new customers'.format(
+                    elapsed * 1000, customers))
+
+            transaction.set_rollback(True)
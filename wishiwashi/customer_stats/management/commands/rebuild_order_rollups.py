@@ -0,0 +1,31 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+import pytz
+
+from ...rollups import forget_cached_stats, history, rebuild
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the order rollups behind the customer stats from the Order table and '
+            'drops the cached responses. Run after changing placed orders in the past.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='YYYY-MM-DD, every day with orders by default')
+
+    def handle(self, *args, **options):
+        period = history()
+        if period is None:
+            raise CommandError('No placed orders')
+
+        start, end = period
+        if options['since']:
+            try:
+                start = datetime.strptime(options['since'], '%Y-%m-%d').replace(tzinfo=pytz.utc)
+            except ValueError:
+                raise CommandError('--since should be YYYY-MM-DD')
+
+        days, hours = rebuild(start, end)
+
+        self.stdout.write('Rebuilt {} days and {} hours from {:%Y-%m-%d}, dropped {} cached '
+                          'responses'.format(days, hours, start, forget_cached_stats()))
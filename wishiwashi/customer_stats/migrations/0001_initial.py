@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from decimal import Decimal
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOrderRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('placed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(default=Decimal('0.00'), max_digits=10, decimal_places=2)),
+                ('pick_ups', models.PositiveIntegerField(default=0)),
+                ('drop_offs', models.PositiveIntegerField(default=0)),
+                ('day', models.DateField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='HourlyOrderRollup',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('placed', models.PositiveIntegerField(default=0)),
+                ('revenue', models.DecimalField(default=Decimal('0.00'), max_digits=10, decimal_places=2)),
+                ('pick_ups', models.PositiveIntegerField(default=0)),
+                ('drop_offs', models.PositiveIntegerField(default=0)),
+                ('hour', models.DateTimeField(unique=True)),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
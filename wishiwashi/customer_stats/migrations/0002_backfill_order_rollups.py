@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from customer_stats.rollups import history, placed_orders_between, summarise
+
+
+def backfill_order_rollups(apps, schema_editor):
+    """
+    Count every placed order so far, the stats read nothing else
+    """
+    orderModel = apps.get_model('bookings', 'Order')
+    dailyModel = apps.get_model('customer_stats', 'DailyOrderRollup')
+    hourlyModel = apps.get_model('customer_stats', 'HourlyOrderRollup')
+
+    period = history(order_model=orderModel)
+    if period is None:
+        return
+
+    start, end = period
+
+    days, hours = summarise(placed_orders_between(start, end, order_model=orderModel), start, end)
+    dailyModel.objects.bulk_create(dailyModel(day=day, **counts) for day, counts in days.items())
+    hourlyModel.objects.bulk_create(hourlyModel(hour=hour, **counts) for hour, counts in hours.items())
+
+
+def remove_order_rollups(apps, schema_editor):
+    apps.get_model('customer_stats', 'DailyOrderRollup').objects.all().delete()
+    apps.get_model('customer_stats', 'HourlyOrderRollup').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0061_unique_order_reminders'),
+        ('customer_stats', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_order_rollups, remove_order_rollups),
+    ]
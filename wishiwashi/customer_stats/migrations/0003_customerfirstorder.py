@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import models, migrations
+from django.conf import settings
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0006_require_contenttypes_0002'),
+        ('customer_stats', '0002_backfill_order_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerFirstOrder',
+            fields=[
+                ('customer', models.OneToOneField(primary_key=True, serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('placed_time', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+from customer_stats.cohorts import first_orders
+
+
+def backfill_customer_first_orders(apps, schema_editor):
+    orderModel = apps.get_model('bookings', 'Order')
+    firstOrderModel = apps.get_model('customer_stats', 'CustomerFirstOrder')
+
+    batch = []
+    for customer_id, placed_time in first_orders(order_model=orderModel):
+        batch.append(firstOrderModel(customer_id=customer_id, placed_time=placed_time))
+        if len(batch) == 1000:
+            firstOrderModel.objects.bulk_create(batch)
+            batch = []
+    firstOrderModel.objects.bulk_create(batch)
+
+
+def remove_customer_first_orders(apps, schema_editor):
+    apps.get_model('customer_stats', 'CustomerFirstOrder').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customer_stats', '0003_customerfirstorder'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_customer_first_orders, remove_customer_first_orders),
+    ]
@@ -1,3 +1,48 @@
+from decimal import Decimal
+
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils.encoding import python_2_unicode_compatible
+
+
+class OrderRollup(models.Model):
+    """
+    Placed orders summarised over a period, see customer_stats.rollups
+    """
+    placed = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    pick_ups = models.PositiveIntegerField(default=0)
+    drop_offs = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+
+
+@python_2_unicode_compatible
+class DailyOrderRollup(OrderRollup):
+    # UTC day
+    day = models.DateField(unique=True)
+
+    def __str__(self):
+        return '{}'.format(self.day)
+
+
+@python_2_unicode_compatible
+class HourlyOrderRollup(OrderRollup):
+    # Start of the hour
+    hour = models.DateTimeField(unique=True)
+
+    def __str__(self):
+        return '{}'.format(self.hour)
+
+
+@python_2_unicode_compatible
+class CustomerFirstOrder(models.Model):
+    """
+    When each customer placed their first order, see customer_stats.cohorts
+    """
+    customer = models.OneToOneField(User, primary_key=True)
+    placed_time = models.DateTimeField(db_index=True)
 
-# Create your models here.
+    def __str__(self):
+        return '{} {}'.format(self.customer_id, self.placed_time)
@@ -0,0 +1,252 @@
+"""
+Placed orders summarised per UTC day and per hour for the stats endpoints
+
+Placing an order counts it in its placed, pick up and drop off periods
+straight away. Anything changed after that (rescheduled slots, adjusted
+totals) is picked up by reconcile, run nightly, which rebuilds the periods
+from ORDER_ROLLUP_RECONCILE_DAYS ago onwards from the Order table.
+Rebuilding locks the rollup rows it replaces before reading the orders, so
+an order counted at the same time is either read or counted afterwards.
+Only a period getting its first order during a rebuild can still lose that
+order until the next reconcile.
+
+Periods before that are no longer rewritten so the responses built from
+them are kept in Redis for good, see cached_stats.
+"""
+from collections import defaultdict
+from datetime import datetime, timedelta
+import json
+import logging
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Q
+from django.utils import timezone
+import pytz
+import redis
+
+from base.redis_client import get_redis
+from bookings.models import Order
+from .models import DailyOrderRollup, HourlyOrderRollup
+
+logger = logging.getLogger(__name__)
+
+# Bump when the responses change
+STATS_KEY_PREFIX = 'customer_stats:v1:'
+
+COUNTS = ('placed', 'revenue', 'pick_ups', 'drop_offs')
+
+
+def day_of(moment):
+    return moment.astimezone(pytz.utc).date()
+
+
+def hour_of(moment):
+    return moment.astimezone(pytz.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def day_start(day):
+    return datetime(day.year, day.month, day.day, tzinfo=pytz.utc)
+
+
+def _increment(model, period, **counts):
+    changes = {name: F(name) + value for name, value in counts.items()}
+    if model.objects.filter(**period).update(**changes):
+        return
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**dict(period, **counts))
+    except IntegrityError:
+        # Created by another order in the meantime
+        model.objects.filter(**period).update(**changes)
+
+
+def record_placed_order(order):
+    """
+    Count a newly placed order, call in the transaction placing it
+
+    :param Order order: with placed_time set
+    """
+    periods = [(order.placed_time, {'placed': 1, 'revenue': order.total_price_of_order}),
+               (order.pick_up_time, {'pick_ups': 1}),
+               (order.drop_off_time, {'drop_offs': 1})]
+
+    for moment, counts in periods:
+        if moment is None:
+            continue
+        _increment(DailyOrderRollup, {'day': day_of(moment)}, **counts)
+        _increment(HourlyOrderRollup, {'hour': hour_of(moment)}, **counts)
+
+
+def summarise(orders, start, end):
+    """
+    :param orders: (placed_time, total_price_of_order, pick_up_time,
+                   drop_off_time) of placed orders
+    :param datetime start: UTC midnight, first period summarised
+    :param datetime end: UTC midnight, summarised up to but excluding
+
+    :return: (days, hours), dicts of period to dict of counts
+    """
+    days = defaultdict(lambda: dict.fromkeys(COUNTS, 0))
+    hours = defaultdict(lambda: dict.fromkeys(COUNTS, 0))
+
+    for placed_time, total, pick_up_time, drop_off_time in orders:
+        periods = [(placed_time, (('placed', 1), ('revenue', total))),
+                   (pick_up_time, (('pick_ups', 1),)),
+                   (drop_off_time, (('drop_offs', 1),))]
+
+        for moment, counts in periods:
+            if moment is None or not start <= moment < end:
+                continue
+            for name, value in counts:
+                days[day_of(moment)][name] += value
+                hours[hour_of(moment)][name] += value
+
+    return days, hours
+
+
+def placed_orders_between(start, end, order_model=Order):
+    """
+    :return: iterator of summarise's input for orders in any period from
+             start up to end
+    """
+    return order_model.objects.filter(
+        Q(placed_time__gte=start, placed_time__lt=end) |
+        Q(pick_up_time__gte=start, pick_up_time__lt=end) |
+        Q(drop_off_time__gte=start, drop_off_time__lt=end),
+        placed=True).values_list(
+            'placed_time', 'total_price_of_order', 'pick_up_time', 'drop_off_time').iterator()
+
+
+def history(order_model=Order):
+    """
+    :return: (start, end) UTC midnights around every placed order, None if
+             there aren't any
+    """
+    bounds = order_model.objects.filter(placed=True).aggregate(
+        first=Min('placed_time'), placed=Max('placed_time'),
+        pick_up=Max('pick_up_time'), drop_off=Max('drop_off_time'))
+    if bounds['first'] is None:
+        return None
+
+    latest = max(moment for name, moment in bounds.items() if name != 'first' and moment)
+    return day_start(day_of(bounds['first'])), day_start(day_of(latest) + timedelta(days=1))
+
+
+def rebuild(start, end):
+    """
+    Replace the rollups from start up to end with the Order table's figures
+
+    :param datetime start: UTC midnight
+    :param datetime end: UTC midnight
+
+    :return: (days, hours) written
+    """
+    with transaction.atomic():
+        daily = DailyOrderRollup.objects.filter(day__gte=start.date(), day__lt=end.date())
+        hourly = HourlyOrderRollup.objects.filter(hour__gte=start, hour__lt=end)
+
+        # Orders placed while rebuilding wait here, or are committed and read below
+        list(daily.select_for_update().values_list('pk', flat=True))
+        list(hourly.select_for_update().values_list('pk', flat=True))
+        days, hours = summarise(placed_orders_between(start, end), start, end)
+
+        daily.delete()
+        hourly.delete()
+
+        DailyOrderRollup.objects.bulk_create(
+            DailyOrderRollup(day=day, **counts) for day, counts in days.items())
+        HourlyOrderRollup.objects.bulk_create(
+            HourlyOrderRollup(hour=hour, **counts) for hour, counts in hours.items())
+
+    return len(days), len(hours)
+
+
+def reconcile_start(now=None):
+    """
+    :return: datetime, UTC midnight from which the rollups may still change
+    """
+    today = day_of(now or timezone.now())
+    return day_start(today - timedelta(days=settings.ORDER_ROLLUP_RECONCILE_DAYS))
+
+
+def reconcile(now=None):
+    """
+    Rebuild the rollups which may still change, up to the last booked slot
+
+    :return: (days, hours) written
+    """
+    start = reconcile_start(now)
+
+    latest = Order.objects.filter(placed=True).aggregate(
+        pick_up=Max('pick_up_time'), drop_off=Max('drop_off_time'))
+    latest = max([start] + [moment for moment in latest.values() if moment is not None])
+
+    return rebuild(start, day_start(day_of(latest) + timedelta(days=1)))
+
+
+def daily_rollups(first_day, last_day):
+    """
+    :return: dict of day to DailyOrderRollup, days without orders are missing
+    """
+    return {rollup.day: rollup for rollup in
+            DailyOrderRollup.objects.filter(day__gte=first_day, day__lte=last_day)}
+
+
+def hourly_rollups(start, end):
+    """
+    :return: dict of hour to HourlyOrderRollup, hours without orders are missing
+    """
+    return {rollup.hour: rollup for rollup in
+            HourlyOrderRollup.objects.filter(hour__gte=start, hour__lte=end)}
+
+
+def is_closed(last_day, now=None):
+    """
+    :param date last_day: last day a response covers
+
+    :return: bool, True if none of the days will change again
+    """
+    return last_day < reconcile_start(now).date()
+
+
+def cached_stats(key, last_day, build):
+    """
+    :param str key: identifies the response
+    :param date last_day: last day the response covers
+    :param build: callable returning the response as a dict of
+                  content, content_type and headers
+
+    :return: dict as returned by build, from Redis when last_day is closed
+    """
+    if not is_closed(last_day):
+        return build()
+
+    key = STATS_KEY_PREFIX + key
+    try:
+        cached = get_redis().get(key)
+    except redis.RedisError:
+        logger.exception('Could not read %s', key)
+        return build()
+
+    if cached is not None:
+        return json.loads(cached.decode('utf-8'))
+
+    stats = build()
+    try:
+        get_redis().set(key, json.dumps(stats))
+    except redis.RedisError:
+        logger.exception('Could not store %s', key)
+    return stats
+
+
+def forget_cached_stats():
+    """
+    Drop every cached response, after rebuilding closed periods
+    """
+    client = get_redis()
+    keys = list(client.scan_iter(STATS_KEY_PREFIX + '*'))
+    if keys:
+        client.delete(*keys)
+    return len(keys)
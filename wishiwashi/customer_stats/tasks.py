@@ -0,0 +1,19 @@
+from celery.decorators import periodic_task
+from celery.task.schedules import crontab
+from celery.utils.log import get_task_logger
+
+from . import rollups
+
+
+logger = get_task_logger(__name__)
+
+
+@periodic_task(run_every=crontab(minute="30", hour="1"),
+               time_limit=600)  # seconds
+def reconcile_order_rollups(*args, **kwargs):
+    """
+    Rebuild the order rollups which may have changed since they were counted
+    """
+    days, hours = rollups.reconcile()
+    logger.info('Reconciled {} days and {} hours of order rollups'.format(days, hours))
+    return True
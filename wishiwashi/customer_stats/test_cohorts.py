@@ -0,0 +1,60 @@
+from datetime import date, datetime
+
+from django.core.urlresolvers import reverse
+from django.test import Client, TestCase
+import pytz
+
+from bookings.factories import OrderFactory, UserFactory, VendorFactory
+from .cohorts import first_orders, new_customers_by_day, record_first_order
+from .models import CustomerFirstOrder
+
+
+def place_order(customer, placed_time):
+    order = OrderFactory(customer=customer, placed=True, placed_time=placed_time)
+    record_first_order(order)
+    return order
+
+
+class Cohorts(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.user = UserFactory()
+        self.vendor = VendorFactory(staff=[self.user])
+        self.assertTrue(self.client.login(username=self.user.username, password=UserFactory.password))
+
+        self.returning = UserFactory()
+        place_order(self.returning, datetime(2015, 12, 20, 10, tzinfo=pytz.utc))
+        place_order(self.returning, datetime(2016, 1, 5, 10, tzinfo=pytz.utc))
+
+        self.new = UserFactory()
+        place_order(self.new, datetime(2016, 1, 5, 12, tzinfo=pytz.utc))
+        place_order(self.new, datetime(2016, 1, 9, 12, tzinfo=pytz.utc))
+        place_order(UserFactory(), datetime(2016, 2, 1, 12, tzinfo=pytz.utc))
+
+    def get(self, name, **params):
+        with self.settings(VENDOR_WISHI_WASHI_PK=self.vendor.pk):
+            return self.client.get(reverse('customer_stats:{}'.format(name)), params)
+
+    def test_first_order_kept(self):
+        self.assertEqual(CustomerFirstOrder.objects.get(customer=self.new).placed_time,
+                         datetime(2016, 1, 5, 12, tzinfo=pytz.utc))
+
+        # As the migration fills it in
+        self.assertEqual(sorted(first_orders()),
+                         sorted(CustomerFirstOrder.objects.values_list('customer', 'placed_time')))
+
+    def test_counted_in_one_query(self):
+        with self.assertNumQueries(1):
+            customers = new_customers_by_day(datetime(2016, 1, 1, tzinfo=pytz.utc),
+                                             datetime(2016, 12, 31, 23, 59, 59, tzinfo=pytz.utc))
+        self.assertEqual(customers, {date(2016, 1, 5): 1, date(2016, 2, 1): 1})
+
+    def test_views(self):
+        lines = self.get('new_customers_monthly', month='01', year='2016').content.decode('utf-8').splitlines()
+        self.assertIn('Tue 05\t1', lines)
+        self.assertIn('Sat 09\t0', lines)
+
+        lines = self.get('new_customers_yearly', year='2016').content.decode('utf-8').splitlines()
+        self.assertIn('Jan 16\t1', lines)
+        self.assertIn('Feb 16\t1', lines)
+        self.assertIn('Dec 16\t0', lines)
@@ -0,0 +1,116 @@
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from django.core.urlresolvers import reverse
+from django.test import Client, TestCase
+import mock
+import pytz
+
+from base.fake_redis import FakeRedis
+from bookings.factories import OrderFactory, UserFactory, VendorFactory
+from .models import DailyOrderRollup, HourlyOrderRollup
+from .rollups import STATS_KEY_PREFIX, history, rebuild, reconcile, record_placed_order
+
+
+def rollups():
+    return (sorted(DailyOrderRollup.objects.values_list('day', 'placed', 'revenue', 'pick_ups', 'drop_offs')),
+            sorted(HourlyOrderRollup.objects.values_list('hour', 'placed', 'revenue', 'pick_ups', 'drop_offs')))
+
+
+def place_order(placed_time, total, pick_up_time):
+    order = OrderFactory(placed=True, placed_time=placed_time, total_price_of_order=total,
+                         pick_up_time=pick_up_time)
+    record_placed_order(order)
+    return order
+
+
+class Rollups(TestCase):
+    def setUp(self):
+        self.placed_time = datetime(2016, 1, 5, 9, 30, tzinfo=pytz.utc)
+        self.pick_up_time = datetime(2016, 1, 6, 18, 0, tzinfo=pytz.utc)
+
+    def test_placed_orders_counted(self):
+        place_order(self.placed_time, Decimal('10.50'), self.pick_up_time)
+        place_order(self.placed_time + timedelta(minutes=10), Decimal('4.00'), self.pick_up_time)
+
+        self.assertEqual(DailyOrderRollup.objects.values_list('day', 'placed', 'revenue', 'pick_ups',
+                                                              'drop_offs').get(day=date(2016, 1, 5)),
+                         (date(2016, 1, 5), 2, Decimal('14.50'), 0, 0))
+        self.assertEqual(HourlyOrderRollup.objects.get(hour=self.pick_up_time).pick_ups, 2)
+        self.assertEqual(DailyOrderRollup.objects.get(day=date(2016, 1, 8)).drop_offs, 2)
+
+        counted = rollups()
+        rebuild(*history())
+        self.assertEqual(rollups(), counted)
+
+    def test_reconcile_moves_rescheduled_pick_up(self):
+        order = place_order(self.placed_time, Decimal('10.50'), self.pick_up_time)
+        # Not yet placed orders aren't counted
+        OrderFactory(pick_up_time=self.pick_up_time)
+
+        order.pick_up_time += timedelta(days=1)
+        order.save()
+        reconcile(now=self.placed_time)
+
+        self.assertFalse(DailyOrderRollup.objects.filter(day=date(2016, 1, 6)).exists())
+        self.assertEqual(DailyOrderRollup.objects.get(day=date(2016, 1, 7)).pick_ups, 1)
+        self.assertFalse(HourlyOrderRollup.objects.filter(hour=self.pick_up_time).exists())
+
+
+class Views(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('customer_stats.rollups.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.client = Client()
+        self.user = UserFactory()
+        self.vendor = VendorFactory(staff=[self.user])
+        self.assertTrue(self.client.login(username=self.user.username, password=UserFactory.password))
+
+        place_order(datetime(2016, 1, 5, 9, 30, tzinfo=pytz.utc), Decimal('10.50'),
+                    datetime(2016, 1, 6, 18, 0, tzinfo=pytz.utc))
+
+    def get(self, name, **params):
+        with self.settings(VENDOR_WISHI_WASHI_PK=self.vendor.pk):
+            return self.client.get(reverse('customer_stats:{}'.format(name)), params)
+
+    def test_read_from_rollups(self):
+        lines = self.get('placed_time_monthly', month='01', year='2016').content.decode('utf-8').splitlines()
+        self.assertIn('Tue 05\t1', lines)
+        self.assertIn('Wed 06\t0', lines)
+
+        self.assertIn('Jan 16\t1', self.get('placed_time_yearly', year='2016').content.decode('utf-8'))
+
+        response = self.get('amount_time_monthly', month='01', year='2016')
+        self.assertIn('Tue 05,10.50', response.content.decode('utf-8').splitlines())
+        self.assertEqual(response['Content-Disposition'],
+                         'attachment; filename="Total Amount Jan 2016-Jan 2016.csv"')
+
+        lines = self.get('pickup_delivery_time_monthly', month='01', year='2016').content.decode('utf-8')
+        self.assertIn('Wed 06\t1\t0', lines.splitlines())
+        self.assertIn('Fri 08\t0\t1', lines.splitlines())
+
+        # Wednesday 18:00
+        lines = self.get('pickup_delivery_heatmap_monthly', month='01', year='2016',
+                         pickups=1).content.decode('utf-8').splitlines()
+        self.assertIn('3\t18\t1', lines)
+        self.assertEqual(sum(int(line.split('\t')[2]) for line in lines[1:]), 1)
+
+    def test_closed_months_cached(self):
+        response = self.get('amount_time_monthly', month='01', year='2016')
+        self.assertEqual(len(self.redis.data), 1)
+        self.assertTrue(list(self.redis.data)[0].startswith(STATS_KEY_PREFIX + 'amount_time_monthly:'))
+
+        with mock.patch('customer_stats.views.daily_rollups', side_effect=AssertionError):
+            cached = self.get('amount_time_monthly', month='01', year='2016')
+        self.assertEqual(cached.content, response.content)
+        self.assertEqual(cached['Content-Type'], response['Content-Type'])
+        self.assertEqual(cached['Content-Disposition'], response['Content-Disposition'])
+
+    def test_open_months_not_cached(self):
+        today = date.today()
+        self.get('placed_time_monthly', month=today.month, year=today.year)
+        self.get('placed_time_yearly', year=today.year)
+        self.assertEqual(self.redis.data, {})
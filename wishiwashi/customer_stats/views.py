@@ -1,21 +1,22 @@
 import csv
 from calendar import monthrange
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from functools import wraps
 
 import pytz
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import User
 from django.http import HttpResponse
-from django.db.models import Count, Sum
 from django.shortcuts import render
 from django.views.decorators.http import require_http_methods
 from django.utils.timezone import get_current_timezone
 from django.utils import timezone
+from django.utils.http import urlencode
 
-from bookings.models import Order
 from vendors.decorators import vendor_required, wishi_washi_vendor_view
+from .cohorts import new_customers_by_day
+from .rollups import cached_stats, daily_rollups, day_of, hourly_rollups
 
 localtimezone = pytz.timezone(settings.TIME_ZONE)
 
@@ -50,6 +51,45 @@ def datehourrange(start_date, end_date):
                    timedelta(days=n)).astimezone(localtimezone)
 
 
+def last_day_of_month(request):
+    month, year = int(request.GET.get("month")), int(request.GET.get("year"))
+    return date(year, month, monthrange(year, month)[1])
+
+
+def last_day_of_year(request):
+    return date(int(request.GET.get("year")), 12, 31)
+
+
+def cache_closed_periods(last_day):
+    """
+    Keep responses for periods which won't change again, see
+    customer_stats.rollups.cached_stats
+
+    :param last_day: callable returning the last day a request covers
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request):
+            def build():
+                response = view(request)
+                return {
+                    'content': response.content.decode(response.charset),
+                    'content_type': response['Content-Type'],
+                    'headers': {name: response[name] for name in ('Content-Disposition',)
+                                if response.has_header(name)},
+                }
+
+            key = '{}:{}'.format(view.__name__, urlencode(sorted(request.GET.items())))
+            stats = cached_stats(key, last_day(request), build)
+
+            response = HttpResponse(stats['content'], content_type=stats['content_type'])
+            for name, value in stats['headers'].items():
+                response[name] = value
+            return response
+        return wrapper
+    return decorator
+
+
 @require_http_methods(["GET"])
 @login_required()
 @vendor_required()
@@ -62,21 +102,15 @@ def stats(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_month)
 def placed_time_monthly(request):
     month, year = int(request.GET.get("month")), int(request.GET.get("year"))
     start, end = monthly_range(month, year)
 
-    query = Order.objects.filter(placed=True,
-                                 placed_time__gte=start,
-                                 placed_time__lte=end
-                                ).extra(
-                                     {'placed_time_dt':"date(placed_time)"}
-                                          ).values('placed_time_dt').annotate(
-                                              count=Count('id')).order_by('placed_time_dt')
-
     orders = {}
-    for result in query:
-        orders[result['placed_time_dt']] = result['count']
+    for day, rollup in daily_rollups(day_of(start), day_of(end)).items():
+        if rollup.placed:
+            orders[day] = rollup.placed
 
     resp = "day\tfrequency\n"
     for day in daterange(start, end):
@@ -92,26 +126,21 @@ def placed_time_monthly(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_year)
 def placed_time_yearly(request):
     year = int(request.GET.get("year"))
     start = datetime(year, 1, 1, tzinfo=get_current_timezone())
     end = datetime(year, 12, 31, 23, 59, 59, tzinfo=get_current_timezone())
 
-    query = Order.objects.filter(placed=True,
-                                 placed_time__gte=start,
-                                 placed_time__lte=end
-                                ).extra(
-                                     {'placed_time_dt':"date(placed_time)"}
-                                          ).values('placed_time_dt').annotate(
-                                              count=Count('id')).order_by('placed_time_dt')
-
     orders = {}
-    for result in query:
-        month_year = result['placed_time_dt'].strftime("%b %y")
+    for day, rollup in daily_rollups(date(year, 1, 1), date(year, 12, 31)).items():
+        if not rollup.placed:
+            continue
+        month_year = day.strftime("%b %y")
         if month_year in orders:
-            orders[month_year] += result['count']
+            orders[month_year] += rollup.placed
         else:
-            orders[month_year] = result['count']
+            orders[month_year] = rollup.placed
 
     month_year = ''
     resp = "month\tfrequency\n"
@@ -130,20 +159,14 @@ def placed_time_yearly(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_month)
 def amount_time_monthly(request):
     month, year = int(request.GET.get("month")), int(request.GET.get("year"))
     start, end = monthly_range(month, year)
-    query = Order.objects.filter(placed=True,
-                                 placed_time__gte=start,
-                                 placed_time__lte=end
-                                ).extra(
-                                     {'placed_time_dt':"date(placed_time)"}
-                                          ).values('placed_time_dt').annotate(
-                                              total=Sum('total_price_of_order')).order_by('placed_time_dt')
-
     orders = {}
-    for result in query:
-        orders[result['placed_time_dt']] = result['total']
+    for day, rollup in daily_rollups(day_of(start), day_of(end)).items():
+        if rollup.placed:
+            orders[day] = rollup.revenue
 
     filename = "Total Amount {:%b %Y}-{:%b %Y}.csv".format(start, end)
     response = HttpResponse(content_type="text/csv")
@@ -159,26 +182,21 @@ def amount_time_monthly(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_year)
 def amount_time_yearly(request):
     year = int(request.GET.get("year"))
     start = datetime(year, 1, 1, tzinfo=get_current_timezone())
     end = datetime(year, 12, 31, 23, 59, 59, tzinfo=get_current_timezone())
 
-    query = Order.objects.filter(placed=True,
-                                 placed_time__gte=start,
-                                 placed_time__lte=end
-                                ).extra(
-                                     {'placed_time_dt':"date(placed_time)"}
-                                          ).values('placed_time_dt').annotate(
-                                              total=Sum('total_price_of_order')).order_by('placed_time_dt')
-
     orders = {}
-    for result in query:
-        month_year = result['placed_time_dt'].strftime("%b %y")
+    for day, rollup in daily_rollups(date(year, 1, 1), date(year, 12, 31)).items():
+        if not rollup.placed:
+            continue
+        month_year = day.strftime("%b %y")
         if month_year in orders:
-            orders[month_year] += result['total']
+            orders[month_year] += rollup.revenue
         else:
-            orders[month_year] = result['total']
+            orders[month_year] = rollup.revenue
 
     filename = "Total Amount {:%b %Y}-{:%b %Y}.csv".format(start, end)
     response = HttpResponse(content_type="text/csv")
@@ -202,31 +220,7 @@ def new_customers_monthly(request):
     month, year = int(request.GET.get("month")), int(request.GET.get("year"))
     start, end = monthly_range(month, year)
 
-    previous_customers = list(u.id for u in User.objects.filter(
-        order__placed=True,
-        order__placed_time__lt=start).distinct()
-    )
-    query = User.objects.prefetch_related('order_set').filter(order__placed=True,
-                                                              order__placed_time__gte=start,
-                                                              order__placed_time__lte=end).exclude(
-                                                                  pk__in=previous_customers
-                                                              ).order_by('-order__placed_time')
-
-    users = []
-    orders = {}
-    for user in query:
-        if user.id not in users:
-            try:
-                day = user.order_set.all()[0].placed_time.date()
-            # not all initial orders have a placed date
-            # using order creation date as a fall back
-            except AttributeError:
-                day = user.order_set.all()[0].created.date()
-            if day not in orders:
-                orders[day] = 1
-            else:
-                orders[day] += 1
-            users.append(user.id)
+    orders = new_customers_by_day(start, end)
 
     resp = "day\tfrequency\n"
     for day in daterange(start, end):
@@ -246,30 +240,13 @@ def new_customers_yearly(request):
     start = datetime(year, 1, 1, tzinfo=get_current_timezone())
     end = datetime(year, 12, 31, 23, 59, 59, tzinfo=get_current_timezone())
 
-    previous_customers = list(u.id for u in User.objects.filter(
-        order__placed=True,
-        order__placed_time__lt=start).distinct()
-    )
-    query = User.objects.prefetch_related('order_set').filter(order__placed=True,
-                                                              order__placed_time__gte=start,
-                                                              order__placed_time__lte=end).exclude(
-                                                                  pk__in=previous_customers
-                                                              ).order_by('-order__placed_time')
-    users = []
     orders = {}
-    for user in query:
-        if user.id not in users:
-            try:
-                month_year = user.order_set.all()[0].placed_time.date().strftime("%b %y")
-            # not all initial orders have a placed date
-            # using order creation date as a fall back
-            except AttributeError:
-                month_year = user.order_set.all()[0].created.date().strftime("%b %y")
-            if month_year not in orders:
-                orders[month_year] = 1
-            else:
-                orders[month_year] += 1
-            users.append(user.id)
+    for day, customers in new_customers_by_day(start, end).items():
+        month_year = day.strftime("%b %y")
+        if month_year not in orders:
+            orders[month_year] = customers
+        else:
+            orders[month_year] += customers
 
     month_year = ''
     resp = "month\tfrequency\n"
@@ -287,32 +264,18 @@ def new_customers_yearly(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_month)
 def pickup_delivery_time_monthly(request):
     month, year = int(request.GET.get("month")), int(request.GET.get("year"))
     start, end = monthly_range(month, year)
 
-    pickup_query = Order.objects.filter(placed=True,
-                                 pick_up_time__gte=start,
-                                 pick_up_time__lte=end
-                                ).extra(
-                                     {'pick_up_time_dt':"date(pick_up_time)"}
-                                          ).values('pick_up_time_dt').annotate(
-                                              count=Count('id')).order_by('pick_up_time_dt')
-
-    delivery_query = Order.objects.filter(placed=True,
-                                 drop_off_time__gte=start,
-                                 drop_off_time__lte=end
-                                ).extra(
-                                     {'delivery_time_dt':"date(drop_off_time)"}
-                                          ).values('delivery_time_dt').annotate(
-                                              count=Count('id')).order_by('delivery_time_dt')
-    pickups= {}
-    for result in pickup_query:
-        pickups[result['pick_up_time_dt']] = result['count']
-
+    pickups = {}
     deliveries = {}
-    for result in delivery_query:
-        deliveries[result['delivery_time_dt']] = result['count']
+    for day, rollup in daily_rollups(day_of(start), day_of(end)).items():
+        if rollup.pick_ups:
+            pickups[day] = rollup.pick_ups
+        if rollup.drop_offs:
+            deliveries[day] = rollup.drop_offs
 
     resp = "day\tCollections\tDeliveries\n"
     for day in daterange(start, end):
@@ -329,36 +292,19 @@ def pickup_delivery_time_monthly(request):
 @login_required()
 @vendor_required()
 @wishi_washi_vendor_view()
+@cache_closed_periods(last_day_of_month)
 def pickup_delivery_heatmap_monthly(request):
     month, year = int(request.GET.get("month")), int(request.GET.get("year"))
     show_pickups, show_deliveries = bool(request.GET.get("pickups")), bool(request.GET.get("deliveries"))
     start, end = monthly_range(month, year)
 
     pickups = {}
-    if show_pickups:
-        pickup_query = Order.objects.filter(placed=True,
-                                            pick_up_time__gte=start,
-                                            pick_up_time__lte=end
-                                           ).extra(
-                                               {'pick_up_time_day_hour': "date_trunc('hour', pick_up_time)"}
-                                              ).values('pick_up_time_day_hour').annotate(
-                                                  count=Count('id')).order_by('pick_up_time_day_hour')
-
-        for result in pickup_query:
-            pickups[result['pick_up_time_day_hour'].astimezone(localtimezone)] = result['count']
-
     deliveries = {}
-    if show_deliveries:
-        delivery_query = Order.objects.filter(placed=True,
-                                              drop_off_time__gte=start,
-                                              drop_off_time__lte=end
-                                           ).extra(
-                                                {'delivery_time_day_hour': "date_trunc('hour', drop_off_time)"}
-                                              ).values('delivery_time_day_hour').annotate(
-                                                          count=Count('id')).order_by('delivery_time_day_hour')
-
-        for result in delivery_query:
-            deliveries[result['delivery_time_day_hour'].astimezone(localtimezone)] = result['count']
+    for hour, rollup in hourly_rollups(start, end).items():
+        if show_pickups and rollup.pick_ups:
+            pickups[hour.astimezone(localtimezone)] = rollup.pick_ups
+        if show_deliveries and rollup.drop_offs:
+            deliveries[hour.astimezone(localtimezone)] = rollup.drop_offs
 
     # Initiate data structure dow->hour of day
     combined_daily = {day: dict.fromkeys(range(1, 25), 0) for day in range(1, 8)}
@@ -1,6 +1,7 @@
 from datetime import timedelta
 
 from base.celery import app
+from base.services import send_email
 from celery.decorators import periodic_task
 from celery.task.schedules import crontab
 from celery.utils.log import get_task_logger
@@ -9,10 +10,7 @@ from django.conf import settings
 from django.template.loader import render_to_string
 from django.utils import timezone
 from django.utils.timezone import localtime as django_localtime
-from requests.auth import HTTPBasicAuth
-import requests
 import stripe
-import ujson as json
 
 from bookings.calendar import get_icalendar_str
 from bookings.models import Order
@@ -100,9 +98,6 @@ def capture_charge(*args, **kwargs):
           max_retries=20,
           time_limit=160)
 def order_confirmation_for_customer_via_email(self, order_pk):
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
-
     order = Order.objects.get(pk=order_pk)
 
     charge_time = django_localtime(parse('%s 22:00:00+00:00' % order.pick_up_time.strftime('%Y-%m-%d')))
@@ -132,14 +127,7 @@ def order_confirmation_for_customer_via_email(self, order_pk):
     }
 
     try:
-        url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-        resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-        assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-        resp = json.loads(resp.content)
-
-        assert resp['error'] is False, resp
-        assert int(resp['job_id']) > 0, resp
+        send_email(payload)
     except Exception as exc:
         msg = 'Exception while sending order confirmation email. Retrying...'
         logger.exception(msg)
@@ -152,9 +140,6 @@ def order_confirmation_for_customer_via_email(self, order_pk):
           max_retries=20,
           time_limit=160) # seconds
 def order_charged_confirmation_for_customer_via_email(self, order_pk):
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
-
     order = Order.objects.get(pk=order_pk)
 
     subject = render_to_string('payments/emails/confirmation-charge-subject.txt', {'uuid': order.uuid})
@@ -175,14 +160,7 @@ def order_charged_confirmation_for_customer_via_email(self, order_pk):
     }
 
     try:
-        url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-        resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-        assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-        resp = json.loads(resp.content)
-
-        assert resp['error'] is False, resp
-        assert int(resp['job_id']) > 0, resp
+        send_email(payload)
     except Exception as exc:
         msg = 'Exception while sending order confirmation email. Retrying...'
         logger.exception(msg)
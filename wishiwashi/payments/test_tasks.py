@@ -263,7 +263,7 @@ class Tasks(TestCase):
         self.assertEqual(Stripe.objects.get(order=orders[1]).card_charged_status,
                          Stripe.SUCCESSFULLY_CHARGED)
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_confirmation_email_response(self, mock_response):
         class response(object):
             status_code = 200
@@ -275,7 +275,7 @@ class Tasks(TestCase):
             self.assertTrue(order_confirmation_for_customer_via_email(
                 order.pk))
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_confirmation_email_response_error(self, mock_response):
         class response(object):
             status_code = 200
@@ -287,7 +287,7 @@ class Tasks(TestCase):
                           order_confirmation_for_customer_via_email,
                           order.pk)
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_confirmation_email_status_error(self, mock_response):
         class response(object):
             status_code = 500
@@ -299,7 +299,7 @@ class Tasks(TestCase):
                           order_confirmation_for_customer_via_email,
                           order.pk)
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_charged_confirmation_email_response(self, mock_response):
         class response(object):
             status_code = 200
@@ -310,7 +310,7 @@ class Tasks(TestCase):
         self.assertTrue(order_charged_confirmation_for_customer_via_email(
             order.pk))
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_charged_confirmation_email_response_error(self, mock_response):
         class response(object):
             status_code = 200
@@ -322,7 +322,7 @@ class Tasks(TestCase):
                           order_charged_confirmation_for_customer_via_email,
                           order.pk)
 
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_charged_confirmation_email_status_error(self, mock_response):
         class response(object):
             status_code = 500
@@ -897,6 +897,65 @@ class Views(TestCase):
             self.assertEqual(TrackConfirmedOrderSlots.objects.get(
                 appointment=drop_off_time).counter, 1)
 
+    @freeze_time("2015-01-05 10:00:00")
+    @patch('vendors.tasks.notify_vendors_of_orders_via_email.delay',
+           fake_delay)
+    def test_charge_submitted_twice_authorised_once(self):
+        user = UserFactory()
+        address = AddressFactory()
+        item = ItemFactory(price=Decimal('21.50'))
+        pick_up_time = datetime.datetime(2015, 1, 6, 10, tzinfo=pytz.utc)
+        drop_off_time = datetime.datetime(2015, 1, 8, 14, tzinfo=pytz.utc)
+        order = OrderFactory(pick_up_and_delivery_address=address,
+                             customer=user,
+                             pick_up_time=pick_up_time,
+                             drop_off_time=drop_off_time,
+                             items=[ItemAndQuantityFactory(quantity=2, item=item)],
+                             total_price_of_order=Decimal('43.0'))
+
+        def charge_request():
+            payload = {'stripeToken': 'tok_15KXZwDnM72emLEehazo0MK8'}
+            request = RequestFactory().post(reverse('payments:charge'), payload)
+            request.user = user
+            add_session_to_request(request, session_data={
+                'postcode': 'sw11 5tg',
+                'out_code': 'sw11',
+                'pick_up_time': '2015-01-06 10',
+                'delivery_time': '2015-01-08 14',
+                'items': {unicode(str(item.pk)): 2},
+                'address': address.pk,
+                'order': order.pk
+            })
+            MessageMiddleware().process_request(request)
+            return request
+
+        with patch('stripe.Charge.create') as mock_charge:
+            class source(object):
+                id = "card_15QdebDnM72emLEeTUvNnrpj"
+                cvc_check = "pass"
+                address_zip_check = "pass"
+
+            class stripe_charge(object):
+                id = "card_15KZlRDnM72emLEebQjP4ZYx"
+                created = str(int(time.time()))
+
+            test_charge = stripe_charge()
+            test_charge.source = source()
+            mock_charge.return_value = test_charge
+
+            first, second = charge_request(), charge_request()
+            self.assertEqual(charge(first).url, reverse("bookings:order_placed"))
+
+            response = charge(second)
+            self.assertEqual(response.status_code, 302)
+            self.assertEqual(response.url, reverse("payments:landing"))
+
+        self.assertEqual(mock_charge.call_count, 1)
+        self.assertEqual(TrackConfirmedOrderSlots.objects.get(
+            appointment=pick_up_time).counter, 1)
+        self.assertEqual(TrackConfirmedOrderSlots.objects.get(
+            appointment=drop_off_time).counter, 1)
+
     @freeze_time("2015-01-05 10:00:00")
     @patch('vendors.tasks.notify_vendors_of_orders_via_email.delay',
            fake_delay)
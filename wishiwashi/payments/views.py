@@ -5,7 +5,7 @@ from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.core.urlresolvers import reverse
-from django.db.models import F
+from django.db import transaction
 from django.http import HttpResponseRedirect
 from django.shortcuts import redirect, render_to_response
 from django.template import RequestContext
@@ -13,13 +13,18 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 import stripe
 
+from bookings.appointments import (SlotUnavailable, hold_appointment_slots,
+                                   release_appointment_slots)
 from bookings.decorators import check_session_data
 from bookings.prices import total_price
-from bookings.models import Order, Voucher, TrackConfirmedOrderSlots
+from bookings.models import Order, Voucher
 from bookings.progress import get_progress_svg
 from bookings.tickets import next_ticket_id
+from customer_stats.cohorts import record_first_order
+from customer_stats.rollups import record_placed_order
 from payments.forms import StripePaymentForm, VoucherDiscountForm
 from payments.tasks import order_confirmation_for_customer_via_email
+from vendors.live_orders import publish_new_order
 from vendors.tasks import notify_vendors_of_orders_via_email
 from .utils import authorize_charge, timestamp_to_datetime_str, vat_cost
 from .models import Stripe
@@ -59,6 +64,31 @@ def landing(request):
                               context_instance=RequestContext(request))
 
 
+def slot_unavailable(request, order, slot):
+    """
+    The pick up or drop off slot filled up during checkout
+    """
+    if slot == 'pick_up_time':
+        order.pick_up_time = None
+        order.drop_off_time = None
+        order.save()
+
+        for key in ('pick_up_time', 'delivery_time'):
+            request.session.pop(key, None)
+
+        messages.error(request, "Pick up time is now unavailable. Please select another pick up time.")
+        return redirect(reverse('bookings:pick_up_time'))
+
+    order.drop_off_time = None
+    order.save()
+    request.session.pop('delivery_time', None)
+
+    messages.error(request, "Delivery time is now unavailable. Please select another delivery time.")
+    return redirect(reverse('bookings:delivery_time'))
+
+
+# Slot holds must be visible to other checkouts while payment is authorised
+@transaction.non_atomic_requests
 @require_http_methods(["POST"])
 @login_required()
 @check_session_data(check_postcode=True, check_pick_up_time=True, check_delivery_time=True, check_items=True,
@@ -68,6 +98,17 @@ def charge(request):
 
     if form.is_valid():
         order = Order.objects.get(pk=int(request.session['order']))
+
+        try:
+            held = hold_appointment_slots(order)
+        except SlotUnavailable as e:
+            return slot_unavailable(request, order, e.slot)
+
+        if not held:
+            # Submitted twice, the first submission is taking the payment
+            messages.error(request, "Your payment is already being processed.")
+            return redirect(reverse('payments:landing'))
+
         order.authorisation_status = Order.AUTHORISING
         # Calculate VAT costs
         vat = vat_cost(order.total_price_of_order)
@@ -94,6 +135,7 @@ def charge(request):
             stripe_charge.description = msg
             stripe_charge.authorisation_status = Stripe.FAILED_TO_AUTHORISE
             stripe_charge.save()
+            release_appointment_slots(order)
             order.authorisation_status = Order.FAILED_TO_AUTHORISE
             order.save()
             return redirect(reverse('payments:landing'))
@@ -105,6 +147,7 @@ def charge(request):
             stripe_charge.description = msg
             stripe_charge.authorisation_status = Stripe.FAILED_TO_AUTHORISE
             stripe_charge.save()
+            release_appointment_slots(order)
             order.authorisation_status = Order.FAILED_TO_AUTHORISE
             order.save()
             return redirect(reverse('payments:landing'))
@@ -115,6 +158,7 @@ def charge(request):
             stripe_charge.description = "Unexpected exception: {}".format(sys.exc_info()[0])
             stripe_charge.authorisation_status = Stripe.FAILED_TO_AUTHORISE
             stripe_charge.save()
+            release_appointment_slots(order)
             order.authorisation_status = Order.FAILED_TO_AUTHORISE
             order.save()
             return redirect(reverse('payments:landing'))
@@ -135,21 +179,24 @@ def charge(request):
         stripe_charge.ipaddress = request.META['REMOTE_ADDR']
         stripe_charge.save()
 
-        order.placed = True
-        order.placed_time = charge_time
-        order.authorisation_status = Order.SUCCESSFULLY_AUTHORISED
-        order.ipaddress = request.META['REMOTE_ADDR']
-        order.ticket_id = next_ticket_id(order.pk)
-        order.save()
+        with transaction.atomic():
+            order.placed = True
+            order.placed_time = charge_time
+            order.authorisation_status = Order.SUCCESSFULLY_AUTHORISED
+            order.ipaddress = request.META['REMOTE_ADDR']
+            order.ticket_id = next_ticket_id(order.pk)
+            # Held slots now belong to the placed order
+            order.slots_held_time = None
+            order.save()
+            record_placed_order(order)
+            record_first_order(order)
 
-        if order.voucher:
-            order.voucher.use_count += 1
-            order.voucher.save()
+            if order.voucher:
+                order.voucher.use_count += 1
+                order.voucher.save()
 
-        for slot in ('pick_up_time', 'drop_off_time'):
-            slot, created = TrackConfirmedOrderSlots.objects.get_or_create(appointment=getattr(order, slot))
-            slot.counter = F('counter') + 1
-            slot.save()
+        # Committed, open vendor dashboards can pick it up
+        publish_new_order(order)
 
         request.session['stripe_charge_id'] = charge.id
         request.session['stripe_created'] = timestamp_to_datetime_str(int(charge.created))
@@ -1,4 +1,5 @@
 from base.celery import app
+from base.services import send_email
 from celery.utils.log import get_task_logger
 from django.conf import settings
 from django.contrib.auth.models import User
@@ -6,9 +7,6 @@ from django.contrib.auth.tokens import default_token_generator as token_generato
 from django.template.loader import render_to_string
 from django.utils.encoding import force_bytes
 from django.utils.http import urlsafe_base64_encode
-from requests.auth import HTTPBasicAuth
-import requests
-import ujson as json
 
 
 logger = get_task_logger(__name__)
@@ -19,9 +17,6 @@ logger = get_task_logger(__name__)
           max_retries=20,
           time_limit=160)
 def reset_password_via_email(self, user_pk):
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
-
     user = User.objects.get(pk=user_pk)
 
     context = {
@@ -53,14 +48,7 @@ def reset_password_via_email(self, user_pk):
     }
 
     try:
-        url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-        resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-        assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-        resp = json.loads(resp.content)
-
-        assert resp['error'] is False, resp
-        assert int(resp['job_id']) > 0, resp
+        send_email(payload)
     except Exception as exc:
         msg = 'Exception while sending reset password via email. Retrying...'
         logger.exception(msg)
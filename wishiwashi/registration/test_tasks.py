@@ -15,7 +15,7 @@ def delay(user_id):
 )
 @mock.patch('registration.tasks.reset_password_via_email.delay', delay)
 class Tasks(TestCase):
-    @mock.patch('requests.post')
+    @mock.patch('requests.Session.post')
     def test_order_confirmation_email_response(self, mock_response):
         class response(object):
             status_code = 200
@@ -0,0 +1,87 @@
+"""
+Which vendor an order belongs to
+
+Every change is a single conditional UPDATE, the database decides which of
+several vendors claiming an order at the same time gets it: only the first
+UPDATE to commit still finds assigned_to_vendor IS NULL, the others change
+no rows.
+"""
+from django.db.models import Q
+from django.utils import timezone
+
+from bookings.models import Order
+
+
+def claim_order(order_pk, vendor):
+    """
+    :param int order_pk: an authorised order
+    :param Vendor vendor: claiming it
+
+    :return: bool, True if vendor claimed the order, False if it was
+             already taken (by anyone) or isn't authorised
+    """
+    now = timezone.now()
+    return Order.objects.filter(
+        pk=order_pk,
+        authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+        assigned_to_vendor__isnull=True).update(
+            assigned_to_vendor=vendor,
+            order_status=Order.CLAIMED_BY_VENDOR,
+            order_claimed_time=now,
+            modified=now) == 1
+
+
+def throw_back_orders(order_pks, vendor, pick_up_after):
+    """
+    Give the vendor's claimed orders back to the pool
+
+    :param list order_pks: orders to give back
+    :param Vendor vendor: only their orders are given back
+    :param datetime pick_up_after: only orders picked up after this are given back
+
+    :return: list of primary keys of the orders given back
+    """
+    now = timezone.now()
+    thrown_back = Order.objects.filter(
+        pk__in=order_pks,
+        assigned_to_vendor=vendor,
+        order_status=Order.CLAIMED_BY_VENDOR,
+        pick_up_time__gte=pick_up_after).update(
+            assigned_to_vendor=None,
+            order_status=Order.UNCLAMIED_BY_VENDORS,
+            order_claimed_time=None,
+            thrown_back_time=now,
+            modified=now)
+
+    if not thrown_back:
+        return []
+
+    # Marked with this call's thrown_back_time
+    return list(Order.objects.filter(pk__in=order_pks, thrown_back_time=now,
+                                     assigned_to_vendor__isnull=True).values_list('pk', flat=True))
+
+
+def assign_unclaimed_orders(vendor_pk, unclaimed_since):
+    """
+    Give the orders no vendor has claimed to a vendor
+
+    :param int vendor_pk: vendor taking the orders
+    :param datetime unclaimed_since: orders placed or thrown back after
+                                     this are left for other vendors
+
+    :return: int, number of orders assigned
+    """
+    now = timezone.now()
+    return Order.objects.filter(
+        Q(thrown_back_time__isnull=True) | Q(thrown_back_time__lt=unclaimed_since),
+        order_status=Order.UNCLAMIED_BY_VENDORS,
+        authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+        charge_back_status=Order.NOT_CHARGED_BACK,
+        refund_status=Order.NOT_REFUNDED,
+        placed=True,
+        placed_time__lte=unclaimed_since,
+        assigned_to_vendor__isnull=True).update(
+            assigned_to_vendor=vendor_pk,
+            order_status=Order.CLAIMED_BY_VENDOR,
+            order_claimed_time=now,
+            modified=now)
@@ -2,7 +2,7 @@ from django.http import HttpResponseForbidden
 from django.conf import settings
 from django.utils.functional import wraps
 
-from bookings.models import Vendor
+from .membership import get_vendor
 
 
 def vendor_required():
@@ -12,10 +12,10 @@ def vendor_required():
     """
     def decorator(func):
         def inner_decorator(request, *args, **kwargs):
-            try:
-                request.user.vendor = Vendor.objects.filter(staff=request.user)[0]
-            except IndexError:
+            vendor = get_vendor(request.user)
+            if vendor is None:
                 return HttpResponseForbidden("You must be a vendor to view this page")
+            request.user.vendor = vendor
 
             return func(request, *args, **kwargs)
         return wraps(func)(inner_decorator)
@@ -0,0 +1,102 @@
+"""
+Record when vendors look at their orders page
+
+Every page load and poll of a vendor's dashboard is a heartbeat. With
+VENDOR_HEARTBEAT_ON they're kept in a Redis sorted set (vendor pk scored by
+the time it was last seen) and the flush_vendor_heartbeats task copies them
+to Vendor.last_viewed_the_orders_page in a single UPDATE. Otherwise, or when
+Redis can't be reached, the Vendor row is written directly at most once a
+VENDOR_LAST_VIEWED_SECONDS.
+"""
+from datetime import datetime, timedelta
+import logging
+
+from django.conf import settings
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+import pytz
+import redis
+
+from base.redis_client import get_redis
+from bookings.models import Vendor
+
+
+logger = logging.getLogger(__name__)
+
+HEARTBEATS_KEY = 'vendors:heartbeats'
+# Score of the newest heartbeat written to the database
+FLUSHED_KEY = 'vendors:heartbeats:flushed'
+
+# Heartbeats older than this are dropped from Redis once flushed
+HEARTBEAT_RETENTION_SECONDS = 60 * 60 * 24
+
+EPOCH = datetime(1970, 1, 1, tzinfo=pytz.utc)
+
+
+def _as_score(when):
+    return (when - EPOCH).total_seconds()
+
+
+def _as_datetime(score):
+    return EPOCH + timedelta(seconds=score)
+
+
+def touch_last_viewed(vendor):
+    """
+    :param vendor: Vendor object
+
+    Record the vendor is looking at the orders page. Written at most once a
+    VENDOR_LAST_VIEWED_SECONDS, concurrent requests only update it once.
+    """
+    now = timezone.now()
+    recently = now - timedelta(seconds=settings.VENDOR_LAST_VIEWED_SECONDS)
+
+    if vendor.last_viewed_the_orders_page and vendor.last_viewed_the_orders_page > recently:
+        return
+
+    Vendor.objects.filter(pk=vendor.pk).exclude(
+        last_viewed_the_orders_page__gt=recently).update(last_viewed_the_orders_page=now)
+    vendor.last_viewed_the_orders_page = now
+
+
+def heartbeat(vendor):
+    """
+    :param vendor: Vendor object looking at the orders page
+    """
+    if settings.VENDOR_HEARTBEAT_ON:
+        try:
+            get_redis().zadd(HEARTBEATS_KEY, _as_score(timezone.now()), vendor.pk)
+            return
+        except redis.RedisError:
+            logger.exception('Could not record heartbeat for vendor %s', vendor.pk)
+
+    touch_last_viewed(vendor)
+
+
+def flush_heartbeats():
+    """
+    :return: int, number of vendors updated
+
+    Writes heartbeats received since the last flush to the database
+    """
+    client = get_redis()
+    flushed = client.get(FLUSHED_KEY)
+    since = '(%r' % float(flushed) if flushed is not None else '-inf'
+    heartbeats = client.zrangebyscore(HEARTBEATS_KEY, since, '+inf', withscores=True)
+
+    if heartbeats:
+        last_viewed = dict((int(pk), _as_datetime(score)) for pk, score in heartbeats)
+
+        Vendor.objects.filter(pk__in=last_viewed.keys()).update(
+            last_viewed_the_orders_page=Case(
+                *[When(pk=pk, then=Value(viewed)) for pk, viewed in last_viewed.items()],
+                output_field=DateTimeField()))
+
+        newest = max(score for _pk, score in heartbeats)
+        pipe = client.pipeline()
+        pipe.set(FLUSHED_KEY, repr(newest))
+        pipe.zremrangebyscore(HEARTBEATS_KEY, '-inf',
+                              '(%r' % (newest - HEARTBEAT_RETENTION_SECONDS))
+        pipe.execute()
+
+    return len(heartbeats)
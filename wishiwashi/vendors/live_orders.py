@@ -0,0 +1,120 @@
+"""
+Push new orders to open vendor dashboards
+
+payments.views.charge publishes each newly authorised order once. The
+dashboard's get_latest_orders request answers straight away when Redis
+already knows of a newer order, otherwise it waits on the channel for up to
+VENDOR_ORDERS_LONG_POLL_SECONDS before answering. With waiting disabled (0)
+dashboards poll the database as they always have.
+
+Dashboards send back the latest_order_id they were last answered with, which
+includes published orders they don't show, so they don't wake straight away
+for orders they'll never be sent.
+"""
+import logging
+import time
+
+from django.conf import settings
+import redis
+
+from base.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+LATEST_ORDER_KEY = 'vendors:latest-order'
+NEW_ORDERS_CHANNEL = 'vendors:new-orders'
+
+# Keep the highest order pk published and tell anyone waiting
+PUBLISH_ORDER = """
+if tonumber(ARGV[1]) > tonumber(redis.call('GET', KEYS[1]) or '0') then
+    redis.call('SET', KEYS[1], ARGV[1])
+end
+return redis.call('PUBLISH', KEYS[2], ARGV[1])
+"""
+
+_publish_order = None
+
+
+def long_polling():
+    return settings.VENDOR_ORDERS_LONG_POLL_SECONDS > 0
+
+
+def publish_new_order(order):
+    """
+    :param order: Order object, committed and successfully authorised
+    """
+    global _publish_order
+
+    if not long_polling():
+        return
+
+    try:
+        if _publish_order is None:
+            _publish_order = get_redis().register_script(PUBLISH_ORDER)
+        _publish_order(keys=[LATEST_ORDER_KEY, NEW_ORDERS_CHANNEL], args=[order.pk])
+    except redis.RedisError:
+        # Dashboards fall back to reading the database
+        logger.exception('Could not publish order %s to vendors', order.pk)
+
+
+def _latest_order_pk(client):
+    latest = client.get(LATEST_ORDER_KEY)
+    return int(latest) if latest is not None else None
+
+
+def latest_published_order_pk():
+    """
+    :return: int, the highest order pk published or None if it isn't known
+    """
+    if not long_polling():
+        return None
+
+    try:
+        return _latest_order_pk(get_redis())
+    except redis.RedisError:
+        logger.exception('Could not read the latest order')
+        return None
+
+
+def wait_for_orders_after(order_pk):
+    """
+    :param int order_pk: latest order the dashboard is showing
+
+    :return: boolean, False if there are certainly no newer orders
+
+    Blocks for up to VENDOR_ORDERS_LONG_POLL_SECONDS
+    """
+    if not long_polling():
+        return True
+
+    try:
+        client = get_redis()
+        latest = _latest_order_pk(client)
+        if latest is None:
+            # Nothing published since Redis was emptied, can't tell
+            return True
+        if latest > order_pk:
+            return True
+
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(NEW_ORDERS_CHANNEL)
+        try:
+            # Published between reading the key, or Redis emptied, and subscribing
+            latest = _latest_order_pk(client)
+            if latest is None or latest > order_pk:
+                return True
+
+            deadline = time.time() + settings.VENDOR_ORDERS_LONG_POLL_SECONDS
+            while time.time() < deadline:
+                message = pubsub.get_message(timeout=deadline - time.time())
+                if message and int(message['data']) > order_pk:
+                    return True
+        finally:
+            pubsub.close()
+    except redis.RedisError:
+        logger.exception('Could not wait for new orders')
+        return True
+
+    return False
+
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+import requests
+
+from bookings.models import Order
+from ...orders import add_order_to_files
+from ...pdf_backends import LocalBackend, RenderError, RenderServiceBackend
+
+BACKENDS = (
+    ('render service', RenderServiceBackend),
+    ('local', LocalBackend),
+)
+
+
+class Command(BaseCommand):
+    help = ('Times rendering the same vendor PDF through the render service and with '
+            'wkhtmltopdf on this machine, several renders at once.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=10,
+                            help='Most recently placed orders in each PDF')
+        parser.add_argument('--renders', type=int, default=20)
+        parser.add_argument('--concurrency', type=int, default=4)
+
+    def handle(self, *args, **options):
+        orders = Order.objects.filter(placed=True).order_by('-placed_time')[:options['orders']]
+        files = []
+        for order in orders:
+            add_order_to_files(order, files)
+        if not files:
+            raise CommandError('No placed orders to render')
+
+        self.stdout.write('{} renders of {} orders, {} at once'.format(
+            options['renders'], len(files), options['concurrency']))
+
+        for name, backend_class in BACKENDS:
+            backend = backend_class()
+            try:
+                size = len(backend.render(files))
+            except (RenderError, requests.exceptions.RequestException) as e:
+                self.stdout.write('{}: unavailable, {}'.format(name, e))
+                continue
+
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                began = time.time()
+                list(executor.map(lambda _: backend.render(files), range(options['renders'])))
+                elapsed = time.time() - began
+
+            self.stdout.write('{}: {:.2f}s, {:.1f} renders/s, {} bytes each'.format(
+                name, elapsed, options['renders'] / elapsed, size))
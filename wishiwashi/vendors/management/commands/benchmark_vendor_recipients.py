@@ -0,0 +1,58 @@
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from bookings.models import Address, OutCodes, Vendor
+from customer_service.models import UserProfile
+from ...tasks import vendor_recipients
+
+
+class Command(BaseCommand):
+    help = ('Times vendor_recipients for every out code against vendors with many staff. '
+            'The vendors are created inside a transaction which is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vendors', type=int, default=200)
+        parser.add_argument('--staff', type=int, default=10)
+        parser.add_argument('--out-codes', type=int, default=20)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            out_codes = [OutCodes.objects.create(out_code='zz{}'.format(index))
+                         for index in range(options['out_codes'])]
+
+            User.objects.bulk_create(
+                User(username='benchmark{:06d}'.format(index),
+                     email='benchmark{:06d}@example.com'.format(index))
+                for index in range(options['vendors'] * options['staff']))
+            users = list(User.objects.filter(username__startswith='benchmark').order_by('pk'))
+
+            UserProfile.objects.bulk_create(
+                UserProfile(user=user, email_notifications_enabled=bool(index % 2))
+                for index, user in enumerate(users))
+
+            address = Address.objects.create(postcode='zz11aa')
+            for index in range(options['vendors']):
+                vendor = Vendor.objects.create(company_name='Benchmark {}'.format(index),
+                                               address=address)
+                vendor.staff.add(*users[index * options['staff']:(index + 1) * options['staff']])
+                # Each vendor serves a quarter of the out codes
+                vendor.catchment_area.add(*out_codes[index % 4::4])
+
+            self.stdout.write('{} vendors with {} staff each over {} out codes'.format(
+                options['vendors'], options['staff'], options['out_codes']))
+
+            began = time.time()
+            with CaptureQueriesContext(connection) as queries:
+                recipients = [len(vendor_recipients(out_code.out_code)) for out_code in out_codes]
+            elapsed = time.time() - began
+
+            self.stdout.write('vendor_recipients: {:.2f}ms per out code, {} queries for {} '
+                              'out codes, {} recipients each on average'.format(
+                                  elapsed * 1000 / len(out_codes), len(queries), len(out_codes),
+                                  sum(recipients) / len(recipients)))
+
+            transaction.set_rollback(True)
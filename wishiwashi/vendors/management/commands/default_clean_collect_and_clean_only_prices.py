@@ -1,9 +1,9 @@
 from decimal import Decimal
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 
 from bookings.models import Item
 from vendors.models import DefaultCleanOnlyPrices, DefaultCleanAndCollectPrices
+from vendors import price_matrix
 
 CLEAN_AND_COLLECT = Decimal('0.7')
 CLEAN_ONLY = Decimal('0.45')
@@ -14,6 +14,11 @@ class Command(BaseCommand):
     help = 'Sets/resets the default values for clean only and clean and collect prices'
 
     def handle(self, *args, **options):
+        # Current prices, not a cached copy
+        clean_and_collect_prices = price_matrix.load_matrix(price_matrix.CLEAN_AND_COLLECT,
+                                                            vendor_pks=[]).defaults
+        new_prices = []
+
         for item in Item.objects.all():
             ex_vat = (item.price / Decimal('1.2')).quantize(Decimal('0.00'))
             co_price = (ex_vat * CLEAN_ONLY).quantize(Decimal('0.00'))
@@ -33,13 +38,13 @@ class Command(BaseCommand):
 
             cc_price = (ex_vat * CLEAN_AND_COLLECT).quantize(Decimal('0.00'))
             cc_price = cc_price if cc_price > MINIMUM_PRICE else MINIMUM_PRICE
-            try:
-                clean_and_collect = DefaultCleanAndCollectPrices.objects.get(item=item)
-                clean_and_collect.price = cc_price
-            except ObjectDoesNotExist:
-                clean_and_collect = DefaultCleanAndCollectPrices(item=item, price=cc_price)
-
-            clean_and_collect.save()
+            if item.pk not in clean_and_collect_prices:
+                new_prices.append(DefaultCleanAndCollectPrices(item=item, price=cc_price))
+            elif clean_and_collect_prices[item.pk] != cc_price:
+                DefaultCleanAndCollectPrices.objects.filter(item=item).update(price=cc_price)
 
             self.stdout.write('Clean/collect price set for {} {} {}'.format(item.id, item.name, cc_price))
 
+        DefaultCleanAndCollectPrices.objects.bulk_create(new_prices)
+        # Neither update() nor bulk_create() send post_save
+        price_matrix.bump_price_matrix_version()
@@ -0,0 +1,87 @@
+import datetime
+import random
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+import pytz
+
+from bookings.models import Order, Vendor
+from ...claims import claim_order
+
+
+class Command(BaseCommand):
+    help = ('Has several vendors claim the same orders at once and checks every order is claimed exactly once. '
+            'Creates and then deletes its own orders, run against a development database (PostgreSQL).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--orders', type=int, default=200)
+        parser.add_argument('--vendors', type=int, default=8,
+                            help='Existing vendors claiming, one thread each')
+
+    def handle(self, *args, **options):
+        vendors = list(Vendor.objects.order_by('pk')[:options['vendors']])
+        if len(vendors) < 2:
+            raise CommandError('Needs at least two vendors')
+
+        pick_up_time = datetime.datetime(2099, 1, 5, 10, tzinfo=pytz.utc)
+        order_pks = []
+        try:
+            for n in range(options['orders']):
+                order_pks.append(Order.objects.create(uuid='CL%05d' % n,
+                                                      authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                                                      order_status=Order.UNCLAMIED_BY_VENDORS,
+                                                      pick_up_time=pick_up_time,
+                                                      drop_off_time=pick_up_time + datetime.timedelta(days=2)).pk)
+
+            claimed = {}
+            timings = []
+            lock = threading.Lock()
+            start = threading.Event()
+
+            def worker(vendor):
+                # Every vendor goes for every order, in their own order
+                pks = list(order_pks)
+                random.shuffle(pks)
+                start.wait()
+                try:
+                    for order_pk in pks:
+                        began = time.time()
+                        won = claim_order(order_pk, vendor)
+                        with lock:
+                            timings.append(time.time() - began)
+                            if won:
+                                claimed.setdefault(order_pk, []).append(vendor.pk)
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=worker, args=(vendor,)) for vendor in vendors]
+            for thread in threads:
+                thread.start()
+
+            began = time.time()
+            start.set()
+            for thread in threads:
+                thread.join()
+            elapsed = time.time() - began
+
+            assigned = dict(Order.objects.filter(pk__in=order_pks).values_list('pk', 'assigned_to_vendor'))
+            twice = [order_pk for order_pk, vendor_pks in claimed.items() if len(vendor_pks) > 1]
+            unclaimed = [order_pk for order_pk in order_pks if order_pk not in claimed]
+            mismatched = [order_pk for order_pk, vendor_pks in claimed.items() if assigned[order_pk] != vendor_pks[-1]]
+
+            timings.sort()
+            self.stdout.write('Claims: {} by {} vendors in {:.2f}s ({:.0f}/s)'.format(
+                len(timings), len(vendors), elapsed, len(timings) / elapsed))
+            self.stdout.write('Latency p50: {:.1f}ms p95: {:.1f}ms'.format(
+                timings[len(timings) // 2] * 1000, timings[int(len(timings) * 0.95)] * 1000))
+            self.stdout.write('Claimed twice: {} Unclaimed: {} Wrong vendor: {}'.format(
+                len(twice), len(unclaimed), len(mismatched)))
+        finally:
+            Order.objects.filter(pk__in=order_pks).delete()
+
+        if twice or unclaimed or mismatched:
+            raise CommandError('Orders were not claimed exactly once')
+
+        self.stdout.write('OK')
@@ -0,0 +1,111 @@
+"""
+Which vendor each member of staff belongs to
+
+vendor_required looks the vendor up on every vendor page and dashboard
+poll. The Vendor is kept in Redis per user and forgotten whenever the
+vendor or its staff change.
+"""
+import logging
+import pickle
+
+from django.conf import settings
+import redis
+
+from base.redis_client import get_redis
+from bookings.models import Vendor
+
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'vendors:user:'
+
+# Bounds how long a missed invalidation (i.e. Redis down) goes unnoticed
+VENDOR_TTL_SECONDS = 60 * 10
+
+# m2m_changed actions after which the cached vendors are wrong
+M2M_CHANGES = ('post_add', 'post_remove', 'pre_clear')
+
+
+def load_vendor(user):
+    """
+    :param user: User object
+
+    :return: Vendor object or None if user isn't a member of staff
+    """
+    try:
+        return Vendor.objects.filter(staff=user)[0]
+    except IndexError:
+        return None
+
+
+def get_vendor(user):
+    """
+    :param user: User object
+
+    :return: Vendor object or None if user isn't a member of staff
+    """
+    if not settings.VENDOR_CACHE_ON:
+        return load_vendor(user)
+
+    key = '{}{}'.format(KEY_PREFIX, user.pk)
+
+    try:
+        cached = get_redis().get(key)
+        if cached is not None:
+            return pickle.loads(cached)
+    except redis.RedisError:
+        logger.exception('Could not read vendor for user %s', user.pk)
+        return load_vendor(user)
+
+    vendor = load_vendor(user)
+    if vendor is None:
+        return None
+
+    try:
+        get_redis().set(key, pickle.dumps(vendor, pickle.HIGHEST_PROTOCOL), ex=VENDOR_TTL_SECONDS)
+    except redis.RedisError:
+        logger.exception('Could not cache vendor for user %s', user.pk)
+
+    return vendor
+
+
+def forget_users(user_pks):
+    """
+    :param list user_pks: users whose cached vendor is out of date
+    """
+    keys = ['{}{}'.format(KEY_PREFIX, user_pk) for user_pk in user_pks]
+    if not settings.VENDOR_CACHE_ON or not keys:
+        return
+
+    try:
+        get_redis().delete(*keys)
+    except redis.RedisError:
+        logger.exception('Could not forget vendor for users %s', user_pks)
+
+
+def forget_vendors(vendor_pks):
+    """
+    :param list vendor_pks: vendors which have changed
+    """
+    if not settings.VENDOR_CACHE_ON:
+        return
+
+    forget_users(Vendor.staff.through.objects.filter(
+        vendor_id__in=list(vendor_pks)).values_list('user_id', flat=True))
+
+
+def vendor_changed(sender, instance, **kwargs):
+    forget_vendors([instance.pk])
+
+
+def staff_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in M2M_CHANGES:
+        return
+
+    if reverse:
+        # instance is the User
+        forget_users([instance.pk])
+    elif action == 'pre_clear':
+        forget_vendors([instance.pk])
+    else:
+        forget_users(pk_set)
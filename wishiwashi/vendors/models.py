@@ -1,10 +1,13 @@
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.db import models
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
 from django.utils.encoding import python_2_unicode_compatible
 from model_utils.models import TimeStampedModel
 
 from bookings.models import Item, Order, Vendor
+from .membership import staff_changed, vendor_changed
+from .price_matrix import bump_price_matrix_version
 
 
 class OrderStats(TimeStampedModel):
@@ -172,3 +175,15 @@ class OrderPayments(models.Model):
     class Meta:
         verbose_name_plural = "Payments due to Vendors"
 
+
+# Vendors are cached per member of staff, see vendors.membership
+post_save.connect(vendor_changed, sender=Vendor, dispatch_uid='vendor_saved_forget_vendor')
+pre_delete.connect(vendor_changed, sender=Vendor, dispatch_uid='vendor_deleted_forget_vendor')
+m2m_changed.connect(staff_changed, sender=Vendor.staff.through, dispatch_uid='vendor_staff_forget_vendor')
+
+# Vendor prices are cached per version, see vendors.price_matrix
+for price_model in (CleanOnlyPrices, CleanAndCollectPrices, DefaultCleanOnlyPrices, DefaultCleanAndCollectPrices):
+    post_save.connect(bump_price_matrix_version, sender=price_model,
+                      dispatch_uid='{}_saved_bump_price_matrix_version'.format(price_model.__name__))
+    post_delete.connect(bump_price_matrix_version, sender=price_model,
+                        dispatch_uid='{}_deleted_bump_price_matrix_version'.format(price_model.__name__))
@@ -6,7 +6,6 @@ from bookings.clean_only import drop_off_time_to_ready_time
 import pytz
 
 RENDER_HTML2PDF_URL = "{}{}".format(settings.RENDER_SERVICE_URL, settings.RENDER_SERVICE_HTML2PDF_PATH)
-RENDER_AUTH = auth = (settings.RENDER_SERVICE_USERNAME, settings.RENDER_SERVICE_PASSWORD)
 
 
 def prepare_for_pdf(order):
@@ -1,51 +1,37 @@
 import logging
 
 from decimal import Decimal
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
-from vendors.models import (CleanOnlyPrices, DefaultCleanOnlyPrices,
-                            CleanAndCollectPrices, DefaultCleanAndCollectPrices,
-                            OrderPayments)
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from bookings.models import Order
+from vendors.models import OrderPayments
+from vendors.price_matrix import CLEAN_AND_COLLECT, CLEAN_ONLY, price_matrix, vendor_prices
 
 
 logger = logging.getLogger(__name__)
 
 
-def clean_only_amount(order):
+def amount(order, prices):
+    """
+    :param Order order:
+    :param prices: {item.pk: price} the vendor is paid, see vendors.price_matrix
+
+    :return: Decimal total for the order's items
+    """
     total = Decimal('0.00')
     for item in order.items.all():
-        try:
-            obj = CleanOnlyPrices.objects.get(vendor=order.cleanonlyorder.assigned_to_vendor, item=item.item)
-        except ObjectDoesNotExist:
-            obj = DefaultCleanOnlyPrices.objects.get(item=item.item)
-        except MultipleObjectsReturned:
-            # log error - but continue to process using initial value
-            logger.error("Clean only prices contains an item multiple times. Model: {} item: {}".format(
-                "CleanOnlyPrices", item.item.id)
-            )
-            obj = CleanOnlyPrices.objects.filter(item=item.item)[0]
-
-        total += obj.price * Decimal(item.quantity)
+        total += prices[item.item_id] * Decimal(item.quantity)
 
     return total
 
 
-def clean_and_collect_amount(order):
-    total = Decimal('0.00')
-    for item in order.items.all():
-        try:
-            obj = CleanAndCollectPrices.objects.get(vendor=order.assigned_to_vendor, item=item.item)
-        except ObjectDoesNotExist:
-            obj = DefaultCleanAndCollectPrices.objects.get(item=item.item)
-        except MultipleObjectsReturned:
-            # log error - but continue to process using initial value
-            logger.error("Clean and collect prices contains an item multiple times. Model: {} item: {}".format(
-                "CleanAndCollectPrices", item.item.id)
-            )
-            obj = CleanAndCollectPrices.objects.filter(item=item.item)[0]
+def clean_only_amount(order):
+    return amount(order, vendor_prices(CLEAN_ONLY, order.cleanonlyorder.assigned_to_vendor_id))
 
-        total += obj.price * Decimal(item.quantity)
 
-    return total
+def clean_and_collect_amount(order):
+    return amount(order, vendor_prices(CLEAN_AND_COLLECT, order.assigned_to_vendor_id))
 
 
 def total_amount_due(order):
@@ -83,3 +69,89 @@ def set_vendor_amount_due(order):
     order_payment.save()
 
     return total_amount
+
+
+def orders_due_payment(start_dt, end_dt):
+    """
+    Orders placed between start_dt and end_dt the vendor should now be paid
+    for but hasn't been: clean only orders confirmed back from the cleaner
+    and clean and collect orders delivered back to the customer.
+
+    :return: QuerySet of Orders, by pk, with what vendor_payments needs
+    """
+    return Order.objects.filter(
+        Q(cleanonlyorder__isnull=True, order_status=Order.DELIVERED_BACK_TO_CUSTOMER) |
+        Q(cleanonlyorder__expectedbackcleanonlyorder__confirmed_back=True),
+        placed_time__range=(start_dt, end_dt),
+        placed=True,
+        orderpayments__isnull=True).exclude(
+            order_status__in=[Order.UNCLAMIED_BY_VENDORS,
+                              Order.ORDER_REJECTED_BY_SERVICE_PROVIDER]).select_related(
+                'cleanonlyorder').prefetch_related('items').order_by('pk')
+
+
+def vendor_payments(orders):
+    """
+    :param list orders: with cleanonlyorder selected and items prefetched
+
+    :return: list of unsaved OrderPayments, priced from the vendor prices
+             loaded once for all the orders. Orders with an item without a
+             price are logged and left out.
+    """
+    clean_only_vendors = set()
+    clean_and_collect_vendors = set()
+    for order in orders:
+        if hasattr(order, 'cleanonlyorder'):
+            clean_only_vendors.add(order.cleanonlyorder.assigned_to_vendor_id)
+        else:
+            clean_and_collect_vendors.add(order.assigned_to_vendor_id)
+
+    clean_only = price_matrix(CLEAN_ONLY, list(clean_only_vendors))
+    clean_and_collect = price_matrix(CLEAN_AND_COLLECT, list(clean_and_collect_vendors))
+
+    payments = []
+    for order in orders:
+        if hasattr(order, 'cleanonlyorder'):
+            prices = clean_only.vendor_prices(order.cleanonlyorder.assigned_to_vendor_id)
+        else:
+            prices = clean_and_collect.vendor_prices(order.assigned_to_vendor_id)
+
+        try:
+            total_amount = amount(order, prices)
+        except ObjectDoesNotExist:
+            # Paid once the item is priced
+            logger.exception('Could not price order %s for its vendor', order.pk)
+            continue
+
+        payments.append(OrderPayments(order=order, total_amount=total_amount))
+
+    return payments
+
+
+def create_vendor_payments(orders):
+    """
+    Create the OrderPayments for orders in one INSERT. Orders paid in the
+    meantime, i.e. by an overlapping run, are skipped.
+
+    :param list orders: as returned by orders_due_payment
+
+    :return: int, number of OrderPayments created
+    """
+    payments = vendor_payments(orders)
+
+    try:
+        with transaction.atomic():
+            OrderPayments.objects.bulk_create(payments)
+        return len(payments)
+    except IntegrityError:
+        pass
+
+    created = 0
+    for payment in payments:
+        try:
+            with transaction.atomic():
+                payment.save()
+            created += 1
+        except IntegrityError:
+            pass
+    return created
@@ -1,30 +1,209 @@
+"""
+Render vendor PDFs
+
+With VENDOR_PDF_ASYNC_ON the render service is called by the render_pdf
+task instead of inside the request. The vendor is shown a page which polls
+the job (OrdersAwaitingRenderingAndSending) until the PDF is ready. PDFs are
+kept in Redis under a digest of the HTML they were rendered from so asking
+for the same orders again is answered straight away.
+
+A job which hasn't finished within RENDER_JOB_TIMEOUT_SECONDS, because its
+worker was killed or its message lost, is given up on and rendered again.
+"""
+from datetime import timedelta
+import hashlib
+import json
 import logging
 
 from django.conf import settings
+from django.core.urlresolvers import reverse
 from django.http import HttpResponse
+from django.shortcuts import render_to_response
+from django.template import RequestContext
+from django.utils import timezone
+from django.utils.http import urlencode
+import redis
 import requests
 
-from .orders import RENDER_HTML2PDF_URL, RENDER_AUTH
+from base.redis_client import get_redis
+from .models import OrdersAwaitingRenderingAndSending
+from .orders import RENDER_HTML2PDF_URL
+from .pdf_backends import RenderError, get_backend
 
 logger = logging.getLogger(__name__)
 
+PDF_KEY_PREFIX = 'vendors:pdf:'
+FILES_KEY_PREFIX = 'vendors:pdf:files:'
+
+# render_pdf's time_limit and retries with room for the queue
+RENDER_JOB_TIMEOUT_SECONDS = 180
+
+IN_FLIGHT = (OrdersAwaitingRenderingAndSending.REQUESTING_RENDER,
+             OrdersAwaitingRenderingAndSending.RENDERING)
+
+
+def pdf_response(content, filename):
+    response = HttpResponse(content, content_type='application/pdf')
+    response['Content-Disposition'] = 'attachment; filename="{}.pdf"'.format(filename)
+    return response
+
 
 def render_files_request(files, filename):
     try:
-        r = requests.post(RENDER_HTML2PDF_URL,
-                          auth=RENDER_AUTH,
-                          files=files,
-                          timeout=settings.RENDER_SERVICE_TIMEOUT_SECONDS,
-                          verify=False)
+        content = get_backend().render(files)
     except requests.exceptions.Timeout:
         logger.exception("Request to {} timed out".format(RENDER_HTML2PDF_URL))
         return HttpResponse("Server request timed out", status=500)
+    except RenderError as e:
+        return HttpResponse(str(e), status=e.status_code)
+
+    return pdf_response(content, filename)
+
+
+def files_digest(files):
+    """
+    :param list files: as built by vendors.orders.add_order_to_files
+
+    :return: str, 16 hex characters identifying the PDF the files render to
+    """
+    digest = hashlib.sha256()
+    for name, (filename, html, content_type) in files:
+        for part in (name, filename, html, content_type):
+            part = part.encode('utf-8') if not isinstance(part, bytes) else part
+            digest.update(str(len(part)).encode('ascii') + b':' + part)
+    return digest.hexdigest()[:16]
+
+
+def cached_pdf(digest):
+    """
+    :return: bytes of the PDF or None
+    """
+    return get_redis().get(PDF_KEY_PREFIX + digest)
+
+
+def store_pdf(digest, content):
+    get_redis().set(PDF_KEY_PREFIX + digest, content, ex=settings.VENDOR_PDF_CACHE_SECONDS)
+
+
+def store_files(digest, files):
+    get_redis().set(FILES_KEY_PREFIX + digest, json.dumps(files), ex=settings.VENDOR_PDF_CACHE_SECONDS)
+
+
+def cached_files(digest):
+    """
+    :return: list of files to render again or None
+    """
+    files = get_redis().get(FILES_KEY_PREFIX + digest)
+    return json.loads(files.decode('utf-8')) if files is not None else None
+
+
+def overdue_before():
+    """
+    :return: datetime, jobs in flight not touched since are given up on
+    """
+    return timezone.now() - timedelta(seconds=RENDER_JOB_TIMEOUT_SECONDS)
+
+
+def is_overdue(job):
+    return job.status in IN_FLIGHT and job.modified < overdue_before()
+
+
+def queue_render(digest, orders, files):
+    """
+    :return: OrdersAwaitingRenderingAndSending for a new render_pdf task
+    """
+    from .tasks import render_pdf
+
+    job = OrdersAwaitingRenderingAndSending.objects.create(
+        render_service_job_uuid=digest,
+        status=OrdersAwaitingRenderingAndSending.REQUESTING_RENDER)
+    job.pdf_url = reverse('vendors:pdf_job', kwargs={'job_pk': job.pk})
+    job.save(update_fields=['pdf_url'])
+    job.orders.add(*orders)
+
+    try:
+        store_files(digest, files)
+    except redis.RedisError:
+        logger.exception('Could not store files for PDF %s', digest)
+
+    render_pdf.delay(job.pk, files)
+    return job
+
+
+def requeue_overdue(job):
+    """
+    Fail an overdue job and render its PDF again
+
+    :return: OrdersAwaitingRenderingAndSending rendering it now, or None if
+             it can't be rendered without the vendor asking again
+    """
+    failed = OrdersAwaitingRenderingAndSending.objects.filter(
+        pk=job.pk, status__in=IN_FLIGHT, modified__lt=overdue_before()).update(
+            status=OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER, modified=timezone.now())
+
+    if not failed:
+        # Another request got here first
+        return OrdersAwaitingRenderingAndSending.objects.filter(
+            render_service_job_uuid=job.render_service_job_uuid, status__in=IN_FLIGHT,
+            modified__gte=overdue_before()).order_by('-pk').first()
+
+    try:
+        files = cached_files(job.render_service_job_uuid)
+    except redis.RedisError:
+        logger.exception('Could not read files for PDF %s', job.render_service_job_uuid)
+        return None
+
+    if files is None:
+        return None
+
+    new_job = queue_render(job.render_service_job_uuid, job.orders.all(), files)
+    new_job.recipients.add(*job.recipients.all())
+    return new_job
+
+
+def waiting_for_pdf(request, job, filename):
+    context = {
+        'title': 'Preparing your PDF',
+        'job': job,
+        'job_url': '{}?{}'.format(job.pdf_url, urlencode({'filename': filename})),
+    }
+    return render_to_response('vendors/pdf_job.html', context,
+                              context_instance=RequestContext(request), status=202)
+
+
+def request_pdf(request, orders, files, filename):
+    """
+    :param request: HttpRequest from a vendor
+    :param orders: Orders in the PDF
+    :param list files: HTML to render
+    :param str filename: without the .pdf extension
+
+    :return: HttpResponse, the PDF if it's ready otherwise a page which
+             waits for it
+    """
+    if not settings.VENDOR_PDF_ASYNC_ON:
+        return render_files_request(files, filename)
+
+    digest = files_digest(files)
+
+    try:
+        content = cached_pdf(digest)
+    except redis.RedisError:
+        logger.exception('Could not read PDF %s', digest)
+        return render_files_request(files, filename)
+
+    if content is not None:
+        return pdf_response(content, filename)
+
+    # Someone already asked for these orders and it's still on its way
+    job = OrdersAwaitingRenderingAndSending.objects.filter(
+        render_service_job_uuid=digest,
+        status__in=IN_FLIGHT,
+        modified__gte=overdue_before()).first()
 
-    if r.status_code == 200:
-        response = HttpResponse(r.content, content_type='application/pdf')
-        response['Content-Disposition'] = 'attachment; filename="{}.pdf"'.format(filename)
-        return response
-    else:
-        return HttpResponse(r.text, status=r.status_code)
+    if job is None:
+        job = queue_render(digest, orders, files)
 
+    job.recipients.add(request.user)
 
+    return waiting_for_pdf(request, job, filename)
@@ -0,0 +1,112 @@
+"""
+Turn the HTML files built in vendors.orders into a PDF
+
+VENDOR_PDF_BACKEND names the backend used by vendors.pdf:
+
+- RenderServiceBackend posts the files to the render service
+- LocalBackend runs wkhtmltopdf on this machine. At most
+  VENDOR_PDF_LOCAL_PROCESSES renders run at once in each process, further
+  renders wait their turn rather than taking over the machine.
+"""
+from concurrent.futures import ThreadPoolExecutor
+import os
+import shutil
+import subprocess
+import tempfile
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from base.services import RENDER, post
+from .orders import RENDER_HTML2PDF_URL
+
+
+class RenderError(Exception):
+    def __init__(self, message, status_code=500):
+        super(RenderError, self).__init__(message)
+        self.status_code = status_code
+
+
+class RenderServiceBackend(object):
+    def render(self, files):
+        """
+        :param list files: as built by vendors.orders.add_order_to_files
+
+        :return: bytes of the PDF
+        """
+        resp = post(RENDER, RENDER_HTML2PDF_URL, files=files)
+        if resp.status_code != 200:
+            raise RenderError(resp.text, status_code=resp.status_code)
+        return resp.content
+
+
+def render_with_wkhtmltopdf(htmls, timeout):
+    """
+    :param list htmls: HTML documents, one or more pages each
+    :param int timeout: seconds
+
+    :return: bytes of a PDF of all the documents in order
+    """
+    directory = tempfile.mkdtemp(prefix='vendor-pdf-')
+    try:
+        pages = []
+        for index, html in enumerate(htmls):
+            page = os.path.join(directory, '{}.html'.format(index))
+            with open(page, 'wb') as f:
+                f.write(html.encode('utf-8') if not isinstance(html, bytes) else html)
+            pages.append(page)
+
+        output = os.path.join(directory, 'out.pdf')
+        process = subprocess.Popen([settings.WKHTMLTOPDF_BINARY, '--quiet', '--encoding', 'utf-8'] +
+                                   pages + [output],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            _stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.communicate()
+            raise RenderError('wkhtmltopdf took longer than {}s'.format(timeout))
+
+        if process.returncode != 0:
+            raise RenderError(stderr.decode('utf-8', 'replace'))
+
+        with open(output, 'rb') as f:
+            return f.read()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class LocalBackend(object):
+    _executor = None
+
+    @classmethod
+    def executor(cls):
+        if cls._executor is None:
+            cls._executor = ThreadPoolExecutor(max_workers=settings.VENDOR_PDF_LOCAL_PROCESSES)
+        return cls._executor
+
+    def render(self, files):
+        """
+        :param list files: as built by vendors.orders.add_order_to_files
+
+        :return: bytes of the PDF
+        """
+        htmls = [html for _name, (_filename, html, _content_type) in files]
+        try:
+            return self.executor().submit(render_with_wkhtmltopdf, htmls,
+                                          settings.RENDER_SERVICE_TIMEOUT_SECONDS).result()
+        except OSError as e:
+            raise RenderError('Unable to run {}: {}'.format(settings.WKHTMLTOPDF_BINARY, e))
+
+
+_backends = {}
+
+
+def get_backend():
+    """
+    :return: the VENDOR_PDF_BACKEND, one per process
+    """
+    path = settings.VENDOR_PDF_BACKEND
+    if path not in _backends:
+        _backends[path] = import_string(path)()
+    return _backends[path]
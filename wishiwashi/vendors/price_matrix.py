@@ -0,0 +1,164 @@
+"""
+What each vendor is paid per item
+
+A vendor's price for an item is their CleanOnlyPrices/CleanAndCollectPrices
+row or, failing that, the item's default. The defaults and every vendor's
+own prices are loaded in one query each and resolved into a dict per
+vendor, {item.pk: price}.
+
+With VENDOR_PRICES_CACHE_ON the prices are kept in process, keyed by a
+version in Redis which saving or deleting any vendor price bumps.
+"""
+import logging
+import time
+
+from django.conf import settings
+import redis
+
+from base.redis_client import get_redis
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'vendors:prices:version'
+
+# As bookings.prices.PRICE_CACHE_MAX_AGE_SECONDS
+PRICE_CACHE_MAX_AGE_SECONDS = 300
+
+CLEAN_ONLY = 'clean_only'
+CLEAN_AND_COLLECT = 'clean_and_collect'
+
+# {kind: PriceMatrix} for one version
+_matrices = {'version': None, 'loaded': 0, 'matrices': {}}
+
+
+class Prices(dict):
+    """
+    {item.pk: price}, raises the default price model's DoesNotExist for
+    items without a price
+    """
+    def __init__(self, prices, does_not_exist):
+        super(Prices, self).__init__(prices)
+        self.does_not_exist = does_not_exist
+
+    def __missing__(self, item_pk):
+        raise self.does_not_exist('No price for item {}'.format(item_pk))
+
+
+class PriceMatrix(object):
+    def __init__(self, defaults, vendors, does_not_exist):
+        """
+        :param dict defaults: {item.pk: price}
+        :param dict vendors: {vendor.pk: {item.pk: price}} of vendors' own prices
+        :param does_not_exist: exception for items without a price
+        """
+        self.defaults = Prices(defaults, does_not_exist)
+        self.vendors = {}
+        for vendor_pk, prices in vendors.items():
+            resolved = dict(defaults)
+            resolved.update(prices)
+            self.vendors[vendor_pk] = Prices(resolved, does_not_exist)
+
+    def vendor_prices(self, vendor_pk):
+        """
+        :return: Prices the vendor is paid
+        """
+        return self.vendors.get(vendor_pk, self.defaults)
+
+
+def _models(kind):
+    from .models import (CleanAndCollectPrices, CleanOnlyPrices,
+                         DefaultCleanAndCollectPrices, DefaultCleanOnlyPrices)
+
+    return {
+        CLEAN_ONLY: (CleanOnlyPrices, DefaultCleanOnlyPrices),
+        CLEAN_AND_COLLECT: (CleanAndCollectPrices, DefaultCleanAndCollectPrices),
+    }[kind]
+
+
+def load_matrix(kind, vendor_pks=None):
+    """
+    :param str kind: CLEAN_ONLY or CLEAN_AND_COLLECT
+    :param list vendor_pks: only load these vendors' prices, otherwise every vendor's
+
+    :return: PriceMatrix, in up to two queries
+    """
+    vendor_model, default_model = _models(kind)
+
+    defaults = dict(default_model.objects.values_list('item', 'price'))
+
+    vendors = {}
+    rows = vendor_model.objects.values_list('vendor', 'item', 'price')
+    if vendor_pks is not None:
+        rows = rows.filter(vendor__in=vendor_pks) if vendor_pks else []
+    for vendor_pk, item_pk, price in rows:
+        vendors.setdefault(vendor_pk, {})[item_pk] = price
+
+    return PriceMatrix(defaults, vendors, default_model.DoesNotExist)
+
+
+def price_matrix_version():
+    """
+    :return: int or None if the version can't be read, in which case
+    nothing should be served from cache
+    """
+    if not settings.VENDOR_PRICES_CACHE_ON:
+        return None
+
+    try:
+        return int(get_redis().get(VERSION_KEY) or 0)
+    except redis.RedisError:
+        logger.exception('Could not read vendor prices version')
+        return None
+
+
+def bump_price_matrix_version(*args, **kwargs):
+    """
+    Signal receiver, invalidates every process' vendor prices
+    """
+    if not settings.VENDOR_PRICES_CACHE_ON:
+        return
+
+    try:
+        get_redis().incr(VERSION_KEY)
+    except redis.RedisError:
+        logger.exception('Could not bump vendor prices version')
+
+
+def clear_price_matrices():
+    _matrices.update(version=None, loaded=0, matrices={})
+
+
+def price_matrix(kind, vendor_pks=None):
+    """
+    :param str kind: CLEAN_ONLY or CLEAN_AND_COLLECT
+    :param list vendor_pks: vendors about to be looked up, lets an uncached
+                            load skip the others
+
+    :return: PriceMatrix for the current version
+    """
+    version = price_matrix_version()
+    if version is None:
+        return load_matrix(kind, vendor_pks)
+
+    now = time.time()
+    if version != _matrices['version'] or now - _matrices['loaded'] > PRICE_CACHE_MAX_AGE_SECONDS:
+        _matrices.update(version=version, loaded=now, matrices={})
+
+    if kind not in _matrices['matrices']:
+        _matrices['matrices'][kind] = load_matrix(kind)
+    return _matrices['matrices'][kind]
+
+
+def vendor_prices(kind, vendor_pk):
+    """
+    :return: Prices the vendor is paid, their own or the defaults
+    """
+    return price_matrix(kind, [vendor_pk]).vendor_prices(vendor_pk)
+
+
+def default_prices(kind):
+    """
+    :return: Prices paid to vendors without their own
+    """
+    return price_matrix(kind, []).defaults
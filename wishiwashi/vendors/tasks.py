@@ -2,31 +2,51 @@
 from decimal import Decimal
 import datetime
 from datetime import timedelta
+import time
 
 from base.celery import app
+from base.services import send_email
 from celery.decorators import periodic_task
 from celery.task.schedules import crontab
 from celery.utils.log import get_task_logger
 from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
 from django.template import defaultfilters as filters
 from django.template.loader import render_to_string
 from django.utils import timezone
-from requests.auth import HTTPBasicAuth
 from ukpostcodeparser import parse_uk_postcode
 import pytz
-import requests
-import ujson as json
 
 from bookings.models import Order, Vendor, CleanOnlyOrder
 from bookings.templatetags.phone_numbers import format_phone_number
 from bookings.templatetags.postcodes import format_postcode
 from customer_service.models import UserProfile
+from .claims import assign_unclaimed_orders
+from .heartbeat import flush_heartbeats
+from .models import OrdersAwaitingRenderingAndSending
+from .pdf import store_pdf
+from .pdf_backends import get_backend
 from .templatetags.add_one_hour import add_one_hour
-from .payments import set_vendor_amount_due
+from .payments import create_vendor_payments, orders_due_payment
 
 
 logger = get_task_logger(__name__)
 
+# assign_vendor_payments commits this many orders at a time and hands over
+# to a new run once it has been going this long, well inside its time_limit
+VENDOR_PAYMENTS_BATCH_SIZE = 500
+VENDOR_PAYMENTS_SECONDS = 120
+
+
+@periodic_task(run_every=crontab(minute="*"), # minutes
+               time_limit=50) # seconds
+def flush_vendor_heartbeats(*args, **kwargs):
+    if not settings.VENDOR_HEARTBEAT_ON:
+        return
+
+    logger.info('Flushed %d vendor heartbeats', flush_heartbeats())
+
 
 @periodic_task(run_every=crontab(minute="*/5"), # minutes
                time_limit=120) # seconds
@@ -35,18 +55,8 @@ def unaccepted_orders_go_to_wishiwashi(*args, **kwargs):
     time_passed = now_utc - timedelta(minutes=1)
 
     # Wishi Washi accepts all valid orders which haven't been picked up by other vendors
-    for order in Order.objects.filter(
-            order_status=Order.UNCLAMIED_BY_VENDORS,
-            authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
-            charge_back_status=Order.NOT_CHARGED_BACK,
-            refund_status=Order.NOT_REFUNDED,
-            placed=True,
-            placed_time__lte=time_passed):
-        if not order.thrown_back_time or order.thrown_back_time < time_passed:
-            order.order_status = Order.CLAIMED_BY_VENDOR
-            order.assigned_to_vendor = Vendor.objects.get(pk=settings.VENDOR_WISHI_WASHI_PK)
-            order.order_claimed_time = timezone.now()
-            order.save()
+    assigned = assign_unclaimed_orders(settings.VENDOR_WISHI_WASHI_PK, time_passed)
+    logger.info('Assigned %d unclaimed orders to Wishi Washi', assigned)
 
     return True
 
@@ -117,25 +127,18 @@ def get_order_headline_summary(order):
 
 def vendor_recipients(outcode=None):
     """
-    Return a set of vendors.
-    Optionally restrict to those who support a specific outcode
+    :param str outcode: optionally restrict to vendors who serve it
+
+    :return: set of email addresses of vendors' staff who want email
+             notifications, found with a single query
     """
-    recipients = set()
+    staff = User.objects.filter(vendor__isnull=False,
+                                userprofile__email_notifications_enabled=True)
 
     if outcode:
-        outcode = outcode.lower()
-        vendors = Vendor.objects.filter(catchment_area__out_code=outcode)
-    else:
-        vendors = Vendor.objects.all()
-
-    for vendor in vendors:
-        for user in vendor.staff.all():
-            profile = UserProfile.objects.get(user=user)
-
-            if profile.email_notifications_enabled:
-                recipients.add(user.email)
+        staff = staff.filter(vendor__catchment_area__out_code=outcode.lower())
 
-    return recipients
+    return set(staff.values_list('email', flat=True))
 
 
 @app.task(bind=True,
@@ -147,10 +150,7 @@ def notify_vendors_of_orders_via_email(self, order_id):
     if not settings.COMMUNICATE_SERVICE_ENDPOINT.startswith("http"):
         raise ValueError("communicate does not start with http: {}".format(settings.COMMUNICATE_SERVICE_ENDPOINT))
 
-    order = Order.objects.get(pk=order_id)
-
-    auth = HTTPBasicAuth(settings.COMMUNICATE_SERVICE_USERNAME,
-                         settings.COMMUNICATE_SERVICE_PASSWORD)
+    order = Order.objects.select_related('pick_up_and_delivery_address').get(pk=order_id)
 
     try:
         postcode = parse_uk_postcode(order.pick_up_and_delivery_address.postcode)
@@ -178,14 +178,7 @@ def notify_vendors_of_orders_via_email(self, order_id):
                 'recipients': list(recipients),
             }
 
-            url = '%semail' % settings.COMMUNICATE_SERVICE_ENDPOINT
-            resp = requests.post(url, data={'payload': json.dumps(payload)}, auth=auth, timeout=30, verify=False)
-            assert resp.status_code == 200, 'HTTP %d from %s' % (resp.status_code, url)
-
-            resp = json.loads(resp.content)
-
-            assert resp['error'] is False, resp
-            assert int(resp['job_id']) > 0, resp
+            send_email(payload)
         except Exception as exc:
             msg = 'Exception while requesting email transmission, retrying...'
             logger.exception(msg)
@@ -194,12 +187,53 @@ def notify_vendors_of_orders_via_email(self, order_id):
     return True
 
 
+@app.task(bind=True,
+          default_retry_delay=1, # seconds
+          max_retries=10,
+          time_limit=60) # seconds
+def render_pdf(self, job_pk, files):
+    """
+    :param int job_pk: OrdersAwaitingRenderingAndSending requested by
+                       vendors.pdf.request_pdf
+    :param list files: HTML to render
+    """
+    try:
+        job = OrdersAwaitingRenderingAndSending.objects.get(pk=job_pk)
+    except OrdersAwaitingRenderingAndSending.DoesNotExist as exc:
+        if self.request.retries >= self.max_retries:
+            # Committed since, never to be rendered
+            OrdersAwaitingRenderingAndSending.objects.filter(pk=job_pk).update(
+                status=OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER, modified=timezone.now())
+            return False
+
+        # The request asking for it hasn't committed yet
+        raise self.retry(exc=exc)
+
+    OrdersAwaitingRenderingAndSending.objects.filter(pk=job.pk).update(
+        status=OrdersAwaitingRenderingAndSending.RENDERING, modified=timezone.now())
+
+    try:
+        store_pdf(job.render_service_job_uuid, get_backend().render(files))
+        status = OrdersAwaitingRenderingAndSending.RENDERED
+    except Exception:
+        logger.exception('Exception while rendering PDF %s', job.pk)
+        status = OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER
+
+    OrdersAwaitingRenderingAndSending.objects.filter(pk=job.pk).update(status=status, modified=timezone.now())
+
+    return status == OrdersAwaitingRenderingAndSending.RENDERED
+
+
 @periodic_task(run_every=crontab(hour=5, minute=30), # UTC
                time_limit=160) # seconds
 def assign_vendor_payments(*args, **kwargs):
     """
     If clean only order and expected back is confirmed, assign payments
     If clean and collect, charge when status is delivered back to customer
+
+    Orders are paid for in batches, each committed as it goes. A run which
+    is running out of time queues another to carry on, orders already paid
+    for aren't selected again.
     """
     MAX_DAYS_BOOKING_PERIOD = 7 * 6  # 6 weeks covers maximum booking, from placement to delivery
     now_utc = timezone.now()
@@ -212,22 +246,24 @@ def assign_vendor_payments(*args, **kwargs):
     # End of day yesterday
     end_dt = datetime.datetime.combine(yesterday.date(), yesterday.time().max).replace(tzinfo=pytz.utc)
 
-    for order in Order.objects.filter(placed_time__range=(start_dt, end_dt),
-                                      placed=True).exclude(
-                                          order_status__in=[Order.UNCLAMIED_BY_VENDORS,
-                                                            Order.ORDER_REJECTED_BY_SERVICE_PROVIDER]):
-        # Skip already processed
-        if hasattr(order, 'orderpayments'):
-            continue
-
-        # Clean only
-        if hasattr(order, 'cleanonlyorder'):
-            if (hasattr(order.cleanonlyorder, 'expectedbackcleanonlyorder') and
-                    order.cleanonlyorder.expectedbackcleanonlyorder.confirmed_back is True):
-                set_vendor_amount_due(order)
-        else:
-            if order.order_status == Order.DELIVERED_BACK_TO_CUSTOMER:
-                set_vendor_amount_due(order)
+    began = time.time()
+    orders_due = orders_due_payment(start_dt, end_dt)
+    last_pk = 0
+    paid = 0
+
+    while True:
+        with transaction.atomic():
+            orders = list(orders_due.filter(pk__gt=last_pk)[:VENDOR_PAYMENTS_BATCH_SIZE])
+            if not orders:
+                break
+            paid += create_vendor_payments(orders)
+        last_pk = orders[-1].pk
+
+        if time.time() - began > VENDOR_PAYMENTS_SECONDS:
+            assign_vendor_payments.delay()
+            break
+
+    logger.info('Assigned vendor payments for %d orders in %.2fs', paid, time.time() - began)
 
     return True
 
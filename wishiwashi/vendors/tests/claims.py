@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from bookings.factories import OrderFactory, VendorFactory
+from bookings.models import Order
+from ..claims import assign_unclaimed_orders, claim_order, throw_back_orders
+
+
+class Claims(TestCase):
+    def setUp(self):
+        self.vendor, self.other_vendor = VendorFactory(), VendorFactory()
+        self.order = OrderFactory(assigned_to_vendor=None, authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                                  order_status=Order.UNCLAMIED_BY_VENDORS)
+
+    def test_only_first_claim_wins(self):
+        # Both vendors read the order while it was unclaimed
+        stale = Order.objects.get(pk=self.order.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(claim_order(stale.pk, self.vendor))
+        self.assertFalse(claim_order(stale.pk, self.other_vendor))
+
+        order = Order.objects.get(pk=self.order.pk)
+        self.assertEqual(order.assigned_to_vendor, self.vendor)
+        self.assertEqual(order.order_status, Order.CLAIMED_BY_VENDOR)
+        self.assertIsNotNone(order.order_claimed_time)
+
+    def test_unauthorised_not_claimed(self):
+        order = OrderFactory(assigned_to_vendor=None, authorisation_status=Order.FAILED_TO_AUTHORISE)
+        self.assertFalse(claim_order(order.pk, self.vendor))
+
+    def test_throw_back_in_one_update(self):
+        pick_up_time = timezone.now() + timedelta(days=1)
+        mine = [OrderFactory(assigned_to_vendor=self.vendor, order_status=Order.CLAIMED_BY_VENDOR,
+                             pick_up_time=pick_up_time) for _ in range(3)]
+        theirs = OrderFactory(assigned_to_vendor=self.other_vendor, order_status=Order.CLAIMED_BY_VENDOR,
+                              pick_up_time=pick_up_time)
+        order_pks = [order.pk for order in mine] + [theirs.pk]
+
+        with self.assertNumQueries(2):
+            thrown_back = throw_back_orders(order_pks, self.vendor, timezone.now())
+
+        self.assertEqual(sorted(thrown_back), sorted(order.pk for order in mine))
+        self.assertEqual(Order.objects.filter(pk__in=thrown_back, assigned_to_vendor__isnull=True,
+                                              order_status=Order.UNCLAMIED_BY_VENDORS).count(), 3)
+        self.assertEqual(Order.objects.get(pk=theirs.pk).assigned_to_vendor, self.other_vendor)
+
+        # Only picked up after the cut off
+        self.assertEqual(throw_back_orders([theirs.pk], self.other_vendor, pick_up_time + timedelta(hours=1)), [])
+
+    def test_assign_unclaimed_in_one_update(self):
+        now = timezone.now()
+        criteria = dict(assigned_to_vendor=None, authorisation_status=Order.SUCCESSFULLY_AUTHORISED,
+                        order_status=Order.UNCLAMIED_BY_VENDORS, placed=True)
+        self.order.delete()
+        waiting = [OrderFactory(placed_time=now - timedelta(minutes=5), **criteria) for _ in range(3)]
+        OrderFactory(placed_time=now - timedelta(minutes=5), thrown_back_time=now, **criteria)
+        OrderFactory(placed_time=now, **criteria)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(assign_unclaimed_orders(self.vendor.pk, now - timedelta(minutes=1)), 3)
+        self.assertEqual(sorted(Order.objects.filter(assigned_to_vendor=self.vendor).values_list('pk', flat=True)),
+                         sorted(order.pk for order in waiting))
@@ -0,0 +1,100 @@
+import datetime
+
+from django.test import TestCase
+from django.test.utils import override_settings
+from freezegun import freeze_time
+import mock
+import pytz
+import redis
+
+from base.fake_redis import FakeRedis
+from bookings.factories import VendorFactory
+from bookings.models import Vendor
+from ..heartbeat import flush_heartbeats, heartbeat, touch_last_viewed
+
+
+class LastViewed(TestCase):
+    @freeze_time("2015-01-02 08:00:00")
+    def test_written_once_a_minute(self):
+        vendor = VendorFactory()
+        touch_last_viewed(vendor)
+        first_viewed = datetime.datetime(2015, 1, 2, 8, tzinfo=pytz.utc)
+        self.assertEqual(Vendor.objects.get(pk=vendor.pk).last_viewed_the_orders_page, first_viewed)
+
+        with freeze_time("2015-01-02 08:00:59"):
+            with self.assertNumQueries(0):
+                touch_last_viewed(vendor)
+
+        with freeze_time("2015-01-02 08:01:01"):
+            touch_last_viewed(vendor)
+        self.assertEqual(Vendor.objects.get(pk=vendor.pk).last_viewed_the_orders_page,
+                         datetime.datetime(2015, 1, 2, 8, 1, 1, tzinfo=pytz.utc))
+
+    @freeze_time("2015-01-02 08:00:30")
+    def test_concurrent_requests_write_once(self):
+        vendor = VendorFactory(last_viewed_the_orders_page=datetime.datetime(2015, 1, 2, 7, 50, tzinfo=pytz.utc))
+        # Another request already recorded the view
+        Vendor.objects.filter(pk=vendor.pk).update(
+            last_viewed_the_orders_page=datetime.datetime(2015, 1, 2, 8, tzinfo=pytz.utc))
+
+        touch_last_viewed(vendor)
+
+        self.assertEqual(Vendor.objects.get(pk=vendor.pk).last_viewed_the_orders_page,
+                         datetime.datetime(2015, 1, 2, 8, tzinfo=pytz.utc))
+
+
+@override_settings(VENDOR_HEARTBEAT_ON=True, VENDOR_LAST_VIEWED_SECONDS=60)
+class Heartbeats(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('vendors.heartbeat.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.vendor = VendorFactory()
+        self.other_vendor = VendorFactory()
+
+    def test_heartbeat_does_not_write_vendor(self):
+        with freeze_time("2015-01-02 08:00:00"):
+            with self.assertNumQueries(0):
+                heartbeat(self.vendor)
+                heartbeat(self.vendor)
+
+        self.assertIsNone(Vendor.objects.get(pk=self.vendor.pk).last_viewed_the_orders_page)
+
+    def test_flushed_in_one_update(self):
+        with freeze_time("2015-01-02 08:00:00"):
+            heartbeat(self.vendor)
+        with freeze_time("2015-01-02 08:00:20"):
+            heartbeat(self.other_vendor)
+            heartbeat(self.vendor)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(flush_heartbeats(), 2)
+
+        self.assertEqual(Vendor.objects.get(pk=self.vendor.pk).last_viewed_the_orders_page,
+                         datetime.datetime(2015, 1, 2, 8, 0, 20, tzinfo=pytz.utc))
+        self.assertEqual(Vendor.objects.get(pk=self.other_vendor.pk).last_viewed_the_orders_page,
+                         datetime.datetime(2015, 1, 2, 8, 0, 20, tzinfo=pytz.utc))
+
+    def test_only_new_heartbeats_flushed(self):
+        with freeze_time("2015-01-02 08:00:00"):
+            heartbeat(self.vendor)
+            heartbeat(self.other_vendor)
+        flush_heartbeats()
+
+        with freeze_time("2015-01-02 08:01:00"):
+            heartbeat(self.vendor)
+        self.assertEqual(flush_heartbeats(), 1)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(flush_heartbeats(), 0)
+
+    @freeze_time("2015-01-02 08:00:00")
+    def test_redis_down(self):
+        self.redis.zadd = mock.Mock(side_effect=redis.ConnectionError)
+
+        heartbeat(self.vendor)
+
+        self.assertEqual(Vendor.objects.get(pk=self.vendor.pk).last_viewed_the_orders_page,
+                         datetime.datetime(2015, 1, 2, 8, tzinfo=pytz.utc))
@@ -0,0 +1,65 @@
+import json
+
+from django.core.urlresolvers import reverse
+from django.test import TestCase
+from django.test.client import Client
+from django.test.utils import override_settings
+import mock
+
+from ..live_orders import publish_new_order, wait_for_orders_after
+from ..tests.patches import create_vendor
+
+
+@override_settings(VENDOR_ORDERS_LONG_POLL_SECONDS=1)
+@mock.patch('vendors.live_orders.get_redis')
+class LongPoll(TestCase):
+    def test_disabled(self, get_redis):
+        with self.settings(VENDOR_ORDERS_LONG_POLL_SECONDS=0):
+            self.assertTrue(wait_for_orders_after(10))
+            publish_new_order(mock.Mock(pk=11))
+        self.assertFalse(get_redis.called)
+
+    def test_newer_order_published(self, get_redis):
+        get_redis.return_value.get.return_value = b'11'
+        self.assertTrue(wait_for_orders_after(10))
+        self.assertFalse(get_redis.return_value.pubsub.called)
+
+    @mock.patch('vendors.live_orders.time')
+    def test_no_new_orders(self, time, get_redis):
+        time.time.side_effect = [0, 0, 0, 2]
+        get_redis.return_value.get.return_value = b'10'
+        get_redis.return_value.pubsub.return_value.get_message.return_value = None
+
+        self.assertFalse(wait_for_orders_after(10))
+        get_redis.return_value.pubsub.return_value.close.assert_called_once_with()
+
+    def test_order_published_while_waiting(self, get_redis):
+        get_redis.return_value.get.return_value = b'10'
+        get_redis.return_value.pubsub.return_value.get_message.return_value = {'data': b'11'}
+
+        self.assertTrue(wait_for_orders_after(10))
+
+    def test_latest_order_key_emptied_while_subscribing(self, get_redis):
+        get_redis.return_value.get.side_effect = [b'10', None]
+        self.assertTrue(wait_for_orders_after(10))
+
+    def test_get_latest_orders_moves_cursor_past_published_orders(self, get_redis):
+        client = Client()
+        create_vendor(client, create_new_vendor=True)
+        # Published but more than 2 days old by now
+        get_redis.return_value.get.return_value = b'25'
+
+        resp = client.post(reverse('vendors:get_latest_orders'), {'latest_order_id': 0})
+
+        self.assertEqual(json.loads(resp.content.decode('utf-8')), {'orders': [], 'latest_order_id': 25})
+
+    def test_get_latest_orders_answers_without_querying(self, get_redis):
+        client = Client()
+        create_vendor(client, create_new_vendor=True)
+
+        with mock.patch('vendors.views.wait_for_orders_after', return_value=False):
+            with mock.patch('vendors.views.Order') as order:
+                resp = client.post(reverse('vendors:get_latest_orders'), {'latest_order_id': 10})
+
+        self.assertEqual(resp.status_code, 200)
+        self.assertFalse(order.objects.filter.called)
@@ -0,0 +1,48 @@
+from django.test import TestCase
+from django.test.utils import override_settings
+import mock
+
+from base.fake_redis import FakeRedis
+from bookings.factories import UserFactory, VendorFactory
+from ..membership import get_vendor
+
+
+@override_settings(VENDOR_CACHE_ON=True)
+class Membership(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('vendors.membership.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = UserFactory()
+        self.vendor = VendorFactory(staff=[self.user])
+
+    def test_not_a_vendor(self):
+        self.assertIsNone(get_vendor(UserFactory()))
+
+    def test_cached(self):
+        with self.assertNumQueries(1):
+            get_vendor(self.user)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_vendor(self.user), self.vendor)
+
+    def test_forgotten_when_vendor_saved(self):
+        get_vendor(self.user)
+        self.vendor.company_name = 'Renamed'
+        self.vendor.save()
+
+        self.assertEqual(get_vendor(self.user).company_name, 'Renamed')
+
+    def test_forgotten_when_staff_removed(self):
+        get_vendor(self.user)
+        self.vendor.staff.remove(self.user)
+
+        self.assertIsNone(get_vendor(self.user))
+
+    def test_forgotten_when_staff_cleared_from_user(self):
+        get_vendor(self.user)
+        self.user.vendor_set.clear()
+
+        self.assertIsNone(get_vendor(self.user))
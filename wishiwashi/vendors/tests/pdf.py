@@ -0,0 +1,136 @@
+from datetime import timedelta
+import json
+
+from django.core.urlresolvers import reverse
+from django.http import Http404
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+from django.utils import timezone
+import mock
+
+from base.fake_redis import FakeRedis
+from bookings.factories import OrderFactory, UserFactory, VendorFactory
+from ..models import OrdersAwaitingRenderingAndSending
+from ..pdf import RENDER_JOB_TIMEOUT_SECONDS, files_digest
+from ..tasks import render_pdf
+from ..views import pdf_job, pdf_order
+
+
+@override_settings(VENDOR_PDF_ASYNC_ON=True)
+class AsyncPdf(TestCase):
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = mock.patch('vendors.pdf.get_redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.user = UserFactory()
+        self.vendor = VendorFactory(staff=[self.user])
+        self.order = OrderFactory(placed=True, assigned_to_vendor=self.vendor)
+
+    def request_pdf(self, user=None):
+        request = RequestFactory().post(reverse('vendors:pdf_order', kwargs={'order_pk': self.order.pk}))
+        request.user = user or self.user
+        return pdf_order(request, self.order.pk)
+
+    def job_status(self, job, user=None, **params):
+        request = RequestFactory().get(job.pdf_url, params)
+        request.user = user or self.user
+        return pdf_job(request, job.pk)
+
+    @mock.patch('vendors.tasks.render_pdf.delay')
+    def test_render_requested_once(self, delay):
+        self.assertEqual(self.request_pdf().status_code, 202)
+
+        other_user = UserFactory()
+        self.vendor.staff.add(other_user)
+        self.assertEqual(self.request_pdf(other_user).status_code, 202)
+
+        job = OrdersAwaitingRenderingAndSending.objects.get()
+        self.assertEqual(job.status, OrdersAwaitingRenderingAndSending.REQUESTING_RENDER)
+        self.assertEqual(list(job.orders.all()), [self.order])
+        self.assertEqual(set(job.recipients.all()), set([self.user, other_user]))
+
+        delay.assert_called_once_with(job.pk, mock.ANY)
+        files = delay.call_args[0][1]
+        self.assertEqual(job.render_service_job_uuid, files_digest(files))
+
+    @mock.patch('requests.Session.post')
+    def test_rendered_and_served_from_cache(self, post):
+        post.return_value = mock.Mock(status_code=200, content=b'%PDF')
+
+        with mock.patch('vendors.tasks.render_pdf.delay', side_effect=render_pdf):
+            self.request_pdf()
+
+        job = OrdersAwaitingRenderingAndSending.objects.get()
+        self.assertEqual(job.status, OrdersAwaitingRenderingAndSending.RENDERED)
+        self.assertEqual(json.loads(self.job_status(job, json=1).content.decode('utf-8')),
+                         {'job_id': job.pk, 'status': 'Rendered', 'ready': True})
+
+        response = self.job_status(job, filename='Order#1')
+        self.assertEqual(response.content, b'%PDF')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Order#1.pdf"')
+
+        # Same order again
+        with mock.patch('vendors.tasks.render_pdf.delay') as delay:
+            response = self.request_pdf()
+        self.assertEqual(response.content, b'%PDF')
+        self.assertFalse(delay.called)
+        self.assertEqual(post.call_count, 1)
+
+    @mock.patch('requests.Session.post')
+    def test_failed_render(self, post):
+        post.return_value = mock.Mock(status_code=500, content=b'')
+
+        with mock.patch('vendors.tasks.render_pdf.delay', side_effect=render_pdf):
+            self.request_pdf()
+
+        job = OrdersAwaitingRenderingAndSending.objects.get()
+        self.assertEqual(job.status, OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER)
+        self.assertEqual(self.job_status(job).status_code, 500)
+
+    @mock.patch('vendors.tasks.render_pdf.delay')
+    def test_only_recipients_see_job(self, delay):
+        self.request_pdf()
+        job = OrdersAwaitingRenderingAndSending.objects.get()
+
+        other_user = UserFactory()
+        VendorFactory(staff=[other_user])
+
+        self.assertEqual(self.job_status(job).status_code, 202)
+        with self.assertRaises(Http404):
+            self.job_status(job, other_user)
+
+    @mock.patch('vendors.tasks.render_pdf.delay')
+    def test_overdue_job_rendered_again(self, delay):
+        self.request_pdf()
+        job = OrdersAwaitingRenderingAndSending.objects.get()
+        # Its worker was killed
+        OrdersAwaitingRenderingAndSending.objects.filter(pk=job.pk).update(
+            status=OrdersAwaitingRenderingAndSending.RENDERING,
+            modified=timezone.now() - timedelta(seconds=RENDER_JOB_TIMEOUT_SECONDS + 1))
+
+        response = self.job_status(job)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(OrdersAwaitingRenderingAndSending.objects.get(pk=job.pk).status,
+                         OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER)
+
+        new_job = OrdersAwaitingRenderingAndSending.objects.exclude(pk=job.pk).get()
+        self.assertIn(new_job.pdf_url, response.content.decode('utf-8'))
+        self.assertEqual(list(new_job.recipients.all()), [self.user])
+        self.assertEqual(delay.call_count, 2)
+        self.assertEqual(delay.call_args_list[1][0], (new_job.pk, json.loads(json.dumps(delay.call_args_list[0][0][1]))))
+
+        # Asking again waits on the new job
+        self.request_pdf()
+        self.assertEqual(delay.call_count, 2)
+
+    def test_job_failed_when_retries_run_out(self):
+        job = OrdersAwaitingRenderingAndSending.objects.create(
+            status=OrdersAwaitingRenderingAndSending.REQUESTING_RENDER)
+        with mock.patch('vendors.tasks.OrdersAwaitingRenderingAndSending.objects.get',
+                        side_effect=OrdersAwaitingRenderingAndSending.DoesNotExist):
+            self.assertFalse(render_pdf.apply(args=(job.pk, []), retries=render_pdf.max_retries).result)
+        self.assertEqual(OrdersAwaitingRenderingAndSending.objects.get(pk=job.pk).status,
+                         OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER)
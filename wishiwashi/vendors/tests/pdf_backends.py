@@ -0,0 +1,74 @@
+import os
+import shutil
+import stat
+import tempfile
+
+from django.test import SimpleTestCase
+from django.test.utils import override_settings
+import mock
+
+from ..pdf import render_files_request
+from ..pdf_backends import LocalBackend, RenderError, RenderServiceBackend, get_backend
+
+FILES = [
+    ('1', ('order_1', u'<p>Order 1 £</p>', 'text/html; charset=utf-8')),
+    ('2', ('order_2', u'<p>Order 2</p>', 'text/html; charset=utf-8')),
+]
+
+# Writes the pages it was given to the output file
+FAKE_WKHTMLTOPDF = """#!/bin/sh
+eval output=\\${$#}
+pages=""
+for arg in "$@"; do
+    case "$arg" in *.html) pages="$pages $arg";; esac
+done
+[ -n "$FAIL" ] && echo "failed" >&2 && exit 1
+cat $pages > "$output"
+"""
+
+
+class PdfBackends(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        self.binary = os.path.join(directory, 'wkhtmltopdf')
+        with open(self.binary, 'w') as f:
+            f.write(FAKE_WKHTMLTOPDF)
+        os.chmod(self.binary, stat.S_IRWXU)
+
+    def test_local(self):
+        with self.settings(WKHTMLTOPDF_BINARY=self.binary):
+            content = LocalBackend().render(FILES)
+
+        self.assertEqual(content, u'<p>Order 1 £</p><p>Order 2</p>'.encode('utf-8'))
+
+    def test_local_failure(self):
+        with self.settings(WKHTMLTOPDF_BINARY=self.binary):
+            with mock.patch.dict(os.environ, {'FAIL': '1'}):
+                with self.assertRaises(RenderError):
+                    LocalBackend().render(FILES)
+
+    def test_local_not_installed(self):
+        with self.settings(WKHTMLTOPDF_BINARY=self.binary + '-missing'):
+            with self.assertRaises(RenderError):
+                LocalBackend().render(FILES)
+
+    @mock.patch('requests.Session.post')
+    def test_render_service(self, post):
+        post.return_value = mock.Mock(status_code=200, content=b'%PDF')
+        self.assertEqual(RenderServiceBackend().render(FILES), b'%PDF')
+
+        post.return_value = mock.Mock(status_code=503, text='Unavailable')
+        response = render_files_request(FILES, 'Orders')
+        self.assertEqual((response.status_code, response.content), (503, b'Unavailable'))
+
+    def test_configured_backend(self):
+        self.assertIsInstance(get_backend(), RenderServiceBackend)
+
+        with override_settings(VENDOR_PDF_BACKEND='vendors.pdf_backends.LocalBackend',
+                               WKHTMLTOPDF_BINARY=self.binary):
+            self.assertIsInstance(get_backend(), LocalBackend)
+            response = render_files_request(FILES, 'Orders')
+
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="Orders.pdf"')
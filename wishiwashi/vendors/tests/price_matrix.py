@@ -0,0 +1,68 @@
+from decimal import Decimal
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.test.utils import override_settings
+from django.utils.six import StringIO
+import mock
+
+from base.fake_redis import FakeRedis
+from bookings.factories import ItemAndQuantityFactory, ItemFactory, OrderFactory, VendorFactory
+from .factories import CleanAndCollectPricesFactory, DefaultCleanAndCollectPricesFactory
+from ..models import DefaultCleanAndCollectPrices
+from ..payments import clean_and_collect_amount
+from ..price_matrix import (CLEAN_AND_COLLECT, VERSION_KEY, clear_price_matrices, default_prices,
+                            vendor_prices)
+
+
+class PriceMatrix(TestCase):
+    def setUp(self):
+        self.vendor = VendorFactory()
+        self.items = [ItemAndQuantityFactory(quantity=2), ItemAndQuantityFactory(quantity=1)]
+        self.order = OrderFactory(assigned_to_vendor=self.vendor, items=self.items)
+
+        CleanAndCollectPricesFactory(vendor=self.vendor, item=self.items[0].item, price=Decimal('1.50'))
+        DefaultCleanAndCollectPricesFactory(item=self.items[0].item, price=Decimal('1.00'))
+        self.default = DefaultCleanAndCollectPricesFactory(item=self.items[1].item, price=Decimal('2.25'))
+
+    def test_resolved_with_defaults(self):
+        with self.assertNumQueries(2):
+            prices = vendor_prices(CLEAN_AND_COLLECT, self.vendor.pk)
+        self.assertEqual(prices, {self.items[0].item.pk: Decimal('1.50'),
+                                  self.items[1].item.pk: Decimal('2.25')})
+
+        self.assertEqual(vendor_prices(CLEAN_AND_COLLECT, VendorFactory().pk),
+                         {self.items[0].item.pk: Decimal('1.00'),
+                          self.items[1].item.pk: Decimal('2.25')})
+
+        with self.assertRaises(DefaultCleanAndCollectPrices.DoesNotExist):
+            prices[ItemFactory().pk]
+
+    @override_settings(VENDOR_PRICES_CACHE_ON=True)
+    def test_cached_until_prices_change(self):
+        redis = FakeRedis()
+        clear_price_matrices()
+        self.addCleanup(clear_price_matrices)
+
+        with mock.patch('vendors.price_matrix.get_redis', return_value=redis):
+            self.assertEqual(clean_and_collect_amount(self.order), Decimal('5.25'))
+
+            # Only the version is read
+            with self.assertNumQueries(1):
+                self.assertEqual(clean_and_collect_amount(self.order), Decimal('5.25'))
+            with self.assertNumQueries(0):
+                default_prices(CLEAN_AND_COLLECT)
+
+            self.default.price = Decimal('3.00')
+            self.default.save()
+            self.assertEqual(redis.get(VERSION_KEY), b'1')
+            self.assertEqual(clean_and_collect_amount(self.order), Decimal('6.00'))
+
+    def test_default_prices_command(self):
+        item = ItemFactory(price=Decimal('12.00'))
+
+        call_command('default_clean_collect_and_clean_only_prices', stdout=StringIO())
+
+        # 12.00 ex VAT is 10.00, vendors are paid 70% of it
+        self.assertEqual(default_prices(CLEAN_AND_COLLECT)[item.pk], Decimal('7.00'))
+        self.assertEqual(DefaultCleanAndCollectPrices.objects.count(), 3)
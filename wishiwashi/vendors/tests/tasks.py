@@ -6,7 +6,9 @@ import simplejson as json
 from decimal import Decimal
 
 from django.conf import settings
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.test.utils import override_settings
 from django.utils import timezone
 from freezegun import freeze_time
@@ -42,7 +44,9 @@ from .patches import (create_order,
 from .factories import (DefaultCleanAndCollectPricesFactory,
                         CleanAndCollectPricesFactory,
                         DefaultCleanOnlyPricesFactory,
-                        CleanOnlyPricesFactory)
+                        CleanOnlyPricesFactory,
+                        OrderPaymentsFactory)
+from ..models import OrderPayments
 
 
 @override_settings(COMMUNICATE_SERVICE_ENDPOINT='http://dummy',
@@ -198,7 +202,7 @@ class Tasks(TestCase):
         profile2.email_notifications_enabled = True
         profile2.save()
 
-    @mock.patch('requests.post', fake_job_resp)
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=fake_job_resp))
     def test_notify_vendors_of_orders_via_email(self):
         outcodes = [OutCodesFactory(out_code='sw10')]
 
@@ -216,7 +220,7 @@ class Tasks(TestCase):
         resp = notify_vendors_of_orders_via_email(order.pk)
         self.assertTrue(resp)
 
-    @mock.patch('requests.post', fake_resp_error)
+    @mock.patch('requests.Session.post', mock.Mock(side_effect=fake_resp_error))
     def test_notify_vendors_of_orders_via_email_failure(self):
         outcodes = [OutCodesFactory(out_code='sw10')]
 
@@ -340,6 +344,26 @@ class Tasks(TestCase):
         all_staff = list(chain(vendor1.staff.all(), vendor2.staff.all()))
         self.assertEqual(set(user.email for user in all_staff), vendor_recipients())
 
+    def test_vendor_recipients_single_query(self):
+        outcodes = [OutCodesFactory(out_code='sw8'),
+                    OutCodesFactory(out_code='sw10')]
+
+        users = [UserFactory() for _ in range(0, 6)]
+        for index, user in enumerate(users):
+            UserProfileFactory(user=user,
+                               email_notifications_enabled=bool(index % 3))
+
+        VendorFactory(staff=users[:3], catchment_area=outcodes)
+        VendorFactory(staff=users[3:], catchment_area=outcodes)
+        # Not a member of staff
+        UserProfileFactory(user=UserFactory(), email_notifications_enabled=True)
+
+        with self.assertNumQueries(1):
+            recipients = vendor_recipients('SW10')
+
+        self.assertEqual(set(user.email for index, user in enumerate(users) if index % 3),
+                         recipients)
+
     @freeze_time("2014-05-08 03:00:00")
     def test_assign_vendor_payments_clean_and_collect(self):
         item = ItemFactory(price=Decimal('17.20'))
@@ -491,6 +515,71 @@ class Tasks(TestCase):
             expected_total
         )
 
+    def create_orders_due_payment(self, count):
+        item = ItemFactory(price=Decimal('17.20'))
+        DefaultCleanAndCollectPricesFactory(item=item, price=Decimal('1.99'))
+        DefaultCleanOnlyPricesFactory(item=item, price=Decimal('1.63'))
+        placed_time = datetime.datetime(2014, 4, 13, 14, tzinfo=pytz.utc)
+
+        orders = []
+        for index in range(count):
+            order = OrderFactory(placed_time=placed_time,
+                                 items=[ItemAndQuantityFactory(quantity=2, item=item)],
+                                 order_status=Order.DELIVERED_BACK_TO_CUSTOMER,
+                                 placed=True)
+            if index % 2:
+                clean_only_order = CleanOnlyOrderFactory(order=order, assigned_to_vendor=VendorFactory())
+                ExpectedBackCleanOnlyOrderFactory(confirmed_back=True, clean_only_order=clean_only_order)
+            orders.append(order)
+        return orders
+
+    @freeze_time("2014-05-08 03:00:00")
+    def test_assign_vendor_payments_queries_independent_of_orders(self):
+        queries = []
+        for count in (2, 6):
+            OrderPayments.objects.all().delete()
+            self.create_orders_due_payment(count)
+            with CaptureQueriesContext(connection) as captured:
+                assign_vendor_payments()
+            queries.append(len(captured))
+
+        self.assertEqual(queries[0], queries[1])
+        self.assertEqual(OrderPayments.objects.count(), 8)
+        self.assertEqual(sorted(set(OrderPayments.objects.values_list('total_amount', flat=True))),
+                         [Decimal('3.26'), Decimal('3.98')])
+
+    @freeze_time("2014-05-08 03:00:00")
+    def test_assign_vendor_payments_resumes(self):
+        orders = self.create_orders_due_payment(5)
+        OrderPaymentsFactory(order=orders[0], total_amount=Decimal('1.00'))
+
+        with mock.patch('vendors.tasks.VENDOR_PAYMENTS_BATCH_SIZE', 2), \
+                mock.patch('vendors.tasks.VENDOR_PAYMENTS_SECONDS', -1), \
+                mock.patch('vendors.tasks.assign_vendor_payments.delay') as delay:
+            assign_vendor_payments()
+
+        self.assertTrue(delay.called)
+        self.assertEqual(OrderPayments.objects.count(), 3)
+
+        assign_vendor_payments()
+        self.assertEqual(OrderPayments.objects.count(), 5)
+        self.assertEqual(OrderPayments.objects.get(order=orders[0]).total_amount, Decimal('1.00'))
+
+    @freeze_time("2014-05-08 03:00:00")
+    def test_assign_vendor_payments_skips_unpriced_orders(self):
+        orders = self.create_orders_due_payment(3)
+        unpriced = OrderFactory(placed_time=orders[0].placed_time,
+                                items=[ItemAndQuantityFactory(quantity=1, item=ItemFactory())],
+                                order_status=Order.DELIVERED_BACK_TO_CUSTOMER,
+                                placed=True)
+
+        with mock.patch('vendors.payments.logger') as logger:
+            assign_vendor_payments()
+
+        self.assertTrue(logger.exception.called)
+        self.assertEqual(OrderPayments.objects.count(), 3)
+        self.assertFalse(OrderPayments.objects.filter(order=unpriced).exists())
+
     @freeze_time("2014-05-08 21:00:00")
     def test_new_orders_assigned_to_default_clean_only_vendor(self):
         placed_time = datetime.datetime(2014, 5, 10, 14, tzinfo=pytz.utc)
@@ -10,11 +10,12 @@ from django.test.client import Client, RequestFactory
 from freezegun import freeze_time
 import mock
 
-from bookings.models import Address, Order, Vendor, ExpectedBackCleanOnlyOrder
+from bookings.models import Address, Item, Order, Vendor, ExpectedBackCleanOnlyOrder
 from bookings.factories import (ItemFactory, ItemAndQuantityFactory, OrderFactory, UserFactory, VendorFactory,
                                 ExpectedBackCleanOnlyOrderFactory)
 from customer_service.models import UserProfile
 from ..models import IssueType
+from .factories import DefaultCleanAndCollectPricesFactory, DefaultCleanOnlyPricesFactory
 from ..tests.patches import create_order, create_vendor, fake_delay
 from ..views import (orders_to_pick_up, orders_to_drop_off, orders as orders_page,
                      order_payments, expected_back_clean_only, expected_back_clean_only_confirm,
@@ -974,6 +975,25 @@ class Views(TestCase):
             response = default_prices(request)
             self.assertEqual(response.status_code, 403)
 
+    def test_default_prices_csv(self):
+        user = UserFactory()
+        vendor = VendorFactory(staff=[user])
+        Item.objects.all().delete()
+        items = [ItemFactory(name='Shirt', price=Decimal('12.00')), ItemFactory(name='Suit', price=Decimal('24.00'))]
+        for item in items:
+            DefaultCleanOnlyPricesFactory(item=item, price=item.price / 4)
+            DefaultCleanAndCollectPricesFactory(item=item, price=item.price / 2)
+
+        request = RequestFactory().post(reverse('vendors:default_prices'))
+        request.user = user
+
+        with self.settings(VENDOR_WISHI_WASHI_PK=vendor.pk):
+            response = default_prices(request)
+
+        self.assertEqual(response.content.decode('utf-8').splitlines()[1:],
+                         ['Shirt,{},12.00,10.00,3.00,30.0,6.00,60.0'.format(items[0].category.name),
+                          'Suit,{},24.00,20.00,6.00,30.0,12.00,60.0'.format(items[1].category.name)])
+
     def test_pdf_order_not_owned_by_vendor(self):
         user = UserFactory()
         VendorFactory(staff=[user])
@@ -994,7 +1014,7 @@ class Views(TestCase):
 
         self.assertRaises(Http404, pdf_order, request, 12345678)
 
-    @mock.patch('vendors.pdf.requests.post')
+    @mock.patch('requests.Session.post')
     def test_pdf_order(self, mock_post):
         mock_post.return_value = fake_requests
         user = UserFactory()
@@ -32,6 +32,7 @@ urlpatterns = patterns(
         name='expected_back_clean_only_confirm'),
     url(r'^default\-prices$', 'vendors.views.default_prices', name='default_prices'),
     url(r'^pdf/(?P<order_pk>\d+)$', 'vendors.views.pdf_order', name='pdf_order'),
+    url(r'^pdf\-job/(?P<job_pk>\d+)$', 'vendors.views.pdf_job', name='pdf_job'),
     url(r'^weekly-upcoming$', 'vendors.views.weekly_upcoming', name='weekly_upcoming'),
     url(r'^update-order/(?P<order_pk>\d+)/$', 'vendors.views.update_order', name='update_order'),
 )
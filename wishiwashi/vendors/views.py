@@ -11,6 +11,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.humanize.templatetags.humanize import naturaltime
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
+from django.db import transaction
 from django.http import (Http404, HttpResponse,
                          HttpResponseForbidden,
                          HttpResponseNotFound,
@@ -26,7 +27,10 @@ from bookings.models import Item, OperatingTimeRange, Order, OutCodes, ExpectedB
 from bookings.templatetags.phone_numbers import format_phone_number
 from bookings.templatetags.postcodes import format_postcode
 from customer_service.models import UserProfile
+from .claims import claim_order, throw_back_orders
 from .decorators import vendor_required, wishi_washi_vendor_view
+from .heartbeat import heartbeat
+from .live_orders import latest_published_order_pk, long_polling, wait_for_orders_after
 from .forms import (OperatingHoursForm,
                     OutCodeCatchmentForm,
                     ContactAndNotificationsForm,
@@ -37,13 +41,13 @@ from .forms import (OperatingHoursForm,
                     TagsForm)
 from .models import (IssueType,
                      OrderIssue,
-                     DefaultCleanOnlyPrices,
-                     DefaultCleanAndCollectPrices)
+                     OrdersAwaitingRenderingAndSending)
 from .tasks import notify_vendors_of_orders_via_email
 from .orders import prepare_for_pdf, add_order_to_files, html_upcoming_orders
 from .pick_ups import vendor_pick_ups
 from .templatetags.add_one_hour import add_one_hour
-from .pdf import render_files_request
+from .pdf import cached_pdf, is_overdue, pdf_response, request_pdf, requeue_overdue, waiting_for_pdf
+from .price_matrix import CLEAN_AND_COLLECT, CLEAN_ONLY, default_prices as default_vendor_prices
 from .upcoming import (orders_upcoming, monday_start_sunday_end_datetime_range,
                        weekly_hourly_booked_slots, void_weekly_empty_slots_past)
 
@@ -75,8 +79,10 @@ def orders(request):
         authorisation_status=Order.SUCCESSFULLY_AUTHORISED
     ).order_by('-pk')[:50]
 
-    request.user.vendor.last_viewed_the_orders_page = timezone.now()
-    request.user.vendor.save()
+    # Dashboards waiting on new orders ask again as soon as they're answered
+    context['poll_delay_ms'] = 1000 if long_polling() else 15000
+
+    heartbeat(request.user.vendor)
 
     return render_to_response('vendors/orders.html', context, context_instance=RequestContext(request))
 
@@ -253,18 +259,16 @@ def accepted_order(request, order_pk):
     except IndexError:
         raise Http404()
 
-    if order.assigned_to_vendor is None:
-        order.assigned_to_vendor = request.user.vendor
-        order.order_status = Order.CLAIMED_BY_VENDOR
-        order.order_claimed_time = timezone.now()
-        order.save()
-
-    if order.assigned_to_vendor != request.user.vendor:
+    # Already theirs, or someone else's if they don't get it now
+    if (order.assigned_to_vendor_id != request.user.vendor.pk and
+            not claim_order(order.pk, request.user.vendor)):
         return HttpResponseForbidden("You cannot accept this order")
 
     return HttpResponseRedirect(reverse('vendors:order', kwargs={'order_pk': order.pk}))
 
 
+# Don't hold a transaction open while waiting for new orders
+@transaction.non_atomic_requests
 @require_http_methods(["POST"])
 @login_required()
 @vendor_required()
@@ -275,15 +279,23 @@ def get_latest_orders(request):
         # Unable to parse latest_order_id
         latest_order_id = 0 # Just start at the beginning
 
+    heartbeat(request.user.vendor)
+
+    if not wait_for_orders_after(latest_order_id):
+        return JsonResponse({'orders': [], 'latest_order_id': latest_order_id})
+
+    # Read before the orders, anything published up to it is in the query
+    published_order_id = latest_published_order_pk() or 0
+
     # If someone sends a low order number do not allow them to collect more
     # than 50 records and orders more than 2 days old no longer show up
     now = timezone.now()
 
-    orders = Order.objects.filter(
+    orders = list(Order.objects.filter(
         pk__gt=latest_order_id,
         placed_time__gt=now - datetime.timedelta(days=2),
         authorisation_status=Order.SUCCESSFULLY_AUTHORISED
-    ).order_by('-pk')[:50]
+    ).order_by('-pk')[:50])
 
     london = pytz.timezone(settings.TIME_ZONE)
 
@@ -310,11 +322,9 @@ def get_latest_orders(request):
             'confirm_accept_order_url': reverse('vendors:confirm_accept_order',
                                                 kwargs={'order_pk': order.pk})
         } for order in orders],
+        'latest_order_id': max([latest_order_id, published_order_id] + [order.pk for order in orders]),
     })
 
-    request.user.vendor.last_viewed_the_orders_page = timezone.now()
-    request.user.vendor.save()
-
     return resp
 
 
@@ -370,7 +380,7 @@ def orders_to_pick_up_pdf(request):
     if not files:
         raise Http404()
 
-    return render_files_request(files, filename="Orders-to-pick-up-{}".format(today_start.date()))
+    return request_pdf(request, orders, files, filename="Orders-to-pick-up-{}".format(today_start.date()))
 
 
 @require_http_methods(["GET"])
@@ -401,18 +411,19 @@ def orders_to_drop_off_pdf(request):
     today_start, today_end = get_todays_time_range()
 
     files = []
-    for order in Order.objects.filter(assigned_to_vendor=request.user.vendor,
-                                      drop_off_time__gte=today_start,
-                                      drop_off_time__lt=today_end,
-                                      placed=True,
-                                      order_status=Order.RECEIVED_BY_VENDOR
-                                      ).order_by('drop_off_time'):
+    orders = Order.objects.filter(assigned_to_vendor=request.user.vendor,
+                                  drop_off_time__gte=today_start,
+                                  drop_off_time__lt=today_end,
+                                  placed=True,
+                                  order_status=Order.RECEIVED_BY_VENDOR
+                                  ).order_by('drop_off_time')
+    for order in orders:
         add_order_to_files(prepare_for_pdf(order), files)
 
     if not files:
         raise Http404()
 
-    return render_files_request(files, filename="Orders-to-drop-off-{}".format(today_start.date()))
+    return request_pdf(request, orders, files, filename="Orders-to-drop-off-{}".format(today_start.date()))
 
 
 @require_http_methods(["GET"])
@@ -601,21 +612,11 @@ def throw_orders_back_in_pool(request):
     now_utc = timezone.now()
     three_hours_from_now = now_utc + timedelta(hours=HOURS_FOR_THROWBACK)
 
-    orders = Order.objects.filter(pk__in=order_pks,
-                                  assigned_to_vendor=request.user.vendor,
-                                  order_status=Order.CLAIMED_BY_VENDOR,
-                                  pick_up_time__gte=three_hours_from_now)
+    thrown_back_pks = throw_back_orders(order_pks, request.user.vendor, three_hours_from_now)
+    thrown_back, rejected = len(thrown_back_pks), len(order_pks) - len(thrown_back_pks)
 
-    thrown_back, rejected = len(orders), len(order_pks) - len(orders)
-
-    for order in orders:
-        order.assigned_to_vendor = None
-        order.order_status = Order.UNCLAMIED_BY_VENDORS
-        order.order_claimed_time = None
-        order.thrown_back_time = timezone.now()
-        order.save()
-
-        notify_vendors_of_orders_via_email.delay(order.pk)
+    for order_pk in thrown_back_pks:
+        notify_vendors_of_orders_via_email.delay(order_pk)
 
     context = {
         'title': 'Throw orders back into the pool',
@@ -780,7 +781,7 @@ def upcoming_pdf(request):
     html = html_upcoming_orders(orders, date)
     files = [('{}'.format(date), ('Upcoming {}'.format(date), html, 'text/html; charset=utf-8'))]
 
-    return render_files_request(files, filename="Upcoming-{}".format(date))
+    return request_pdf(request, orders, files, filename="Upcoming-{}".format(date))
 
 
 @require_http_methods(["GET"])
@@ -879,10 +880,13 @@ def default_prices(request):
     """
     Wishi washi view for vendors default prices
     """
+    clean_only_prices = default_vendor_prices(CLEAN_ONLY)
+    clean_and_collect_prices = default_vendor_prices(CLEAN_AND_COLLECT)
+
     results = []
-    for item in Item.objects.all().order_by('name', 'category__name'):
-        clean_only = DefaultCleanOnlyPrices.objects.get(item=item)
-        clean_and_collect = DefaultCleanAndCollectPrices.objects.get(item=item)
+    for item in Item.objects.select_related('category').order_by('name', 'category__name'):
+        clean_only = clean_only_prices[item.pk]
+        clean_and_collect = clean_and_collect_prices[item.pk]
 
         price_ex_vat = (item.price / Decimal('1.2')).quantize(Decimal('0.00'))
         results.append(
@@ -891,10 +895,10 @@ def default_prices(request):
                 'category': item.category.name,
                 'price': item.price,
                 'price_ex_vat': price_ex_vat,
-                'clean_only': clean_only.price,
-                'per_clean_only': (Decimal(100) * (clean_only.price / price_ex_vat)).quantize(Decimal('0.0')),
-                'clean_and_collect': clean_and_collect.price,
-                'per_clean_and_collect': (Decimal(100) * (clean_and_collect.price / price_ex_vat)).quantize(
+                'clean_only': clean_only,
+                'per_clean_only': (Decimal(100) * (clean_only / price_ex_vat)).quantize(Decimal('0.0')),
+                'clean_and_collect': clean_and_collect,
+                'per_clean_and_collect': (Decimal(100) * (clean_and_collect / price_ex_vat)).quantize(
                     Decimal('0.0'))
             }
 
@@ -938,7 +942,42 @@ def pdf_order(request, order_pk):
     files = []
     add_order_to_files(order, files)
 
-    return render_files_request(files, filename="Order#{}".format(order.uuid))
+    return request_pdf(request, [order], files, filename="Order#{}".format(order.uuid))
+
+
+@require_http_methods(["GET"])
+@login_required()
+@vendor_required()
+def pdf_job(request, job_pk):
+    try:
+        job = OrdersAwaitingRenderingAndSending.objects.get(pk=job_pk, recipients=request.user)
+    except ObjectDoesNotExist:
+        raise Http404()
+
+    if is_overdue(job):
+        job = requeue_overdue(job) or OrdersAwaitingRenderingAndSending.objects.get(pk=job.pk)
+
+    if request.GET.get('json'):
+        return JsonResponse({
+            'job_id': job.pk,
+            'status': job.get_status_display(),
+            'ready': job.status == OrdersAwaitingRenderingAndSending.RENDERED,
+        })
+
+    filename = request.GET.get('filename') or 'Orders-{}'.format(job.pk)
+
+    if job.status == OrdersAwaitingRenderingAndSending.FAILED_TO_RENDER:
+        return HttpResponse("Unable to render the PDF, please try again", status=500)
+
+    if job.status != OrdersAwaitingRenderingAndSending.RENDERED:
+        return waiting_for_pdf(request, job, filename)
+
+    content = cached_pdf(job.render_service_job_uuid)
+    if content is None:
+        # Expired, asking for the PDF again renders it again
+        raise Http404()
+
+    return pdf_response(content, filename)
 
 
 @require_http_methods(["GET"])